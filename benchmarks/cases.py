@@ -0,0 +1,238 @@
+import itertools
+import logging
+import threading
+from proto import mafia_pb2
+from server.server_events import MAFIA, SHERIFFS, Audience, EventBus
+from server.server_player import Player
+from server.server_ring import HashRing
+from server.server_room import Room
+from server.server_scheduler import VirtualScheduler
+from server.server_vote import Voting
+from server.utils.lock import ReadWriteLock
+from server.utils.logging import logging_on_call
+from benchmarks.harness import benchmark
+
+
+PLAYER_COUNTS = (4, 7)
+CONTENDING_THREADS = 4
+LOCK_OPS_PER_THREAD = 2000
+
+
+def _started_room(players_number, messages_number=20) -> Room:
+    game_rules = mafia_pb2.GameRules(ActivePlayersNumber=players_number, MafiaNumber=1, SheriffNumber=1)
+    room = Room(game_rules, room_id='bench', seed=0, scheduler=VirtualScheduler())
+    for ind in range(players_number):
+        room.add_player(f'player{ind}')
+    for ind in range(messages_number):
+        room.send_message(f'player{ind % players_number}', f'message {ind}')
+    return room
+
+
+def _register_room_view(players_number):
+    @benchmark(f'room_view/cached/players={players_number}')
+    def room_view_cached():
+        room = _started_room(players_number)
+        return lambda: room.view('player0')
+
+    @benchmark(f'room_view/cold/players={players_number}')
+    def room_view_cold():
+        room = _started_room(players_number)
+
+        def operation():
+            room.updates.touch([])  # every view is built for a new version
+            room.view('player0')
+        return operation
+
+
+for _players_number in PLAYER_COUNTS:
+    _register_room_view(_players_number)
+
+
+def _full_event_bus() -> EventBus:
+    event_bus = EventBus()
+    audiences = [Audience.player('player0'), MAFIA, SHERIFFS]
+    for ind in range(3 * event_bus.max_size):
+        audience = audiences[ind % len(audiences)] if ind % 2 == 0 else None
+        if audience is None:
+            event_bus.add_event(f'event {ind}')
+        else:
+            event_bus.add_event(f'event {ind}', audience=audience)
+    return event_bus
+
+
+def _mafia(username, seat=0) -> Player:
+    player = Player(username, seat=seat)
+    player.set_mafia()
+    return player
+
+
+@benchmark('event_bus_view/full_window')
+def event_bus_view():
+    event_bus = _full_event_bus()
+    player = _mafia('player0')
+    return lambda: event_bus.view(player)
+
+
+@benchmark('event_bus_view/full_window/new_event')
+def event_bus_view_new_event():
+    event_bus = _full_event_bus()
+    player = _mafia('player0')
+
+    def operation():
+        event_bus.add_event('event')
+        event_bus.view(player)
+    return operation
+
+
+@benchmark('player/view')
+def player_view():
+    player, other = _mafia('player0'), _mafia('player1', seat=1)
+    other.kill()
+    return lambda: player.view(other)
+
+
+@benchmark('player/know_about')
+def player_know_about():
+    player, other = _mafia('player0'), Player('player1', seat=1)
+    other.set_civilian()
+    return lambda: player.know_about(other)
+
+
+def _voting(players_number=7) -> Voting:
+    players = {f'player{ind}': _mafia(f'player{ind}', seat=ind) for ind in range(players_number)}
+    return Voting(players, players)
+
+
+@benchmark('voting/vote')
+def voting_vote():
+    voting = _voting()
+    suspects = itertools.cycle(['player1', 'player2'])  # every vote changes the suspect
+    return lambda: voting.vote('player0', next(suspects))
+
+
+@benchmark('voting/get_most_voted_username')
+def voting_most_voted():
+    voting = _voting()
+    for ind in range(7):
+        voting.vote(f'player{ind}', f'player{ind % 3}')
+    return voting.get_most_voted_username
+
+
+@benchmark('voting/is_everyone_voted')
+def voting_is_everyone_voted():
+    voting = _voting()
+    for ind in range(6):
+        voting.vote(f'player{ind}', 'player0')
+    return voting.is_everyone_voted
+
+
+@benchmark('voting/view')
+def voting_view():
+    voting = _voting()
+    return lambda: voting.view(None)
+
+
+@benchmark('voting/view/after_vote')
+def voting_view_after_vote():
+    voting = _voting()
+    suspects = itertools.cycle(['player1', 'player2'])
+
+    def operation():
+        voting.vote('player0', next(suspects))
+        voting.view(None)
+    return operation
+
+
+@benchmark('ring/owner')
+def ring_owner():
+    ring = HashRing([f'127.0.0.1:{2000 + 100 * ind}' for ind in range(1, 9)])
+    return lambda: ring.owner('8c7f2e1a')
+
+
+@benchmark('rwlock/read/uncontended')
+def rwlock_read():
+    lock = ReadWriteLock()
+
+    def operation():
+        lock.acquire_read()
+        lock.release_read()
+    return operation
+
+
+@benchmark('rwlock/write/uncontended')
+def rwlock_write():
+    lock = ReadWriteLock()
+
+    def operation():
+        lock.acquire_write()
+        lock.release_write()
+    return operation
+
+
+# NOTE: one call is a batch of lock operations done by all threads at once,
+# every fourth thread is a writer
+@benchmark(f'rwlock/mixed/threads={CONTENDING_THREADS}', ops_per_call=CONTENDING_THREADS * LOCK_OPS_PER_THREAD)
+def rwlock_contended():
+    lock = ReadWriteLock()
+
+    def reader():
+        for _ in range(LOCK_OPS_PER_THREAD):
+            lock.acquire_read()
+            lock.release_read()
+
+    def writer():
+        for _ in range(LOCK_OPS_PER_THREAD):
+            lock.acquire_write()
+            lock.release_write()
+
+    def operation():
+        threads = [threading.Thread(target=writer if ind % 4 == 0 else reader) for ind in range(CONTENDING_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return operation
+
+
+class _Logged:
+    def __init__(self):
+        self.value = 0
+
+    def plain(self, number):
+        self.value += number
+
+    @logging_on_call('Add {number}', level=logging.DEBUG, logger=logging.getLogger('benchmarks.disabled'))
+    def logged_disabled(self, number):
+        self.value += number
+
+    @logging_on_call('Add {number}', level=logging.INFO, logger=logging.getLogger('benchmarks.enabled'))
+    def logged_enabled(self, number):
+        self.value += number
+
+
+def _setup_loggers():
+    logging.getLogger('benchmarks.disabled').setLevel(logging.INFO)
+    enabled = logging.getLogger('benchmarks.enabled')
+    enabled.setLevel(logging.INFO)
+    enabled.propagate = False
+    enabled.handlers = [logging.NullHandler()]
+
+
+@benchmark('logging_on_call/undecorated')
+def logging_undecorated():
+    obj = _Logged()
+    return lambda: obj.plain(1)
+
+
+@benchmark('logging_on_call/disabled')
+def logging_disabled():
+    _setup_loggers()
+    obj = _Logged()
+    return lambda: obj.logged_disabled(1)
+
+
+@benchmark('logging_on_call/enabled')
+def logging_enabled():
+    _setup_loggers()
+    obj = _Logged()
+    return lambda: obj.logged_enabled(1)
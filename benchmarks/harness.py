@@ -0,0 +1,101 @@
+import gc
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], None]]  # returns the operation to measure
+    ops_per_call: int = 1  # number of operations performed by one call of the operation
+
+
+class Result(NamedTuple):
+    ns_per_op: float  # median over repeats
+    min_ns_per_op: float
+    calls: int
+
+
+BENCHMARKS = []  # List[Benchmark]
+
+
+def benchmark(name, ops_per_call=1):
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, ops_per_call))
+        return setup
+    return decorator
+
+
+def measure(bench: Benchmark, repeat=5, min_time=0.1) -> Result:
+    operation = bench.setup()
+    calls = _calibrate(operation, min_time)
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(calls):
+                operation()
+            timings.append((time.perf_counter_ns() - start) / (calls * bench.ops_per_call))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return Result(statistics.median(timings), min(timings), calls)
+
+
+def run(benchmarks: List[Benchmark], repeat=5, min_time=0.1, report=print) -> Dict:
+    results = {}
+    for bench in benchmarks:
+        result = measure(bench, repeat, min_time)
+        results[bench.name] = result._asdict()
+        report(f'{bench.name:<48} {_format_ns(result.ns_per_op):>12}/op')
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+
+
+# NOTE: minimal time of repeats is compared since it's the least affected by noise,
+# benchmarks which are absent in one of the runs are skipped
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[Dict]:
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = result['min_ns_per_op'] / base['min_ns_per_op'] - 1.0
+        rows.append({
+            'name': name,
+            'baseline_ns': base['min_ns_per_op'],
+            'current_ns': result['min_ns_per_op'],
+            'change': change,
+            'regression': change > threshold,
+        })
+    return rows
+
+
+def _calibrate(operation, min_time) -> int:
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls
+        calls = calls * 2 if elapsed == 0 else max(calls * 2, int(calls * min_time / elapsed * 1.2))
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f'{ns / 1e6:.2f} ms'
+    if ns >= 1e3:
+        return f'{ns / 1e3:.2f} us'
+    return f'{ns:.1f} ns'
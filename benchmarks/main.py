@@ -0,0 +1,58 @@
+import argparse
+import json
+import logging
+import sys
+from benchmarks import cases  # noqa: F401, registers benchmarks
+from benchmarks.harness import BENCHMARKS, compare, run
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Microbenchmarks of server hot paths')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='Run benchmarks')
+    run_parser.add_argument('--filter', type=str, default='', help='Run only benchmarks which names contain given string')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='Minimal duration of one repeat in seconds')
+    run_parser.add_argument('--output', type=str, default=None, help='Path to save results (baseline) to')
+    compare_parser = subparsers.add_parser('compare', help='Compare results with baseline')
+    compare_parser.add_argument('baseline', type=str)
+    compare_parser.add_argument('current', type=str)
+    compare_parser.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown which is considered a regression')
+    return parser.parse_args()
+
+
+def run_command(args):
+    benchmarks = [bench for bench in BENCHMARKS if args.filter in bench.name]
+    results = run(benchmarks, repeat=args.repeat, min_time=args.min_time)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+def compare_command(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        mark = 'REGRESSION' if row['regression'] else ''
+        print(f'{row["name"]:<48} {row["baseline_ns"]:>12.1f} -> {row["current_ns"]:>12.1f} ns/op {row["change"]:>+8.1%} {mark}')
+    regressions = [row for row in rows if row['regression']]
+    if len(regressions) > 0:
+        print(f'{len(regressions)} regressions beyond {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args()
+    if args.command == 'run':
+        run_command(args)
+    else:
+        sys.exit(compare_command(args))
+
+
+if __name__ == '__main__':
+    main()
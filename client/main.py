@@ -9,6 +9,7 @@ def parse_args():
     parser.add_argument('--username', type=str)
     parser.add_argument('--server-host', type=str)
     parser.add_argument('--server-port', type=int)
+    parser.add_argument('--room-id', type=str, default='', help='Room to join (default room of the server if empty)')
     return parser.parse_args()
 
 
@@ -16,7 +17,7 @@ def main():
     args = parse_args()
     with grpc.insecure_channel(f'{args.server_host}:{args.server_port}') as channel:
         stub = mafia_pb2_grpc.CoordinatorStub(channel)
-        start_client(stub, args.username)
+        start_client(stub, args.username, args.room_id)
 
 
 if __name__ == '__main__':
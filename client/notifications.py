@@ -14,15 +14,11 @@ class NotificationsView:
         while not stop():
             room_info = get_room_info()
             events = room_info.EventBus.Events
-            if len(events) > 0:
-                if self.last_seen_event_index is not None:
-                    new_events_count = events[-1].Index - self.last_seen_event_index
-                else:
-                    new_events_count = len(events)
-                if new_events_count > 0:
-                    for ind in range(len(events) - new_events_count, len(events)):
-                        self.handle_event(events[ind])
-                    self.last_seen_event_index = events[-1].Index
+            if len(events) > 0 and (self.last_seen_event_index is None or events[-1].Index > self.last_seen_event_index):
+                # NOTE: room info keeps only last events, so new events are read by cursor to not miss any of them
+                for event in self.client.get_events(after_index=self.last_seen_event_index):
+                    self.handle_event(event)
+                    self.last_seen_event_index = event.Index
             time.sleep(0.5)
 
     def handle_event(self, event: mafia_pb2.EventBus.Event):
@@ -5,7 +5,7 @@ import sys
 import time
 import threading
 import traceback
-from typing import List
+from typing import Iterable, List
 from client.console import global_console
 from client.shared_data import get_current_prompt, get_room_info, poll_room_info
 from client.notifications import NotificationsView
@@ -14,9 +14,10 @@ from proto import mafia_pb2
 
 
 class Client:
-    def __init__(self, stub, username):
+    def __init__(self, stub, username, room_id=''):
         self.stub = stub
         self.username = username
+        self.room_id = room_id
         self.disconnected = False
         self.threads = []
         self.prompts_manager = PromptsManager(self)
@@ -28,7 +29,10 @@ class Client:
         self.handle_input()
 
     def connect(self):
-        connection_response = try_(n_times=3, sleep_time_s=10)(self.stub.Connect)(mafia_pb2.User(Username=self.username))
+        connection_response = try_(n_times=3, sleep_time_s=10)(self.stub.ConnectUpdates)(mafia_pb2.ConnectRequest(
+            User = mafia_pb2.User(Username=self.username),
+            RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
+        ))
         connection_thread = threading.Thread(target=poll_room_info, args=(connection_response,), kwargs={'stop': lambda: self.disconnected is True})
         connection_thread.start()
         self.threads.append(connection_thread)
@@ -38,6 +42,7 @@ class Client:
                     console.print('Can\'t connect to server (maybe username is already taken)', style='red')
                 sys.exit(1)
             time.sleep(0.1)
+        self.room_id = get_room_info().Id.Value
 
     def show_notifications(self):
         notifications_view = NotificationsView(self, self.prompts_manager)
@@ -87,8 +92,9 @@ class Client:
 
     def send_message(self, message: str):
         try:
-            self.stub.SendMessage(mafia_pb2.Chat.Message(
-                AuthorUsername = self.username,
+            self.stub.SendMessage(mafia_pb2.SendMessageRequest(
+                User = mafia_pb2.User(Username=self.username),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
                 Text = message,
             ))
         except Exception as error:
@@ -96,7 +102,10 @@ class Client:
 
     def begin_vote(self):
         try:
-            self.stub.BeginVote(mafia_pb2.User(Username=self.username))
+            self.stub.BeginVote(mafia_pb2.BeginVoteRequest(
+                User = mafia_pb2.User(Username=self.username),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
+            ))
         except Exception as error:
             logging.error(f'Got error during begin vote: {error}')
 
@@ -105,6 +114,7 @@ class Client:
             self.stub.Vote(mafia_pb2.VoteRequest(
                 User = mafia_pb2.User(Username=self.username),
                 SuspectUser = mafia_pb2.User(Username=suspect_username),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
             ))
         except Exception as error:
             logging.error(f'Got error during vote: {error}')
@@ -114,6 +124,7 @@ class Client:
             self.stub.MafiaVote(mafia_pb2.VoteRequest(
                 User = mafia_pb2.User(Username=self.username),
                 SuspectUser = mafia_pb2.User(Username=suspect_username),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
             ))
         except Exception as error:
             logging.error(f'Got error during mafia vote: {error}')
@@ -123,6 +134,7 @@ class Client:
             self.stub.SheriffVote(mafia_pb2.VoteRequest(
                 User = mafia_pb2.User(Username=self.username),
                 SuspectUser = mafia_pb2.User(Username=suspect_username),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
             ))
         except Exception as error:
             logging.error(f'Got error during sheriff vote: {error}')
@@ -132,10 +144,36 @@ class Client:
             self.stub.Expose(mafia_pb2.ExposeRequest(
                 User = mafia_pb2.User(Username=self.username),
                 UserToExpose = mafia_pb2.User(Username=username_to_expose),
+                RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
             ))
         except Exception as error:
             logging.error(f'Got error during expose: {error}')
 
+    def get_events(self, after_index=None, page_size=100) -> Iterable[mafia_pb2.EventBus.Event]:
+        while True:
+            try:
+                events = self.stub.GetEvents(mafia_pb2.GetEventsRequest(
+                    User = mafia_pb2.User(Username=self.username),
+                    RoomId = mafia_pb2.Room.RoomId(Value=self.room_id),
+                    AfterIndex = after_index,
+                    Limit = page_size,
+                )).Events
+            except grpc.RpcError as error:
+                if error.code() == grpc.StatusCode.OUT_OF_RANGE and after_index is not None:
+                    # events after the cursor are dropped by the server, reading goes on from the first available one
+                    logging.warning(f'Some events are missed: {error.details()}')
+                    after_index = None
+                    continue
+                logging.error(f'Got error during get events: {error}')
+                return
+            except Exception as error:
+                logging.error(f'Got error during get events: {error}')
+                return
+            yield from events
+            if len(events) < page_size:
+                return
+            after_index = events[-1].Index
+
     def disconnect(self):
         try:
             room_info = get_room_info()
@@ -195,8 +233,8 @@ class Client:
         return options
 
 
-def start_client(stub, username):
-    client = Client(stub, username)
+def start_client(stub, username, room_id=''):
+    client = Client(stub, username, room_id)
     client.start()
 
 
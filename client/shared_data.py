@@ -7,6 +7,7 @@ from proto import mafia_pb2
 ROOM_INFO = None
 ROOM_INFO_HISTORY = deque()
 MAX_ROOM_INFO_HISTORY_SIZE = 20
+MAX_EVENTS_NUMBER = 100
 _lock = threading.Lock()
 
 
@@ -31,16 +32,65 @@ def set_room_info(room_info):
             # ROOM_INFO_HISTORY.append(room_info)
 
 
-def poll_room_info(response: Iterable[mafia_pb2.Room], stop=lambda: False):
+def poll_room_info(response: Iterable[mafia_pb2.RoomUpdate], stop=lambda: False):
     while not stop():
         try:
-            room_info = next(response)
-            set_room_info(room_info)
+            room_update = next(response)
+            apply_room_update(room_update)
         except Exception:
             return
     response.cancel()
 
 
+def apply_room_update(room_update: mafia_pb2.RoomUpdate):
+    if room_update.HasField('Snapshot'):
+        set_room_info(room_update.Snapshot)
+    else:
+        set_room_info(apply_room_delta(get_room_info(), room_update.Delta))
+
+
+def apply_room_delta(room_info: mafia_pb2.Room, delta: mafia_pb2.RoomDelta) -> mafia_pb2.Room:
+    new_room_info = mafia_pb2.Room()
+    new_room_info.CopyFrom(room_info)
+    new_room_info.Version = delta.Version
+    if delta.HasField('Status'):
+        new_room_info.Status = delta.Status
+    if delta.HasField('DayNumber'):
+        new_room_info.DayNumber = delta.DayNumber
+
+    if len(delta.Players) > 0 or len(delta.RemovedUsernames) > 0:
+        players = {player.Username: player for player in new_room_info.Players}
+        for username in delta.RemovedUsernames:
+            players.pop(username, None)
+        for player in delta.Players:
+            players[player.Username] = player
+        new_room_info.ClearField('Players')
+        new_room_info.Players.extend(players.values())
+
+    if delta.ChatRemoved:
+        new_room_info.ClearField('Chat')
+    elif delta.HasField('Chat'):
+        new_room_info.Chat.CopyFrom(delta.Chat)
+    if len(delta.NewMessages) > 0:
+        new_room_info.Chat.Messages.extend(delta.NewMessages)
+
+    if delta.VotingRemoved:
+        new_room_info.ClearField('Voting')
+    elif delta.HasField('Voting'):
+        new_room_info.Voting.CopyFrom(delta.Voting)
+    if len(delta.Votes) > 0:
+        votes = {vote.SuspectUsername: vote for vote in new_room_info.Voting.Votes}
+        for vote in delta.Votes:
+            votes[vote.SuspectUsername].VotesNumber = vote.VotesNumber
+
+    if len(delta.NewEvents) > 0:
+        events = new_room_info.EventBus.Events
+        events.extend(delta.NewEvents)
+        if len(events) > MAX_EVENTS_NUMBER:
+            del events[:len(events) - MAX_EVENTS_NUMBER]
+    return new_room_info
+
+
 CURRENT_PROMPT = None
 _prompt_lock = threading.Lock()
 
@@ -0,0 +1,229 @@
+import asyncio
+import grpc
+import random
+import time
+from typing import Dict, NamedTuple
+from google.protobuf import empty_pb2
+from proto import mafia_pb2, mafia_pb2_grpc
+from loadtest.stats import LoadStats
+
+
+LAG_MARK = 'lag:'  # chat messages of bots carry time of sending to measure stream lag
+FINISHED_STATUSES = (mafia_pb2.Room.RoomStatus.MAFIA_WON, mafia_pb2.Room.RoomStatus.MAFIA_LOST)
+
+
+class ActionMix(NamedTuple):
+    # relative weights of actions during chat phase
+    chat: float = 4.0
+    begin_vote: float = 1.0
+    expose: float = 0.2
+
+    @staticmethod
+    def parse(text: str) -> 'ActionMix':
+        weights = {}
+        for item in filter(None, text.split(',')):
+            name, weight = item.split('=')
+            weights[name.strip()] = float(weight)
+        return ActionMix(**weights)
+
+
+# NOTE: bots keep only the part of the room they act on (status and players),
+# so thousands of them fit into one process
+class RoomState:
+    def __init__(self):
+        self.status = None
+        self.day_number = 0
+        self.players = {}  # Dict[str, mafia_pb2.Player]: username2player
+
+    def apply(self, room_update: mafia_pb2.RoomUpdate, stats: LoadStats):
+        if room_update.HasField('Snapshot'):
+            room = room_update.Snapshot
+            self.status = room.Status
+            self.day_number = room.DayNumber
+            self.players = {player.Username: player for player in room.Players}
+            return
+        delta = room_update.Delta
+        if delta.HasField('Status'):
+            self.status = delta.Status
+        if delta.HasField('DayNumber'):
+            self.day_number = delta.DayNumber
+        for player in delta.Players:
+            self.players[player.Username] = player
+        for username in delta.RemovedUsernames:
+            self.players.pop(username, None)
+        now = time.perf_counter_ns()
+        for message in delta.NewMessages:
+            if message.Text.startswith(LAG_MARK):
+                stats.record_update_lag((now - int(message.Text[len(LAG_MARK):])) / 1e9)
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def alive_usernames(self):
+        return [username for username, player in self.players.items() if player.Status == mafia_pb2.Player.PlayerStatus.PS_ALIVE]
+
+
+# NOTE: bot chooses kinds of actions (named as in mafia_pb2.PlayAction), transport sends them:
+# Bot calls unary RPCs and listens ConnectUpdates, PlayBot sends actions to its Play stream
+class Bot:
+    stream_method_name = 'ConnectUpdates'
+
+    def __init__(self, stub: mafia_pb2_grpc.CoordinatorStub, username: str, room_id: str | None, stats: LoadStats,
+                 rate: float, mix: ActionMix = ActionMix(), rpc_timeout: float = 10.0, rng: random.Random | None = None,
+                 game_rules: mafia_pb2.GameRules | None = None):
+        self.stub = stub
+        self.user = mafia_pb2.User(Username=username)
+        self.room_id = mafia_pb2.Room.RoomId(Value=room_id) if room_id is not None else None  # found by FindGame if not set
+        self.game_rules = game_rules
+        self.stats = stats
+        self.rate = rate  # actions per second
+        self.mix = mix
+        self.rpc_timeout = rpc_timeout
+        self.rng = rng or random.Random()
+        self.room = RoomState()
+        self._connected = asyncio.Event()
+        self._acted_phase = None  # (day, status) in which bot has voted or began vote
+        self._match_call = None  # FindGame call, it's kept until the room is full
+
+    async def play(self):
+        try:
+            if self.room_id is None and not await self._find_game():
+                return
+            stream = self._open_stream()
+            listener = asyncio.create_task(self._listen(stream))
+            try:
+                await self._connected.wait()
+                while not self.room.is_finished and not listener.done():
+                    await asyncio.sleep(self.rng.expovariate(self.rate))
+                    await self._act()
+            finally:
+                stream.cancel()
+                await asyncio.gather(listener, return_exceptions=True)
+        finally:
+            if self._match_call is not None:
+                self._match_call.cancel()
+
+    async def _find_game(self) -> bool:
+        # NOTE: bot joins the first formed room, if the room is released its stream finishes
+        # and the bot stops, so it doesn't wait in the lobby again
+        start = time.perf_counter()
+        self._match_call = self.stub.FindGame(mafia_pb2.FindGameRequest(User=self.user, GameRules=self.game_rules))
+        try:
+            async for update in self._match_call:
+                if update.WhichOneof('Update') == 'RoomId':
+                    self.room_id = update.RoomId
+                    break
+        except grpc.aio.AioRpcError as error:
+            self.stats.record_rpc_error('FindGame', error.code().name)
+            return False
+        if self.room_id is None:
+            self.stats.record_rpc_error('FindGame', 'NOT_MATCHED')  # stream has finished before the room was formed
+            return False
+        self.stats.record_rpc('FindGame', time.perf_counter() - start)  # time to match
+        return True
+
+    def _open_stream(self):
+        return self.stub.ConnectUpdates(mafia_pb2.ConnectRequest(User=self.user, RoomId=self.room_id))
+
+    async def _listen(self, stream):
+        try:
+            async for response in stream:
+                self._on_response(response)
+                self._connected.set()
+        except grpc.aio.AioRpcError as error:
+            if error.code() != grpc.StatusCode.CANCELLED:
+                self.stats.record_rpc_error(self.stream_method_name, error.code().name)
+        finally:
+            self._connected.set()  # don't wait for the stream which has failed
+
+    def _on_response(self, room_update: mafia_pb2.RoomUpdate):
+        self.stats.record_update(room_update.WhichOneof('Update'), room_update.ByteSize())
+        self.room.apply(room_update, self.stats)
+
+    async def _act(self):
+        me = self.room.players.get(self.user.Username)
+        if me is None or me.Status != mafia_pb2.Player.PlayerStatus.PS_ALIVE:
+            return
+        phase = (self.room.day_number, self.room.status)
+        alive = self.room.alive_usernames()
+        suspect = mafia_pb2.User(Username=self.rng.choice(alive))
+        if self.room.status == mafia_pb2.Room.RoomStatus.CHAT_PHASE:
+            actions = ['chat', 'expose'] if self._acted_phase == phase else ['chat', 'begin_vote', 'expose']
+            if me.Role != mafia_pb2.Player.PlayerRole.PR_SHERIFF:
+                actions.remove('expose')
+            action = self.rng.choices(actions, weights=[getattr(self.mix, action) for action in actions])[0]
+            if action == 'chat':
+                await self._send('SendMessage', f'{LAG_MARK}{time.perf_counter_ns()}')
+            elif action == 'expose':
+                await self._send('Expose', suspect)
+            else:
+                self._acted_phase = phase
+                await self._send('BeginVote', empty_pb2.Empty())
+        elif self._acted_phase == phase:
+            return
+        elif self.room.status == mafia_pb2.Room.RoomStatus.VOTE_PHASE:
+            self._acted_phase = phase
+            await self._send('Vote', suspect)
+        elif self.room.status == mafia_pb2.Room.RoomStatus.NIGHT_PHASE:
+            self._acted_phase = phase
+            if me.Role == mafia_pb2.Player.PlayerRole.PR_MAFIA:
+                await self._send('MafiaVote', suspect)
+            elif me.Role == mafia_pb2.Player.PlayerRole.PR_SHERIFF:
+                await self._send('SheriffVote', suspect)
+
+    async def _send(self, kind, value):
+        await self._call(kind, UNARY_REQUESTS[kind](self, value))
+
+    async def _call(self, method_name, request):
+        start = time.perf_counter()
+        try:
+            await getattr(self.stub, method_name)(request, timeout=self.rpc_timeout)
+        except grpc.aio.AioRpcError as error:
+            self.stats.record_rpc_error(method_name, error.code().name)
+            return
+        self.stats.record_rpc(method_name, time.perf_counter() - start)
+
+
+class PlayBot(Bot):
+    stream_method_name = 'Play'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requests = asyncio.Queue()
+        self._sent = {}  # Dict[int, Tuple[str, float]]: action_id -> (kind, time of sending)
+        self._last_action_id = 0
+
+    def _open_stream(self):
+        self._requests.put_nowait(mafia_pb2.PlayRequest(Connect=mafia_pb2.ConnectRequest(User=self.user, RoomId=self.room_id)))
+        return self.stub.Play(self._read_requests())
+
+    async def _read_requests(self):
+        while True:
+            yield await self._requests.get()
+
+    def _on_response(self, response: mafia_pb2.PlayResponse):
+        if response.WhichOneof('Response') == 'Update':
+            super()._on_response(response.Update)
+            return
+        kind, sent_at = self._sent.pop(response.Ack.Id)
+        if response.Ack.Error != '':
+            self.stats.record_rpc_error(kind, 'ACK_ERROR')
+        else:
+            self.stats.record_rpc(kind, time.perf_counter() - sent_at)
+
+    async def _send(self, kind, value):
+        # latency of an action is the time until its ack is received
+        self._last_action_id += 1
+        self._sent[self._last_action_id] = (kind, time.perf_counter())
+        self._requests.put_nowait(mafia_pb2.PlayRequest(Action=mafia_pb2.PlayAction(Id=self._last_action_id, **{kind: value})))
+
+
+UNARY_REQUESTS = {  # kind of action -> request of the unary RPC with the same name
+    'SendMessage': lambda bot, text: mafia_pb2.SendMessageRequest(User=bot.user, RoomId=bot.room_id, Text=text),
+    'BeginVote': lambda bot, _: mafia_pb2.BeginVoteRequest(User=bot.user, RoomId=bot.room_id),
+    'Vote': lambda bot, suspect: mafia_pb2.VoteRequest(User=bot.user, SuspectUser=suspect, RoomId=bot.room_id),
+    'MafiaVote': lambda bot, suspect: mafia_pb2.VoteRequest(User=bot.user, SuspectUser=suspect, RoomId=bot.room_id),
+    'SheriffVote': lambda bot, suspect: mafia_pb2.VoteRequest(User=bot.user, SuspectUser=suspect, RoomId=bot.room_id),
+    'Expose': lambda bot, suspect: mafia_pb2.ExposeRequest(User=bot.user, UserToExpose=suspect, RoomId=bot.room_id),
+}
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import grpc
+import json
+import logging
+import random
+import time
+from proto import mafia_pb2, mafia_pb2_grpc
+from loadtest.bot import ActionMix, Bot, PlayBot
+from loadtest.stats import LoadStats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load generator for mafia coordination server')
+    parser.add_argument('--server-host', type=str, default='localhost')
+    parser.add_argument('--server-port', type=int, default=2000)
+    parser.add_argument('--rooms', type=int, default=10, help='Number of rooms played concurrently')
+    parser.add_argument('--players', type=int, default=4, help='Number of bots in every room')
+    parser.add_argument('--mafia', type=int, default=1)
+    parser.add_argument('--sheriffs', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=100.0, help='Target number of actions per second of all bots')
+    parser.add_argument('--mix', type=str, default='chat=4,begin_vote=1,expose=0.2', help='Weights of actions during chat phase')
+    parser.add_argument('--transport', type=str, choices=('unary', 'play'), default='unary',
+                        help='Send actions by unary RPCs (and listen ConnectUpdates) or by one Play stream per bot')
+    parser.add_argument('--matchmaking', action='store_true', help='Bots find rooms by FindGame instead of created ones')
+    parser.add_argument('--channels', type=int, default=4, help='Number of connections to the server shared by bots')
+    parser.add_argument('--duration', type=float, default=600.0, help='Seconds after which unfinished games are abandoned')
+    parser.add_argument('--rpc-timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', type=str, default=None, help='Path to write summary to (stdout if not set)')
+    return parser.parse_args()
+
+
+async def create_room(stub: mafia_pb2_grpc.CoordinatorStub, game_rules: mafia_pb2.GameRules, stats: LoadStats, rpc_timeout: float) -> str | None:
+    start = time.perf_counter()
+    try:
+        room_id = await stub.CreateRoom(mafia_pb2.CreateRoomRequest(GameRules=game_rules), timeout=rpc_timeout)
+    except grpc.aio.AioRpcError as error:
+        stats.record_rpc_error('CreateRoom', error.code().name)
+        return None
+    stats.record_rpc('CreateRoom', time.perf_counter() - start)
+    return room_id.Value
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    mix = ActionMix.parse(args.mix)
+    stats = LoadStats()
+    channels = [grpc.aio.insecure_channel(f'{args.server_host}:{args.server_port}') for _ in range(args.channels)]
+    stubs = [mafia_pb2_grpc.CoordinatorStub(channel) for channel in channels]
+    game_rules = mafia_pb2.GameRules(ActivePlayersNumber=args.players, MafiaNumber=args.mafia, SheriffNumber=args.sheriffs)
+    bots_number = args.rooms * args.players
+    bot_class = PlayBot if args.transport == 'play' else Bot
+    bots = []
+    for room_ind in range(args.rooms):
+        room_id = None
+        if not args.matchmaking:
+            room_id = await create_room(stubs[room_ind % len(stubs)], game_rules, stats, args.rpc_timeout)
+            if room_id is None:
+                continue
+        for player_ind in range(args.players):
+            bots.append(bot_class(
+                stubs[len(bots) % len(stubs)],
+                username=f'bot-{room_ind}-{player_ind}',
+                room_id=room_id,
+                stats=stats,
+                rate=args.rate / bots_number,
+                mix=mix,
+                rpc_timeout=args.rpc_timeout,
+                rng=random.Random(rng.getrandbits(64)),
+                game_rules=game_rules,
+            ))
+    tasks = [asyncio.create_task(bot.play()) for bot in bots]
+    _, unfinished = await asyncio.wait(tasks, timeout=args.duration)
+    for task in unfinished:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for bot in {bot.room_id.Value: bot for bot in bots if bot.room_id is not None}.values():
+        stats.room_statuses[mafia_pb2.Room.RoomStatus.Name(bot.room.status) if bot.room.status is not None else 'NOT_CONNECTED'] += 1
+    for channel in channels:
+        await channel.close()
+    summary = stats.summary()
+    summary['config'] = vars(args)
+    summary['bots'] = bots_number
+    return summary
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args()
+    summary = json.dumps(asyncio.run(run(args)), indent=4)
+    if args.output is None:
+        print(summary)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+
+PERCENTILES = (50, 90, 99)
+
+
+class LoadStats:
+    def __init__(self):
+        self.rpc_latencies = defaultdict(list)  # Dict[str, List[float]]: method_name2latencies (seconds)
+        self.rpc_errors = defaultdict(Counter)  # Dict[str, Counter]: method_name2status_codes
+        self.update_lags = []  # seconds between sending a chat message and receiving it in a stream
+        self.updates_number = Counter()  # snapshots and deltas
+        self.update_bytes = 0
+        self.room_statuses = Counter()
+        self._start = time.perf_counter()
+
+    def record_rpc(self, method_name, latency: float):
+        self.rpc_latencies[method_name].append(latency)
+
+    def record_rpc_error(self, method_name, code: str):
+        self.rpc_errors[method_name][code] += 1
+
+    def record_update(self, kind: str, size: int):
+        self.updates_number[kind] += 1
+        self.update_bytes += size
+
+    def record_update_lag(self, lag: float):
+        self.update_lags.append(lag)
+
+    def summary(self) -> Dict:
+        duration = time.perf_counter() - self._start
+        rpc_number = sum(len(latencies) for latencies in self.rpc_latencies.values())
+        updates_number = sum(self.updates_number.values())
+        methods = sorted(set(self.rpc_latencies) | set(self.rpc_errors))
+        return {
+            'duration_s': duration,
+            'rooms': dict(self.room_statuses),
+            'rpc': {
+                method_name: {
+                    'count': len(self.rpc_latencies[method_name]),
+                    'errors': dict(self.rpc_errors[method_name]),
+                    'latency_ms': _percentiles_ms(self.rpc_latencies[method_name]),
+                }
+                for method_name in methods
+            },
+            'stream': {
+                'updates': dict(self.updates_number),
+                'bytes': self.update_bytes,
+                'lag_ms': _percentiles_ms(self.update_lags),
+            },
+            'throughput': {
+                'rpc_per_s': rpc_number / duration,
+                'updates_per_s': updates_number / duration,
+                'update_bytes_per_s': self.update_bytes / duration,
+            },
+        }
+
+
+def _percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    if len(samples) == 0:
+        return {}
+    samples = sorted(samples)
+    result = {f'p{p}': samples[min(len(samples) * p // 100, len(samples) - 1)] * 1000 for p in PERCENTILES}
+    result['max'] = samples[-1] * 1000
+    return result
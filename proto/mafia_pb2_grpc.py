@@ -17,9 +17,24 @@ class CoordinatorStub(object):
         """
         self.Connect = channel.unary_stream(
                 '/Coordinator/Connect',
-                request_serializer=mafia__pb2.User.SerializeToString,
+                request_serializer=mafia__pb2.ConnectRequest.SerializeToString,
                 response_deserializer=mafia__pb2.Room.FromString,
                 )
+        self.ConnectUpdates = channel.unary_stream(
+                '/Coordinator/ConnectUpdates',
+                request_serializer=mafia__pb2.ConnectRequest.SerializeToString,
+                response_deserializer=mafia__pb2.RoomUpdate.FromString,
+                )
+        self.Spectate = channel.unary_stream(
+                '/Coordinator/Spectate',
+                request_serializer=mafia__pb2.ConnectRequest.SerializeToString,
+                response_deserializer=mafia__pb2.Room.FromString,
+                )
+        self.GetEvents = channel.unary_unary(
+                '/Coordinator/GetEvents',
+                request_serializer=mafia__pb2.GetEventsRequest.SerializeToString,
+                response_deserializer=mafia__pb2.EventBus.FromString,
+                )
         self.Disconnect = channel.unary_unary(
                 '/Coordinator/Disconnect',
                 request_serializer=mafia__pb2.DisconnectRequest.SerializeToString,
@@ -27,12 +42,12 @@ class CoordinatorStub(object):
                 )
         self.SendMessage = channel.unary_unary(
                 '/Coordinator/SendMessage',
-                request_serializer=mafia__pb2.Chat.Message.SerializeToString,
+                request_serializer=mafia__pb2.SendMessageRequest.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
         self.BeginVote = channel.unary_unary(
                 '/Coordinator/BeginVote',
-                request_serializer=mafia__pb2.User.SerializeToString,
+                request_serializer=mafia__pb2.BeginVoteRequest.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
         self.Vote = channel.unary_unary(
@@ -55,6 +70,31 @@ class CoordinatorStub(object):
                 request_serializer=mafia__pb2.ExposeRequest.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
+        self.CreateRoom = channel.unary_unary(
+                '/Coordinator/CreateRoom',
+                request_serializer=mafia__pb2.CreateRoomRequest.SerializeToString,
+                response_deserializer=mafia__pb2.Room.RoomId.FromString,
+                )
+        self.ListRooms = channel.unary_unary(
+                '/Coordinator/ListRooms',
+                request_serializer=mafia__pb2.ListRoomsRequest.SerializeToString,
+                response_deserializer=mafia__pb2.RoomList.FromString,
+                )
+        self.Play = channel.stream_stream(
+                '/Coordinator/Play',
+                request_serializer=mafia__pb2.PlayRequest.SerializeToString,
+                response_deserializer=mafia__pb2.PlayResponse.FromString,
+                )
+        self.FindGame = channel.unary_stream(
+                '/Coordinator/FindGame',
+                request_serializer=mafia__pb2.FindGameRequest.SerializeToString,
+                response_deserializer=mafia__pb2.MatchUpdate.FromString,
+                )
+        self.Ping = channel.unary_unary(
+                '/Coordinator/Ping',
+                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                )
 
 
 class CoordinatorServicer(object):
@@ -66,6 +106,24 @@ class CoordinatorServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ConnectUpdates(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Spectate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetEvents(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Disconnect(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -108,14 +166,59 @@ class CoordinatorServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CreateRoom(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListRooms(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Play(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FindGame(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Ping(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CoordinatorServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'Connect': grpc.unary_stream_rpc_method_handler(
                     servicer.Connect,
-                    request_deserializer=mafia__pb2.User.FromString,
+                    request_deserializer=mafia__pb2.ConnectRequest.FromString,
+                    response_serializer=mafia__pb2.Room.SerializeToString,
+            ),
+            'ConnectUpdates': grpc.unary_stream_rpc_method_handler(
+                    servicer.ConnectUpdates,
+                    request_deserializer=mafia__pb2.ConnectRequest.FromString,
+                    response_serializer=mafia__pb2.RoomUpdate.SerializeToString,
+            ),
+            'Spectate': grpc.unary_stream_rpc_method_handler(
+                    servicer.Spectate,
+                    request_deserializer=mafia__pb2.ConnectRequest.FromString,
                     response_serializer=mafia__pb2.Room.SerializeToString,
             ),
+            'GetEvents': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetEvents,
+                    request_deserializer=mafia__pb2.GetEventsRequest.FromString,
+                    response_serializer=mafia__pb2.EventBus.SerializeToString,
+            ),
             'Disconnect': grpc.unary_unary_rpc_method_handler(
                     servicer.Disconnect,
                     request_deserializer=mafia__pb2.DisconnectRequest.FromString,
@@ -123,12 +226,12 @@ def add_CoordinatorServicer_to_server(servicer, server):
             ),
             'SendMessage': grpc.unary_unary_rpc_method_handler(
                     servicer.SendMessage,
-                    request_deserializer=mafia__pb2.Chat.Message.FromString,
+                    request_deserializer=mafia__pb2.SendMessageRequest.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
             'BeginVote': grpc.unary_unary_rpc_method_handler(
                     servicer.BeginVote,
-                    request_deserializer=mafia__pb2.User.FromString,
+                    request_deserializer=mafia__pb2.BeginVoteRequest.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
             'Vote': grpc.unary_unary_rpc_method_handler(
@@ -151,6 +254,31 @@ def add_CoordinatorServicer_to_server(servicer, server):
                     request_deserializer=mafia__pb2.ExposeRequest.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'CreateRoom': grpc.unary_unary_rpc_method_handler(
+                    servicer.CreateRoom,
+                    request_deserializer=mafia__pb2.CreateRoomRequest.FromString,
+                    response_serializer=mafia__pb2.Room.RoomId.SerializeToString,
+            ),
+            'ListRooms': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListRooms,
+                    request_deserializer=mafia__pb2.ListRoomsRequest.FromString,
+                    response_serializer=mafia__pb2.RoomList.SerializeToString,
+            ),
+            'Play': grpc.stream_stream_rpc_method_handler(
+                    servicer.Play,
+                    request_deserializer=mafia__pb2.PlayRequest.FromString,
+                    response_serializer=mafia__pb2.PlayResponse.SerializeToString,
+            ),
+            'FindGame': grpc.unary_stream_rpc_method_handler(
+                    servicer.FindGame,
+                    request_deserializer=mafia__pb2.FindGameRequest.FromString,
+                    response_serializer=mafia__pb2.MatchUpdate.SerializeToString,
+            ),
+            'Ping': grpc.unary_unary_rpc_method_handler(
+                    servicer.Ping,
+                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'Coordinator', rpc_method_handlers)
@@ -173,11 +301,62 @@ class Coordinator(object):
             timeout=None,
             metadata=None):
         return grpc.experimental.unary_stream(request, target, '/Coordinator/Connect',
-            mafia__pb2.User.SerializeToString,
+            mafia__pb2.ConnectRequest.SerializeToString,
+            mafia__pb2.Room.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ConnectUpdates(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Coordinator/ConnectUpdates',
+            mafia__pb2.ConnectRequest.SerializeToString,
+            mafia__pb2.RoomUpdate.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Spectate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Coordinator/Spectate',
+            mafia__pb2.ConnectRequest.SerializeToString,
             mafia__pb2.Room.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def GetEvents(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Coordinator/GetEvents',
+            mafia__pb2.GetEventsRequest.SerializeToString,
+            mafia__pb2.EventBus.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def Disconnect(request,
             target,
@@ -207,7 +386,7 @@ class Coordinator(object):
             timeout=None,
             metadata=None):
         return grpc.experimental.unary_unary(request, target, '/Coordinator/SendMessage',
-            mafia__pb2.Chat.Message.SerializeToString,
+            mafia__pb2.SendMessageRequest.SerializeToString,
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -224,7 +403,7 @@ class Coordinator(object):
             timeout=None,
             metadata=None):
         return grpc.experimental.unary_unary(request, target, '/Coordinator/BeginVote',
-            mafia__pb2.User.SerializeToString,
+            mafia__pb2.BeginVoteRequest.SerializeToString,
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -296,3 +475,88 @@ class Coordinator(object):
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CreateRoom(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Coordinator/CreateRoom',
+            mafia__pb2.CreateRoomRequest.SerializeToString,
+            mafia__pb2.Room.RoomId.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListRooms(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Coordinator/ListRooms',
+            mafia__pb2.ListRoomsRequest.SerializeToString,
+            mafia__pb2.RoomList.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Play(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/Coordinator/Play',
+            mafia__pb2.PlayRequest.SerializeToString,
+            mafia__pb2.PlayResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def FindGame(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Coordinator/FindGame',
+            mafia__pb2.FindGameRequest.SerializeToString,
+            mafia__pb2.MatchUpdate.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Ping(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Coordinator/Ping',
+            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
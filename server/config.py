@@ -1,5 +1,12 @@
+from typing import Callable, Dict, List
 from pydantic import BaseModel
 from proto import mafia_pb2
+from server.server_event_log import EventLogSettings
+from server.server_journal import Journal
+from server.server_metrics import MetricsHTTPServer
+from server.server_ring import VIRTUAL_NODES, HashRing, HealthCheckSettings
+from server.server_routing import WorkerRouting
+from server.utils.log_pipeline import LogPipelineSettings
 
 
 class Config(BaseModel):
@@ -8,10 +15,122 @@ class Config(BaseModel):
     active_players_number: int
     mafia_number: int
     sheriff_number: int
+    vote_tie_break: str = 'VTB_SUSPECT_ORDER'  # VTB_SUSPECT_ORDER, VTB_FIRST_TO_REACH or VTB_RANDOM
+    use_asyncio: bool = False
+    max_workers: int = 10  # threads of RPCs in threaded server, threads of room calls in asyncio server
+    workers: int = 1  # server processes sharing the port, every room is owned by one of them
+    worker_base_port: int | None = None  # worker i also listens on 127.0.0.1:{worker_base_port + i} for forwarded requests, port + 1 if not set
+    ring_nodes: List[str] = []  # addresses of all nodes in router config, if set ids of new rooms are chosen to be owned by this node on the ring
+    ring_address: str | None = None  # address of this node in router config
+    ring_virtual_nodes: int = VIRTUAL_NODES
+    event_log_segment_size: int = 64
+    event_log_memory_segments: int = 4
+    event_log_spill_dir: str | None = None  # old events are dropped if not set
+    room_idle_timeout: float = 300.0  # room without streams is removed if nobody connects to it in time
+    lobby_join_timeout: float = 30.0  # room formed by the lobby is released if its players don't join in time
+    journal_path: str | None = None  # rooms aren't recovered after restart if not set
+    journal_commit_interval: float = 0.005
+    journal_compact_removed_rooms: int = 64  # journal is rewritten without removed rooms once that many rooms are removed
+    log_level: str = 'INFO'
+    log_format: str = 'json'  # json or text
+    log_path: str | None = None  # stdout if not set
+    log_queue_size: int = 10000
+    log_sampling: Dict[str, float] = {}  # e.g. {"mafia.room.chat": 0.1} keeps 10% of chat logs
+    metrics_host: str = '127.0.0.1'
+    metrics_port: int | None = None  # metrics aren't served if not set
+    lock_profiling: bool = False  # stats are dumped on SIGUSR2 and served on /debug/locks of metrics server
+    lock_profile_path: str | None = None  # SIGUSR2 dumps stats to stderr if not set
 
     def game_rules(self) -> mafia_pb2.GameRules:
         return mafia_pb2.GameRules(
             ActivePlayersNumber=self.active_players_number,
             MafiaNumber=self.mafia_number,
-            SheriffNumber=self.sheriff_number
+            SheriffNumber=self.sheriff_number,
+            TieBreak=mafia_pb2.GameRules.VoteTieBreak.Value(self.vote_tie_break),
+        )
+
+    def event_log_settings(self) -> EventLogSettings:
+        return EventLogSettings(
+            segment_size=self.event_log_segment_size,
+            memory_segments=self.event_log_memory_segments,
+            spill_dir=self.event_log_spill_dir,
+        )
+
+    def journal(self) -> Journal | None:
+        if self.journal_path is None:
+            return None
+        return Journal(self.journal_path, commit_interval=self.journal_commit_interval, compact_removed_rooms=self.journal_compact_removed_rooms)
+
+    def log_pipeline_settings(self) -> LogPipelineSettings:
+        return LogPipelineSettings(
+            level=self.log_level,
+            format=self.log_format,
+            path=self.log_path,
+            queue_size=self.log_queue_size,
+            sampling=self.log_sampling,
+        )
+
+    def metrics_server(self) -> MetricsHTTPServer | None:
+        if self.metrics_port is None:
+            return None
+        return MetricsHTTPServer(self.metrics_host, self.metrics_port)
+
+    def worker_addresses(self) -> List[str]:
+        base_port = self.worker_base_port if self.worker_base_port is not None else self.port + 1
+        return [f'127.0.0.1:{base_port + index}' for index in range(self.workers)]
+
+    def worker_routing(self, index: int) -> WorkerRouting | None:
+        if self.workers == 1:
+            return None
+        return WorkerRouting(index, self.worker_addresses())
+
+    def owns_room_id(self, routing: WorkerRouting | None) -> Callable[[str], bool] | None:
+        # NOTE: a key owned by the node on the ring of all nodes is owned by it on the ring of any
+        # of them, so router finds rooms of the node while it's healthy, whichever nodes are down
+        ring = HashRing(self.ring_nodes, virtual_nodes=self.ring_virtual_nodes) if len(self.ring_nodes) > 0 else None
+        if ring is None:
+            return routing.is_local if routing is not None else None
+        if routing is None:
+            return lambda room_id: ring.owner(room_id) == self.ring_address
+        return lambda room_id: ring.owner(room_id) == self.ring_address and routing.is_local(room_id)
+
+    def worker_config(self, index: int) -> 'Config':
+        # NOTE: every worker has its own journal, logs and metrics
+        return self.copy(update={
+            'journal_path': _worker_path(self.journal_path, index),
+            'log_path': _worker_path(self.log_path, index),
+            'lock_profile_path': _worker_path(self.lock_profile_path, index),
+            'metrics_port': self.metrics_port + index if self.metrics_port else self.metrics_port,  # 0 is a free port for every worker
+        })
+
+
+def _worker_path(path: str | None, index: int) -> str | None:
+    return f'{path}.{index}' if path is not None else None
+
+
+class RouterConfig(BaseModel):
+    host: str
+    port: int
+    nodes: List[str]  # addresses of coordinator nodes, a node joins the ring once it passes a health check
+    virtual_nodes: int = VIRTUAL_NODES  # points of every node on the ring
+    lookup_nodes: int = 2  # nodes asked for a room in order of the ring, the previous owner of the room is the second one
+    health_check_interval: float = 1.0
+    health_check_timeout: float = 0.5
+    unhealthy_threshold: int = 3  # failed health checks in a row after which node leaves the ring
+    log_level: str = 'INFO'
+    log_format: str = 'json'  # json or text
+    log_path: str | None = None  # stdout if not set
+
+    def health_check_settings(self) -> HealthCheckSettings:
+        return HealthCheckSettings(
+            interval=self.health_check_interval,
+            timeout=self.health_check_timeout,
+            unhealthy_threshold=self.unhealthy_threshold,
+        )
+
+    def log_pipeline_settings(self) -> LogPipelineSettings:
+        return LogPipelineSettings(
+            level=self.log_level,
+            format=self.log_format,
+            path=self.log_path,
         )
@@ -1,10 +1,15 @@
 import argparse
 import logging
 from server.config import Config
-from server.run_server import start_server
-
-
-logging.basicConfig(level=logging.INFO)
+from server.server_metrics import register_log_metrics
+from server.server_routing import WorkerRouting
+from server.server_workers import run_workers
+from server.utils.lock_profiler import lock_profiler
+from server.utils.log_pipeline import LogPipeline
+from server import (
+    run_server,
+    run_server_aio,
+)
 
 
 def parse_args():
@@ -13,11 +18,37 @@ def parse_args():
     return parser.parse_args()
 
 
+def serve(config: Config, routing: WorkerRouting | None = None):
+    # NOTE: records are written by a background thread, so logging never waits for I/O
+    log_pipeline = LogPipeline(config.log_pipeline_settings())
+    log_pipeline.start()
+    register_log_metrics(log_pipeline)
+    metrics_server = config.metrics_server()
+    if config.lock_profiling:
+        lock_profiler.enable()
+        lock_profiler.install_signal_handler(path=config.lock_profile_path)
+    try:
+        logging.info(f'Use config:\n{config.json(indent=4)}')
+        if metrics_server is not None:
+            metrics_server.start()
+            logging.info(f'Serve metrics on {config.metrics_host}:{metrics_server.port}/metrics')
+        if config.use_asyncio:
+            run_server_aio.start_server(config, routing)
+        else:
+            run_server.start_server(config, routing)
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+        log_pipeline.stop()
+
+
 def main():
     args = parse_args()
     config = Config.parse_file(args.config)
-    logging.info(f'Use config:\n{config.json(indent=4)}')
-    start_server(config)
+    if config.workers > 1:
+        run_workers(config, serve)
+    else:
+        serve(config)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,27 @@
+import argparse
+import logging
+from server.config import RouterConfig
+from server.utils.log_pipeline import LogPipeline
+from server import run_router
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Router of mafia coordination servers')
+    parser.add_argument('config', type=str, help='Path to router config')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = RouterConfig.parse_file(args.config)
+    log_pipeline = LogPipeline(config.log_pipeline_settings())
+    log_pipeline.start()
+    try:
+        logging.info(f'Use config:\n{config.json(indent=4)}')
+        run_router.start_router(config)
+    finally:
+        log_pipeline.stop()
+
+
+if __name__ == '__main__':
+    main()
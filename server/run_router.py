@@ -0,0 +1,174 @@
+import asyncio
+import grpc
+import secrets
+from typing import List
+from google.protobuf import empty_pb2, message_factory
+from server.config import RouterConfig
+from server.server_ring import HashRing, Node, NodeMembership, router_logger
+from server.server_routing import ROUTING_KEYS, SERVICE_PREFIX, call_timeout
+from proto import mafia_pb2
+
+
+COORDINATOR = mafia_pb2.DESCRIPTOR.services_by_name['Coordinator']
+
+
+# NOTE: router is a proxy which doesn't host rooms: requests are forwarded as bytes to the
+# node owning their key on the ring and parsed only to find the key. A room stays on the node
+# where it was created, so if the owner doesn't know the room (the ring has changed since then),
+# it's looked up on the next nodes of the ring, where its previous owner is
+class CoordinatorRouter:
+    def __init__(self, membership: NodeMembership, lookup_nodes=2, room_id_bytes=4):
+        self.membership = membership
+        self.lookup_nodes = lookup_nodes
+        self.room_id_bytes = room_id_bytes
+
+    def generic_handler(self):
+        handlers = {
+            'CreateRoom': grpc.unary_unary_rpc_method_handler(self.CreateRoom),
+            'ListRooms': grpc.unary_unary_rpc_method_handler(self.ListRooms),
+            'Ping': grpc.unary_unary_rpc_method_handler(self.Ping),
+        }
+        for method in COORDINATOR.methods:
+            if method.name in handlers:
+                continue
+            request_class = message_factory.GetMessageClass(method.input_type)
+            routing_key = ROUTING_KEYS[method.name]
+            path = SERVICE_PREFIX + method.name
+            if method.client_streaming:
+                handlers[method.name] = grpc.stream_stream_rpc_method_handler(self._route_stream_stream(path, request_class, routing_key))
+            elif method.server_streaming:
+                handlers[method.name] = grpc.unary_stream_rpc_method_handler(self._route_unary_stream(path, request_class, routing_key))
+            else:
+                handlers[method.name] = grpc.unary_unary_rpc_method_handler(self._route_unary(path, request_class, routing_key))
+        return grpc.method_handlers_generic_handler('Coordinator', handlers)
+
+    async def CreateRoom(self, data: bytes, context):
+        # id is chosen by router, so the room is created on the node owning it
+        request = mafia_pb2.CreateRoomRequest.FromString(data)
+        request.RoomId.Value = secrets.token_hex(self.room_id_bytes)
+        node = (await self._lookup(request.RoomId.Value, context))[0]
+        try:
+            return await node.channel.unary_unary(SERVICE_PREFIX + 'CreateRoom')(
+                request.SerializeToString(), timeout=call_timeout(context), metadata=context.invocation_metadata())
+        except grpc.aio.AioRpcError as error:
+            await context.abort(error.code(), error.details())
+
+    async def ListRooms(self, data: bytes, context):
+        calls = [
+            node.channel.unary_unary(SERVICE_PREFIX + 'ListRooms', response_deserializer=mafia_pb2.RoomList.FromString)(
+                data, timeout=call_timeout(context), metadata=context.invocation_metadata())
+            for node in self.membership.healthy_nodes()
+        ]
+        room_list = mafia_pb2.RoomList()
+        try:
+            for node_room_list in await asyncio.gather(*calls):
+                room_list.Rooms.extend(node_room_list.Rooms)
+        except grpc.aio.AioRpcError as error:
+            await context.abort(error.code(), error.details())
+        return room_list.SerializeToString()
+
+    async def Ping(self, data: bytes, context):
+        if len(self.membership.ring) == 0:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, 'No healthy nodes')
+        return empty_pb2.Empty().SerializeToString()
+
+    def _route_unary(self, path, request_class, routing_key):
+        async def route(data: bytes, context):
+            nodes = await self._lookup(routing_key(request_class.FromString(data)), context)
+            for ind, node in enumerate(nodes):
+                try:
+                    return await node.channel.unary_unary(path)(data, timeout=call_timeout(context), metadata=context.invocation_metadata())
+                except grpc.aio.AioRpcError as error:
+                    if error.code() == grpc.StatusCode.NOT_FOUND and ind + 1 < len(nodes):
+                        continue
+                    await context.abort(error.code(), error.details())
+        return route
+
+    def _route_unary_stream(self, path, request_class, routing_key):
+        async def route(data: bytes, context):
+            nodes = await self._lookup(routing_key(request_class.FromString(data)), context)
+
+            def open_call(node: Node, opened: asyncio.Event):
+                return node.channel.unary_stream(path)(data, timeout=call_timeout(context), metadata=context.invocation_metadata())
+            async for response in _forward_stream(nodes, open_call, context):
+                yield response
+        return route
+
+    def _route_stream_stream(self, path, request_class, routing_key):
+        async def route(request_iterator, context):
+            first = await anext(request_iterator, None)
+            key = routing_key(request_class.FromString(first)) if first is not None else None
+            nodes = await self._lookup(key, context)
+
+            def open_call(node: Node, opened: asyncio.Event):
+                return node.channel.stream_stream(path)(
+                    _gated(first, request_iterator, opened), timeout=call_timeout(context), metadata=context.invocation_metadata())
+            async for response in _forward_stream(nodes, open_call, context):
+                yield response
+        return route
+
+    async def _lookup(self, key: str | None, context) -> List[Node]:
+        # key is None for malformed requests, they're rejected by any node
+        addresses = self.membership.ring.preference(key if key is not None else '', self.lookup_nodes)
+        if len(addresses) == 0:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, 'No healthy nodes')
+        return [self.membership.nodes[address] for address in addresses]
+
+
+# NOTE: a stream is given to the next node only if the previous one has answered NOT_FOUND
+# before its first response, and requests after the first one are sent only once the node
+# has answered, so no request is consumed by a node which doesn't know the room
+async def _forward_stream(nodes, open_call, context):
+    for ind, node in enumerate(nodes):
+        opened = asyncio.Event()
+        call = open_call(node, opened)
+        try:
+            response = await call.read()
+            opened.set()
+            while response is not grpc.aio.EOF:
+                yield response
+                response = await call.read()
+            return
+        except grpc.aio.AioRpcError as error:
+            if error.code() == grpc.StatusCode.NOT_FOUND and not opened.is_set() and ind + 1 < len(nodes):
+                continue
+            if error.code() != grpc.StatusCode.CANCELLED:
+                await context.abort(error.code(), error.details())
+            return
+        finally:
+            call.cancel()  # client of the router has cancelled the stream or the node has failed
+
+
+async def _gated(first, request_iterator, opened: asyncio.Event):
+    if first is None:
+        return
+    yield first
+    await opened.wait()
+    async for request in request_iterator:
+        yield request
+
+
+def make_router(config: RouterConfig, membership: NodeMembership):
+    server = grpc.aio.server()
+    router = CoordinatorRouter(membership, lookup_nodes=config.lookup_nodes)
+    server.add_generic_rpc_handlers((router.generic_handler(),))
+    server.add_insecure_port(f'{config.host}:{config.port}')
+    return server
+
+
+async def serve(config: RouterConfig):
+    membership = NodeMembership(config.nodes, HashRing(virtual_nodes=config.virtual_nodes), config.health_check_settings())
+    await membership.check()
+    router_logger.info(f'Route to nodes {membership.status()}')
+    health_checks = asyncio.create_task(membership.run())
+    server = make_router(config, membership)  # grpc.aio server must be created inside running event loop
+    try:
+        await server.start()
+        await server.wait_for_termination()
+    finally:
+        health_checks.cancel()
+        await membership.close()
+
+
+def start_router(config: RouterConfig):
+    asyncio.run(serve(config))
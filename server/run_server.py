@@ -1,11 +1,17 @@
 import grpc
 import logging
-import time
 import traceback
 from concurrent import futures
 from google.protobuf import empty_pb2
 from server.config import Config
-from server.server_room import Room, UnknownUser
+from server.server_delta import RoomDeltaEncoder, RoomSnapshotEncoder
+from server.server_lobby import Lobby
+from server.server_metrics import MetricsInterceptor, register_lobby_metrics, register_room_metrics
+from server.server_play import ActionQueue, connect_request
+from server.server_registry import RoomRegistry, UnknownRoom
+from server.server_routing import SERVER_OPTIONS, RoutingInterceptor, WorkerRouting
+from server.server_room import UnknownUser
+from server.utils.rpc import pre_serialized_stream_handler, rpc_errors, status_code
 from proto import (
     mafia_pb2_grpc,
     mafia_pb2,
@@ -13,101 +19,217 @@ from proto import (
 
 
 class CoordinatorService(mafia_pb2_grpc.CoordinatorServicer):
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, routing: WorkerRouting | None = None):
         self.config = config
-        self.room = Room(config.game_rules())
-
-    def Connect(self, request: mafia_pb2.User, context):
+        self.registry = RoomRegistry(
+            config.game_rules() if routing is None or routing.is_local('') else None,  # default room is owned by one worker
+            event_log_settings=config.event_log_settings(),
+            journal=config.journal(),
+            owns_room_id=config.owns_room_id(routing),
+            idle_timeout=config.room_idle_timeout,
+        )
+        self.lobby = Lobby(self.registry, join_timeout=config.lobby_join_timeout)
+        # NOTE: actions of every Play stream are read by a thread of this pool, a stream also holds a thread
+        # of the server pool of the same size, so readers are bounded by max_workers and never wait for a thread
+        self.play_readers = futures.ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix='play-reader')
+        register_room_metrics(self.registry)
+        register_lobby_metrics(self.lobby)
+
+    def Connect(self, request: mafia_pb2.ConnectRequest, context):
+        yield from self._stream_room('Connect', request, context, RoomSnapshotEncoder())
+
+    def ConnectUpdates(self, request: mafia_pb2.ConnectRequest, context):
+        yield from self._stream_room('ConnectUpdates', request, context, RoomDeltaEncoder())
+
+    def Spectate(self, request: mafia_pb2.ConnectRequest, context):
+        room = None
+        subscription = None
         try:
-            self.room.add_player(request.Username)
-            prev_room_pb = None
-            while True:
-                room_pb = self.room.view(request.Username)
-                if room_pb != prev_room_pb:
-                    yield room_pb
-                    prev_room_pb = room_pb
-                else:
-                    time.sleep(0.5)
+            room = self.registry.get_room(request.RoomId.Value)
+            room.add_spectator(request.User.Username)
+            subscription = room.subscribe_spectator()
+            context.add_callback(subscription.cancel)
+            while not subscription.cancelled:
+                yield room.spectator_view()
+                subscription.wait()
+        except Exception as error:
+            msg = f'Got error during Spectate:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            logging.error(msg)
+            context.abort(status_code(error), msg)
+        finally:
+            if subscription is not None:
+                room.unsubscribe_spectator(subscription)
+                room.remove_spectator(request.User.Username)
+                self.registry.release_room(room)
+
+    def _stream_room(self, method_name, request: mafia_pb2.ConnectRequest, context, encoder: RoomSnapshotEncoder | RoomDeltaEncoder):
+        room = None
+        subscription = None
+        try:
+            room = self.registry.get_room(request.RoomId.Value)
+            room.add_player(request.User.Username)
+            subscription = room.subscribe(request.User.Username)
+            context.add_callback(subscription.cancel)
+            while not subscription.cancelled:
+                yield encoder.encode(encoder.view(room, request.User.Username))
+                subscription.wait()
         except UnknownUser:
             return
         except Exception as error:
-            msg = f'Got error during Connect:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            msg = f'Got error during {method_name}:\nError: {error}\nTraceback: {traceback.format_exc()}'
             logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
-
-    def Disconnect(self, request: mafia_pb2.DisconnectRequest, context):
-        if request.RoomId.Value != self.room.id:
-            logging.debug(f'User {request.User.Username} tries to disconnect from incorrect room {request.RoomId.Value}')
-            return empty_pb2.Empty()
+            context.abort(status_code(error), msg)
+        finally:
+            if subscription is not None:
+                room.unsubscribe(request.User.Username, subscription)
+                self.registry.release_room(room)
+
+    def Play(self, request_iterator, context):
+        room = None
+        subscription = None
+        actions = None
         try:
-            self.room.remove_player(request.User.Username)
-            return empty_pb2.Empty()
+            request = connect_request(next(request_iterator, None))
+            username = request.User.Username
+            room = self.registry.get_room(request.RoomId.Value)
+            room.add_player(username)
+            subscription = room.subscribe(username)
+            context.add_callback(subscription.cancel)
+            actions = ActionQueue(subscription)
+            self.play_readers.submit(actions.read, request_iterator)
+            encoder = RoomDeltaEncoder()
+            sent_version = None
+            while True:
+                batch = actions.take()
+                if len(batch) > 0:
+                    for ack in room.play(username, batch):
+                        yield mafia_pb2.PlayResponse(Ack=ack)
+                if room.version != sent_version:
+                    room_pb = encoder.view(room, username)
+                    sent_version = room_pb.Version
+                    yield mafia_pb2.PlayResponse(Update=encoder.encode(room_pb))
+                if subscription.cancelled:
+                    if actions.empty():
+                        break
+                    continue  # actions sent before the client finished the stream are applied
+                subscription.wait()
+            if actions.error is not None:
+                raise actions.error
         except UnknownUser:
-            return empty_pb2.Empty()
+            return
         except Exception as error:
-            msg = f'Got error during Disconnect:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            msg = f'Got error during Play:\nError: {error}\nTraceback: {traceback.format_exc()}'
             logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
-
-    def SendMessage(self, request: mafia_pb2.Chat.Message, context):
+            context.abort(status_code(error), msg)
+        finally:
+            if actions is not None:
+                actions.close()
+            if subscription is not None:
+                room.unsubscribe(username, subscription)
+                self.registry.release_room(room)
+
+    def FindGame(self, request: mafia_pb2.FindGameRequest, context):
+        ticket = None
         try:
-            self.room.send_message(request.AuthorUsername, request.Text)
-            return empty_pb2.Empty()
+            ticket = self.lobby.enqueue(request.User.Username, request.GameRules)
+            context.add_callback(ticket.subscription.cancel)
+            update = mafia_pb2.MatchUpdate(PlayersWaiting=ticket.players_waiting)
+            yield update
+            # NOTE: call is kept until the formed room is full, if the room is released
+            # the player is back in the lobby and gets the number of waiting players again
+            while not ticket.subscription.cancelled and not ticket.left:
+                next_update = self.lobby.match_update(ticket)
+                if next_update != update:
+                    update = next_update
+                    yield update
+                if self.lobby.is_seated(ticket):
+                    break
+                ticket.subscription.wait()
         except Exception as error:
-            msg = f'Got error during SendMessage:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            msg = f'Got error during FindGame:\nError: {error}\nTraceback: {traceback.format_exc()}'
             logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
-
-    def BeginVote(self, request: mafia_pb2.User, context):
+            context.abort(status_code(error), msg)
+        finally:
+            if ticket is not None:
+                self.lobby.leave(ticket)
+
+    @rpc_errors
+    def GetEvents(self, request: mafia_pb2.GetEventsRequest, context):
+        room = self.registry.get_room(request.RoomId.Value)
+        after_index = request.AfterIndex if request.HasField('AfterIndex') else None
+        limit = request.Limit if request.Limit > 0 else None
+        return room.get_events(request.User.Username, after_index, limit)
+
+    @rpc_errors
+    def Disconnect(self, request: mafia_pb2.DisconnectRequest, context):
         try:
-            self.room.begin_vote(request.Username)
+            room = self.registry.get_room(request.RoomId.Value)
+        except UnknownRoom:
+            logging.debug(f'User {request.User.Username} tries to disconnect from incorrect room {request.RoomId.Value}')
             return empty_pb2.Empty()
-        except Exception as error:
-            msg = f'Got error during BeginVote:\nError: {error}\nTraceback: {traceback.format_exc()}'
-            logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
+        try:
+            room.remove_player(request.User.Username)
+        except UnknownUser:
+            pass
+        return empty_pb2.Empty()
+
+    @rpc_errors
+    def SendMessage(self, request: mafia_pb2.SendMessageRequest, context):
+        self.registry.get_room(request.RoomId.Value).send_message(request.User.Username, request.Text)
+        return empty_pb2.Empty()
+
+    @rpc_errors
+    def BeginVote(self, request: mafia_pb2.BeginVoteRequest, context):
+        self.registry.get_room(request.RoomId.Value).begin_vote(request.User.Username)
+        return empty_pb2.Empty()
 
+    @rpc_errors
     def Vote(self, request: mafia_pb2.VoteRequest, context):
-        try:
-            self.room.vote(request.User.Username, request.SuspectUser.Username)
-            return empty_pb2.Empty()
-        except Exception as error:
-            msg = f'Got error during BeginVote:\nError: {error}\nTraceback: {traceback.format_exc()}'
-            logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
+        self.registry.get_room(request.RoomId.Value).vote(request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
 
+    @rpc_errors
     def MafiaVote(self, request: mafia_pb2.VoteRequest, context):
-        try:
-            self.room.mafia_vote(request.User.Username, request.SuspectUser.Username)
-            return empty_pb2.Empty()
-        except Exception as error:
-            msg = f'Got error during BeginVote:\nError: {error}\nTraceback: {traceback.format_exc()}'
-            logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
+        self.registry.get_room(request.RoomId.Value).mafia_vote(request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
 
+    @rpc_errors
     def SheriffVote(self, request: mafia_pb2.VoteRequest, context):
-        try:
-            self.room.sheriff_vote(request.User.Username, request.SuspectUser.Username)
-            return empty_pb2.Empty()
-        except Exception as error:
-            msg = f'Got error during BeginVote:\nError: {error}\nTraceback: {traceback.format_exc()}'
-            logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
+        self.registry.get_room(request.RoomId.Value).sheriff_vote(request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
 
+    @rpc_errors
     def Expose(self, request: mafia_pb2.ExposeRequest, context):
-        try:
-            self.room.expose(request.User.Username, request.UserToExpose.Username)
-            return empty_pb2.Empty()
-        except Exception as error:
-            msg = f'Got error during BeginVote:\nError: {error}\nTraceback: {traceback.format_exc()}'
-            logging.error(msg)
-            context.abort(grpc.StatusCode.INVALID_ARGUMENT, msg)
-
-
-def make_server(config):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    mafia_pb2_grpc.add_CoordinatorServicer_to_server(CoordinatorService(config), server)
+        self.registry.get_room(request.RoomId.Value).expose(request.User.Username, request.UserToExpose.Username)
+        return empty_pb2.Empty()
+
+    @rpc_errors
+    def CreateRoom(self, request: mafia_pb2.CreateRoomRequest, context):
+        room = self.registry.create_room(request.GameRules, room_id=request.RoomId.Value or None)
+        return mafia_pb2.Room.RoomId(Value=room.id)
+
+    @rpc_errors
+    def ListRooms(self, request: mafia_pb2.ListRoomsRequest, context):
+        status = request.Status if request.HasField('Status') else None
+        return self.registry.list_rooms(status)
+
+    def Ping(self, request, context):
+        return empty_pb2.Empty()
+
+
+def make_server(config, routing: WorkerRouting | None = None):
+    interceptors = [MetricsInterceptor()] if config.metrics_port is not None else []
+    if routing is not None:
+        interceptors.append(RoutingInterceptor(routing))  # after metrics, so forwarded requests are measured too
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=config.max_workers), interceptors=interceptors, options=SERVER_OPTIONS)
+    service = CoordinatorService(config, routing)
+    server.add_generic_rpc_handlers((
+        pre_serialized_stream_handler('Coordinator', 'Spectate', service.Spectate, mafia_pb2.ConnectRequest.FromString),
+    ))
+    mafia_pb2_grpc.add_CoordinatorServicer_to_server(service, server)
     server.add_insecure_port(f'{config.host}:{config.port}')
+    if routing is not None:
+        server.add_insecure_port(routing.addresses[routing.index])
     return server
 
 
@@ -116,6 +238,6 @@ def poll(server):
     server.wait_for_termination()
 
 
-def start_server(config: Config):
-    server = make_server(config)
+def start_server(config: Config, routing: WorkerRouting | None = None):
+    server = make_server(config, routing)
     poll(server)
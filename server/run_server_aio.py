@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import grpc
+import logging
+import traceback
+from concurrent import futures
+from google.protobuf import empty_pb2
+from server.config import Config
+from server.server_delta import RoomDeltaEncoder, RoomSnapshotEncoder
+from server.server_lobby import Lobby
+from server.server_metrics import AsyncMetricsInterceptor, register_lobby_metrics, register_room_metrics
+from server.server_play import AsyncActionQueue, connect_request
+from server.server_registry import RoomRegistry, UnknownRoom
+from server.server_routing import SERVER_OPTIONS, AsyncRoutingInterceptor, WorkerRouting
+from server.server_room import UnknownUser
+from server.server_updates import AsyncSubscription
+from server.utils.rpc import async_rpc_errors, pre_serialized_stream_handler, status_code
+from proto import (
+    mafia_pb2_grpc,
+    mafia_pb2,
+)
+
+
+# NOTE: Room methods take the room lock, which may be held by phase timers or wait for
+# a writer, so they are called on a pool of max_workers threads and the event loop never
+# blocks on it; subscriptions are notified thread-safely
+class AsyncCoordinatorService(mafia_pb2_grpc.CoordinatorServicer):
+    def __init__(self, config: Config, routing: WorkerRouting | None = None):
+        self.config = config
+        self.registry = RoomRegistry(
+            config.game_rules() if routing is None or routing.is_local('') else None,  # default room is owned by one worker
+            event_log_settings=config.event_log_settings(),
+            journal=config.journal(),
+            owns_room_id=config.owns_room_id(routing),
+            idle_timeout=config.room_idle_timeout,
+        )
+        self.lobby = Lobby(self.registry, join_timeout=config.lobby_join_timeout)
+        self.room_calls = futures.ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix='room-call')
+        register_room_metrics(self.registry)
+        register_lobby_metrics(self.lobby)
+
+    async def Connect(self, request: mafia_pb2.ConnectRequest, context):
+        async for room_pb in self._stream_room('Connect', request, context, RoomSnapshotEncoder()):
+            yield room_pb
+
+    async def ConnectUpdates(self, request: mafia_pb2.ConnectRequest, context):
+        async for room_update in self._stream_room('ConnectUpdates', request, context, RoomDeltaEncoder()):
+            yield room_update
+
+    async def Spectate(self, request: mafia_pb2.ConnectRequest, context):
+        room = None
+        subscription = None
+        try:
+            room = self.registry.get_room(request.RoomId.Value)
+            await self._call(room.add_spectator, request.User.Username)
+            subscription = room.subscribe_spectator(AsyncSubscription())
+            while not subscription.cancelled:
+                yield await self._call(room.spectator_view)
+                await subscription.wait()
+        except Exception as error:
+            msg = f'Got error during Spectate:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            logging.error(msg)
+            await context.abort(status_code(error), msg)
+        finally:
+            if subscription is not None:
+                room.unsubscribe_spectator(subscription)
+                await self._call(room.remove_spectator, request.User.Username)
+                await self._call(self.registry.release_room, room)
+
+    async def _stream_room(self, method_name, request: mafia_pb2.ConnectRequest, context, encoder: RoomSnapshotEncoder | RoomDeltaEncoder):
+        room = None
+        subscription = None
+        try:
+            room = self.registry.get_room(request.RoomId.Value)
+            await self._call(room.add_player, request.User.Username)
+            subscription = room.subscribe(request.User.Username, AsyncSubscription())
+            while not subscription.cancelled:
+                yield encoder.encode(await self._call(encoder.view, room, request.User.Username))
+                await subscription.wait()
+        except UnknownUser:
+            return
+        except Exception as error:
+            msg = f'Got error during {method_name}:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            logging.error(msg)
+            await context.abort(status_code(error), msg)
+        finally:
+            if subscription is not None:
+                room.unsubscribe(request.User.Username, subscription)
+                await self._call(self.registry.release_room, room)
+
+    async def Play(self, request_iterator, context):
+        room = None
+        subscription = None
+        reader = None
+        try:
+            request = connect_request(await anext(request_iterator, None))
+            username = request.User.Username
+            room = self.registry.get_room(request.RoomId.Value)
+            await self._call(room.add_player, username)
+            subscription = room.subscribe(username, AsyncSubscription())
+            actions = AsyncActionQueue(subscription)
+            reader = asyncio.create_task(actions.read(request_iterator))
+            encoder = RoomDeltaEncoder()
+            sent_version = None
+            while True:
+                batch = actions.take()
+                if len(batch) > 0:
+                    for ack in await self._call(room.play, username, batch):
+                        yield mafia_pb2.PlayResponse(Ack=ack)
+                if room.version != sent_version:
+                    room_pb = await self._call(encoder.view, room, username)
+                    sent_version = room_pb.Version
+                    yield mafia_pb2.PlayResponse(Update=encoder.encode(room_pb))
+                if subscription.cancelled:
+                    if actions.empty():
+                        break
+                    continue  # actions sent before the client finished the stream are applied
+                await subscription.wait()
+            if actions.error is not None:
+                raise actions.error
+        except UnknownUser:
+            return
+        except Exception as error:
+            msg = f'Got error during Play:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            logging.error(msg)
+            await context.abort(status_code(error), msg)
+        finally:
+            if reader is not None:
+                reader.cancel()
+            if subscription is not None:
+                room.unsubscribe(username, subscription)
+                await self._call(self.registry.release_room, room)
+
+    async def FindGame(self, request: mafia_pb2.FindGameRequest, context):
+        ticket = None
+        try:
+            ticket = await self._call(self.lobby.enqueue, request.User.Username, request.GameRules, AsyncSubscription())
+            update = mafia_pb2.MatchUpdate(PlayersWaiting=ticket.players_waiting)
+            yield update
+            # NOTE: call is kept until the formed room is full, if the room is released
+            # the player is back in the lobby and gets the number of waiting players again
+            while not ticket.left:
+                next_update = self.lobby.match_update(ticket)
+                if next_update != update:
+                    update = next_update
+                    yield update
+                if self.lobby.is_seated(ticket):
+                    break
+                await ticket.subscription.wait()
+        except Exception as error:
+            msg = f'Got error during FindGame:\nError: {error}\nTraceback: {traceback.format_exc()}'
+            logging.error(msg)
+            await context.abort(status_code(error), msg)
+        finally:
+            if ticket is not None:
+                self.lobby.leave(ticket)
+
+    @async_rpc_errors
+    async def GetEvents(self, request: mafia_pb2.GetEventsRequest, context):
+        room = self.registry.get_room(request.RoomId.Value)
+        after_index = request.AfterIndex if request.HasField('AfterIndex') else None
+        limit = request.Limit if request.Limit > 0 else None
+        return await self._call(room.get_events, request.User.Username, after_index, limit)
+
+    @async_rpc_errors
+    async def Disconnect(self, request: mafia_pb2.DisconnectRequest, context):
+        try:
+            room = self.registry.get_room(request.RoomId.Value)
+        except UnknownRoom:
+            logging.debug(f'User {request.User.Username} tries to disconnect from incorrect room {request.RoomId.Value}')
+            return empty_pb2.Empty()
+        try:
+            await self._call(room.remove_player, request.User.Username)
+        except UnknownUser:
+            pass
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def SendMessage(self, request: mafia_pb2.SendMessageRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).send_message, request.User.Username, request.Text)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def BeginVote(self, request: mafia_pb2.BeginVoteRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).begin_vote, request.User.Username)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def Vote(self, request: mafia_pb2.VoteRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).vote, request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def MafiaVote(self, request: mafia_pb2.VoteRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).mafia_vote, request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def SheriffVote(self, request: mafia_pb2.VoteRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).sheriff_vote, request.User.Username, request.SuspectUser.Username)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def Expose(self, request: mafia_pb2.ExposeRequest, context):
+        await self._call(self.registry.get_room(request.RoomId.Value).expose, request.User.Username, request.UserToExpose.Username)
+        return empty_pb2.Empty()
+
+    @async_rpc_errors
+    async def CreateRoom(self, request: mafia_pb2.CreateRoomRequest, context):
+        room = await self._call(functools.partial(self.registry.create_room, request.GameRules, room_id=request.RoomId.Value or None))
+        return mafia_pb2.Room.RoomId(Value=room.id)
+
+    @async_rpc_errors
+    async def ListRooms(self, request: mafia_pb2.ListRoomsRequest, context):
+        status = request.Status if request.HasField('Status') else None
+        return await self._call(self.registry.list_rooms, status)
+
+    async def Ping(self, request, context):
+        return empty_pb2.Empty()
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.room_calls, func, *args)
+
+
+def make_server(config, routing: WorkerRouting | None = None):
+    interceptors = [AsyncMetricsInterceptor()] if config.metrics_port is not None else []
+    if routing is not None:
+        interceptors.append(AsyncRoutingInterceptor(routing))  # after metrics, so forwarded requests are measured too
+    server = grpc.aio.server(interceptors=interceptors, options=SERVER_OPTIONS)
+    service = AsyncCoordinatorService(config, routing)
+    server.add_generic_rpc_handlers((
+        pre_serialized_stream_handler('Coordinator', 'Spectate', service.Spectate, mafia_pb2.ConnectRequest.FromString),
+    ))
+    mafia_pb2_grpc.add_CoordinatorServicer_to_server(service, server)
+    server.add_insecure_port(f'{config.host}:{config.port}')
+    if routing is not None:
+        server.add_insecure_port(routing.addresses[routing.index])
+    return server
+
+
+async def poll(server):
+    await server.start()
+    await server.wait_for_termination()
+
+
+async def serve(config: Config, routing: WorkerRouting | None = None):
+    server = make_server(config, routing)  # grpc.aio server must be created inside running event loop
+    await poll(server)
+
+
+def start_server(config: Config, routing: WorkerRouting | None = None):
+    asyncio.run(serve(config, routing))
@@ -0,0 +1,108 @@
+from server.server_event_log import EventsDropped
+from proto import mafia_pb2
+
+
+class RoomSnapshotEncoder:
+    events_after = None  # every view contains last events of the room
+
+    def view(self, room, username: str) -> mafia_pb2.Room:
+        return room.view(username)
+
+    def encode(self, room_pb: mafia_pb2.Room) -> mafia_pb2.Room:
+        return room_pb
+
+
+class RoomDeltaEncoder:
+    def __init__(self):
+        self._prev = None  # mafia_pb2.Room: last view sent to the stream
+        self._last_event_index = -1
+
+    @property
+    def events_after(self) -> int | None:
+        # snapshot contains last events of the room, views for deltas contain only new events
+        if self._prev is None:
+            return None
+        return self._last_event_index
+
+    def view(self, room, username: str) -> mafia_pb2.Room:
+        try:
+            return room.view(username, self.events_after)
+        except EventsDropped:
+            # stream has fallen behind the event log, so it's resynced by a snapshot with last events
+            self._prev = None
+            return room.view(username)
+
+    def encode(self, room_pb: mafia_pb2.Room) -> mafia_pb2.RoomUpdate:
+        events = room_pb.EventBus.Events
+        if len(events) > 0:
+            self._last_event_index = events[-1].Index
+        prev = self._prev
+        self._prev = room_pb
+        if prev is None:
+            return mafia_pb2.RoomUpdate(Snapshot=room_pb)
+        delta = make_delta(prev, room_pb)
+        delta.NewEvents.extend(events)
+        return mafia_pb2.RoomUpdate(Delta=delta)
+
+
+# NOTE: events aren't diffed, views for deltas are built with events read from the cursor
+def make_delta(prev: mafia_pb2.Room, cur: mafia_pb2.Room) -> mafia_pb2.RoomDelta:
+    delta = mafia_pb2.RoomDelta(Version=cur.Version)
+    if cur.Status != prev.Status:
+        delta.Status = cur.Status
+    if cur.DayNumber != prev.DayNumber:
+        delta.DayNumber = cur.DayNumber
+    _diff_players(prev, cur, delta)
+    _diff_chat(prev, cur, delta)
+    _diff_voting(prev, cur, delta)
+    return delta
+
+
+def _diff_players(prev: mafia_pb2.Room, cur: mafia_pb2.Room, delta: mafia_pb2.RoomDelta):
+    prev_players = {player.Username: player for player in prev.Players}
+    for player in cur.Players:
+        prev_player = prev_players.pop(player.Username, None)
+        if prev_player is None or prev_player != player:
+            delta.Players.append(player)
+    delta.RemovedUsernames.extend(prev_players)
+
+
+def _diff_chat(prev: mafia_pb2.Room, cur: mafia_pb2.Room, delta: mafia_pb2.RoomDelta):
+    if not cur.HasField('Chat'):
+        if prev.HasField('Chat'):
+            delta.ChatRemoved = True
+        return
+    prev_messages = prev.Chat.Messages if prev.HasField('Chat') else None
+    messages = cur.Chat.Messages
+    # NOTE: chat is append-only during the day and is recreated every new day
+    is_appended = (
+        prev_messages is not None
+        and cur.DayNumber == prev.DayNumber
+        and len(messages) >= len(prev_messages)
+        and (len(prev_messages) == 0 or messages[len(prev_messages) - 1] == prev_messages[-1])
+    )
+    if is_appended:
+        delta.NewMessages.extend(messages[len(prev_messages):])
+    else:
+        delta.Chat.CopyFrom(cur.Chat)
+
+
+def _diff_voting(prev: mafia_pb2.Room, cur: mafia_pb2.Room, delta: mafia_pb2.RoomDelta):
+    if not cur.HasField('Voting'):
+        if prev.HasField('Voting'):
+            delta.VotingRemoved = True
+        return
+    prev_votes = prev.Voting.Votes if prev.HasField('Voting') else None
+    votes = cur.Voting.Votes
+    is_same_voting = (
+        prev_votes is not None
+        and cur.Status == prev.Status
+        and cur.DayNumber == prev.DayNumber
+        and len(votes) == len(prev_votes)
+        and all(vote.SuspectUsername == prev_vote.SuspectUsername for vote, prev_vote in zip(votes, prev_votes))
+    )
+    if is_same_voting:
+        delta.Votes.extend(vote for vote, prev_vote in zip(votes, prev_votes) if vote.VotesNumber != prev_vote.VotesNumber)
+    else:
+        delta.Voting.CopyFrom(cur.Voting)
+
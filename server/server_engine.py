@@ -0,0 +1,448 @@
+import functools
+import random
+from collections import Counter
+from typing import Callable, Dict
+from proto import mafia_pb2
+from server.server_player import Player
+from server.server_vote import Voting
+from server.server_events import EventBus
+from server.server_journal import (
+    OP_ADD_PLAYER,
+    OP_BEGIN_VOTE,
+    OP_EXPOSE,
+    OP_MAFIA_VOTE,
+    OP_PHASE_TIMEOUT,
+    OP_REMOVE_PLAYER,
+    OP_SEND_MESSAGE,
+    OP_SHERIFF_VOTE,
+    OP_VOTE,
+)
+
+
+class UnknownUser(Exception):
+    pass
+
+
+# NOTE: stacked checks are merged into one wrapper which runs them from the outermost one,
+# so every action costs one extra call however many checks it has
+def access(condition: Callable, raise_=None):
+    def decorator(func):
+        checks = [(condition, raise_)] + getattr(func, '_access_checks', [])
+        target = getattr(func, '_access_target', func)
+
+        @functools.wraps(target)
+        def wrapper(self, *args, **kwargs):
+            for condition, raise_ in checks:
+                if not condition(self, *args, **kwargs):
+                    if raise_ is not None:
+                        raise raise_.with_traceback(None)  # instance is shared, so its traceback mustn't pile up
+                    return None
+            return target(self, *args, **kwargs)
+        wrapper._access_checks = checks
+        wrapper._access_target = target
+        return wrapper
+    return decorator
+
+
+is_waiting_for_players = access(lambda self, *args, **kwargs: self.is_waiting_for_players)
+is_chat_phase = access(lambda self, *args, **kwargs: self.is_chat_phase)
+is_vote_phase = access(lambda self, *args, **kwargs: self.is_vote_phase)
+is_night_phase = access(lambda self, *args, **kwargs: self.is_night_phase)
+player_is_alive = access(lambda self, *args, **kwargs: self.players[args[0]].is_alive)
+player_in_room = access(lambda self, *args, **kwargs: self.has_player(args[0]), raise_=UnknownUser('User is not in the room'))
+player_not_in_room = access(lambda self, *args, **kwargs: not self.has_player(args[0]), raise_=RuntimeError('Username is already taken'))
+didnt_begin_vote = access(lambda self, *args, **kwargs: args[0] not in self.begin_vote_info)
+player_is_mafia = access(lambda self, *args, **kwargs: self.players[args[0]].is_mafia)
+player_is_sheriff = access(lambda self, *args, **kwargs: self.players[args[0]].is_sheriff)
+suspect_is_alive = access(lambda self, *args, **kwargs: self.players[args[1]].is_alive)
+exposed_is_alive = access(lambda self, *args, **kwargs: self.players[args[1]].is_alive)
+is_current_phase = access(lambda self, *args, **kwargs: self.phase_number == args[0])
+
+
+# NOTE: actions coming from outside of the game are reported once they pass the checks,
+# everything else (phase transitions, role assignment) is deterministic given the rng
+def action(op):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args):
+            if self.on_action is not None:
+                self.on_action(op, *args)
+            return func(self, *args)
+        return wrapper
+    return decorator
+
+
+WAITING_FOR_PLAYERS = mafia_pb2.Room.RoomStatus.WAITING_FOR_PLAYERS
+CHAT_PHASE = mafia_pb2.Room.RoomStatus.CHAT_PHASE
+VOTE_PHASE = mafia_pb2.Room.RoomStatus.VOTE_PHASE
+NIGHT_PHASE = mafia_pb2.Room.RoomStatus.NIGHT_PHASE
+MAFIA_WON = mafia_pb2.Room.RoomStatus.MAFIA_WON
+MAFIA_LOST = mafia_pb2.Room.RoomStatus.MAFIA_LOST
+PLAYER_COLORS = ['hot_pink', 'plum1', 'dark_orange', 'pale_turquoise1', 'blue', 'green', 'yellow']  # https://rich.readthedocs.io/en/stable/appendix/colors.html#appendix-colors
+PHASE_DURATION_S = 60.0
+
+
+# NOTE: rules of the game as a state machine: no locks, no logging, no timers; time and
+# randomness are inputs, so the same actions on the same rng give the same game.
+# Phase deadline is only recorded, whoever drives the game calls on_phase_timeout when it passes
+class GameEngine:
+    def __init__(self, game_rules: mafia_pb2.GameRules, rng: random.Random, clock: Callable[[], float], events: EventBus,
+                 on_action: Callable | None = None):
+        self.game_rules = game_rules
+        self.events = events
+        self.on_action = on_action  # on_action(op, *args) is called for every accepted action
+        self._random = rng
+        self._clock = clock
+        self.day_number = 0
+        self.status = WAITING_FOR_PLAYERS
+        self.players = {}  # Dict[str, Player]: username2player
+        # NOTE: indexes below are filled when roles are set and updated when players die,
+        # they keep the order of players
+        self.mafia_players = {}  # Dict[str, Player]
+        self.sheriff_players = {}  # Dict[str, Player]
+        self.alive_players = {}  # Dict[str, Player]
+        self.mafia_alive_players = {}  # Dict[str, Player]
+        self.begin_vote_info = None  # Dict[str, bool]: username2begin_vote
+        self.voting = None
+        self.mafia_voting = None
+        self.sheriff_voting = None
+        self.chat = None
+        self.phase_deadline = None  # time of the clock
+        self.phase_number = 0
+        self.exposed = set()
+        self._colors = self._random.sample(PLAYER_COLORS, self.game_rules.ActivePlayersNumber)
+        self._free_seats = list(reversed(range(self.game_rules.ActivePlayersNumber)))  # the lowest free seat is taken first
+
+    @is_waiting_for_players
+    @player_not_in_room
+    @action(OP_ADD_PLAYER)
+    def add_player(self, username):
+        self.players[username] = Player(username, color=self._colors.pop(), seat=self._free_seats.pop())
+        self.events.user_connected(username, users_connected=len(self.players), total_users=self.game_rules.ActivePlayersNumber)
+        if len(self.players) == self.game_rules.ActivePlayersNumber:
+            self.start_game()
+
+    @player_in_room
+    @action(OP_REMOVE_PLAYER)
+    def remove_player(self, username):
+        if self.is_waiting_for_players:
+            player = self.players.pop(username)
+            self._colors.append(player.color)
+            self._free_seats.append(player.seat)
+        self.events.user_disconnected(username, users_connected=len(self.players), total_users=self.game_rules.ActivePlayersNumber)
+
+    def start_game(self):
+        self.day_number = 0
+        pool = list(self.players.values())
+        self._random.shuffle(pool)
+        mafias = []
+        for _ in range(self.game_rules.MafiaNumber):
+            mafias.append(pool.pop())
+        sheriffs = []
+        for _ in range(self.game_rules.SheriffNumber):
+            sheriffs.append(pool.pop())
+        civilians = pool
+
+        for mafia in mafias:
+            mafia.set_mafia()
+        for sheriff in sheriffs:
+            sheriff.set_sheriff()
+        for civilian in civilians:
+            civilian.set_civilian()
+        self.mafia_players = {username: player for username, player in self.players.items() if player.is_mafia}
+        self.sheriff_players = {username: player for username, player in self.players.items() if player.is_sheriff}
+        self.alive_players = dict(self.players)
+        self.mafia_alive_players = dict(self.mafia_players)
+
+        self.events.roles_set(self.players.values())
+        self.begin_new_day()
+
+    def begin_new_day(self):
+        self.day_number += 1
+        self.events.day_began(self.day_number)
+        self.start_chat_phase()
+
+    def start_chat_phase(self):
+        self.chat = mafia_pb2.Chat(Messages=[])
+        self.begin_vote_info = {}
+        self.status = CHAT_PHASE
+        self.events.chat_phase_began()
+
+    def start_vote_phase(self):
+        self.begin_vote_info = {}
+        self.voting = self._new_voting(self.alive_players)
+        self.status = VOTE_PHASE
+        self.events.vote_phase_began()
+        self._arm_phase()
+
+    def finish_vote_phase(self):
+        username_to_kill = self.voting.get_most_voted_username()
+        self._kill(username_to_kill)
+        self.events.player_was_killed(self.players[username_to_kill])
+        if self._has_mafia_win_condition():
+            self.set_mafia_won()
+        elif self._has_mafia_lost_condition():
+            self.set_mafia_lost()
+        else:
+            self.start_night_phase()
+
+    def start_night_phase(self):
+        self.chat = None
+        self.voting = None
+        self.mafia_voting = self._new_voting(self.mafia_players)
+        self.sheriff_voting = self._new_voting(self.sheriff_players)
+        self.status = NIGHT_PHASE
+        self.events.night_phase_began()
+        self._arm_phase()
+
+    @is_current_phase
+    @action(OP_PHASE_TIMEOUT)
+    def on_phase_timeout(self, phase_number):
+        self.phase_deadline = None
+        if self.is_vote_phase:
+            self.finish_vote_phase()
+        elif self.is_night_phase:
+            self.finish_night_phase()
+
+    def finish_night_phase(self):
+        username_to_kill = self.mafia_voting.get_most_voted_username()
+        self._kill(username_to_kill)
+        self.events.player_was_killed(self.players[username_to_kill])
+        username_to_expose = self.sheriff_voting.get_most_voted_username()
+        self.players[username_to_expose].expose_to(self.sheriff_players.values())
+        self.mafia_voting = None
+        self.sheriff_voting = None
+        if self._has_mafia_win_condition():
+            self.set_mafia_won()
+        elif self._has_mafia_lost_condition():
+            self.set_mafia_lost()
+        else:
+            self.begin_new_day()
+
+    @player_in_room
+    @player_is_alive
+    @action(OP_SEND_MESSAGE)
+    def send_message(self, username, text):
+        if self.is_chat_phase:
+            self.chat.Messages.append(mafia_pb2.Chat.Message(
+                AuthorUsername = username,
+                Text = text,
+            ))
+            self.events.global_message_appeared(username, text)
+        elif self.is_night_phase:
+            player = self.players[username]
+            if player.is_mafia:
+                self.events.mafia_message_appeared(username, text)
+            elif player.is_sheriff:
+                self.events.sheriff_message_appeared(username, text)
+
+    @is_chat_phase
+    @player_in_room
+    @player_is_alive
+    @didnt_begin_vote
+    @action(OP_BEGIN_VOTE)
+    def begin_vote(self, username):
+        self.begin_vote_info[username] = True
+        begin_vote_cnt = len(self.begin_vote_info)
+        alive_players_cnt = len(self.alive_players)
+        self.events.player_wants_begin_vote(username, begin_vote_cnt, alive_players_cnt, self.day_number)
+        if begin_vote_cnt == alive_players_cnt:
+            if self.day_number == 1:
+                self.start_night_phase()
+            else:
+                self.start_vote_phase()
+
+    @is_vote_phase
+    @player_in_room
+    @player_is_alive
+    @suspect_is_alive
+    @action(OP_VOTE)
+    def vote(self, username, suspect_username):
+        self.voting.vote(username, suspect_username)
+        votes_number = self.voting.get_votes_number(suspect_username)
+        self.events.global_vote_appeared(suspect_username, votes_number)
+        if self.voting.is_everyone_voted():
+            self.phase_deadline = None
+            self.finish_vote_phase()
+
+    @is_night_phase
+    @player_in_room
+    @player_is_alive
+    @player_is_mafia
+    @suspect_is_alive
+    @action(OP_MAFIA_VOTE)
+    def mafia_vote(self, username, suspect_username):
+        self.mafia_voting.vote(username, suspect_username)
+        votes_number = self.mafia_voting.get_votes_number(suspect_username)
+        self.events.mafia_vote_appeared(suspect_username, votes_number)
+        if self.mafia_voting.is_everyone_voted() and self.sheriff_voting.is_everyone_voted():
+            self.phase_deadline = None
+            self.finish_night_phase()
+
+    @is_night_phase
+    @player_in_room
+    @player_is_alive
+    @player_is_sheriff
+    @suspect_is_alive
+    @action(OP_SHERIFF_VOTE)
+    def sheriff_vote(self, username, suspect_username):
+        self.sheriff_voting.vote(username, suspect_username)
+        votes_number = self.sheriff_voting.get_votes_number(suspect_username)
+        self.events.sheriff_vote_appeared(suspect_username, votes_number)
+        if self.mafia_voting.is_everyone_voted() and self.sheriff_voting.is_everyone_voted():
+            self.phase_deadline = None
+            self.finish_night_phase()
+
+    @player_in_room
+    @player_is_alive
+    @player_is_sheriff
+    @exposed_is_alive
+    @action(OP_EXPOSE)
+    def expose(self, username, username_to_expose):
+        if username_to_expose in self.exposed:
+            return
+        self.exposed.add(username_to_expose)
+        self.players[username_to_expose].publicly_expose_to(self.players.values())
+        self.events.player_was_exposed(username_to_expose)
+
+    def set_mafia_won(self):
+        self.status = MAFIA_WON
+        for player in self.players.values():
+            player.expose_to(self.players.values())
+        self.events.mafia_won()
+
+    def set_mafia_lost(self):
+        self.status = MAFIA_LOST
+        for player in self.players.values():
+            player.expose_to(self.players.values())
+        self.events.mafia_lost()
+
+    def has_player(self, username):
+        return username in self.players
+
+    def _new_voting(self, voters) -> Voting:
+        return Voting(voters, self.alive_players, tie_break=self.game_rules.TieBreak, rng=self._random)
+
+    def _arm_phase(self):
+        self.phase_number += 1
+        self.phase_deadline = self._clock() + PHASE_DURATION_S
+
+    def _kill(self, username):
+        self.players[username].kill()
+        del self.alive_players[username]
+        self.mafia_alive_players.pop(username, None)
+
+    def _has_mafia_win_condition(self):
+        return len(self.mafia_alive_players) >= (len(self.alive_players) + 1) // 2
+
+    def _has_mafia_lost_condition(self):
+        return len(self.mafia_alive_players) == 0
+
+    @property
+    def is_finished(self):
+        return self.status == MAFIA_WON or self.status == MAFIA_LOST
+
+    @property
+    def is_waiting_for_players(self):
+        return self.status == WAITING_FOR_PLAYERS
+
+    @property
+    def is_chat_phase(self):
+        return self.status == CHAT_PHASE
+
+    @property
+    def is_vote_phase(self):
+        return self.status == VOTE_PHASE
+
+    @property
+    def is_night_phase(self):
+        return self.status == NIGHT_PHASE
+
+
+# NOTE: game driven by a virtual clock from the calling thread, so a whole game runs
+# in-process without a room and is fully determined by the seed and the actions
+class HeadlessGame:
+    def __init__(self, game_rules: mafia_pb2.GameRules, seed: int = 0, start_time: float = 0.0):
+        self._time = start_time
+        self.engine = GameEngine(game_rules, random.Random(seed), self._clock, EventBus())
+
+    def advance(self, seconds: float):
+        self.advance_to(self._time + seconds)
+
+    def advance_to(self, deadline: float):
+        engine = self.engine
+        while engine.phase_deadline is not None and engine.phase_deadline <= deadline:
+            self._time = max(self._time, engine.phase_deadline)
+            engine.on_phase_timeout(engine.phase_number)
+        self._time = max(self._time, deadline)
+
+    def finish_phase_by_timeout(self) -> bool:
+        if self.engine.phase_deadline is None:
+            return False
+        self.advance_to(self.engine.phase_deadline)
+        return True
+
+    def _clock(self) -> float:
+        return self._time
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def is_finished(self) -> bool:
+        return self.engine.is_finished
+
+
+# NOTE: bots choose their actions at random, some of them skip votes so phases are
+# also finished by timeouts
+def play_random_game(game_rules: mafia_pb2.GameRules, seed: int, max_actions: int = 10000) -> HeadlessGame:
+    game = HeadlessGame(game_rules, seed=seed)
+    engine = game.engine
+    rng = random.Random(seed)
+    usernames = [f'bot{i}' for i in range(game_rules.ActivePlayersNumber)]
+    for username in usernames:
+        engine.add_player(username)
+    for _ in range(max_actions):
+        if game.is_finished:
+            break
+        alive = list(engine.alive_players)
+        username = rng.choice(alive)
+        suspect_username = rng.choice(alive)
+        if rng.random() < 0.05:
+            game.finish_phase_by_timeout()
+        elif engine.is_chat_phase:
+            if rng.random() < 0.3:
+                engine.send_message(username, 'hi')
+            elif rng.random() < 0.1 and engine.players[username].is_sheriff:
+                engine.expose(username, suspect_username)
+            else:
+                engine.begin_vote(username)
+        elif engine.is_vote_phase:
+            engine.vote(username, suspect_username)
+        elif engine.is_night_phase:
+            if engine.players[username].is_mafia:
+                engine.mafia_vote(username, suspect_username)
+            elif engine.players[username].is_sheriff:
+                engine.sheriff_vote(username, suspect_username)
+            else:
+                game.finish_phase_by_timeout()
+    return game
+
+
+def simulate(game_rules: mafia_pb2.GameRules, games_number: int, seed: int = 0) -> Dict:
+    statuses = Counter()
+    days = 0
+    game_time = 0.0
+    for game_seed in range(seed, seed + games_number):
+        game = play_random_game(game_rules, game_seed)
+        statuses[mafia_pb2.Room.RoomStatus.Name(game.engine.status)] += 1
+        days += game.engine.day_number
+        game_time += game.time
+    return {
+        'games': games_number,
+        'statuses': dict(statuses),
+        'mafia_win_rate': statuses['MAFIA_WON'] / games_number if games_number > 0 else 0.0,
+        'avg_days': days / games_number if games_number > 0 else 0.0,
+        'avg_game_time_s': game_time / games_number if games_number > 0 else 0.0,
+    }
@@ -0,0 +1,162 @@
+import bisect
+import grpc
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from typing import List, NamedTuple
+from proto import mafia_pb2
+
+
+class EventLogSettings(NamedTuple):
+    segment_size: int = 64
+    memory_segments: int = 4  # older segments are spilled to disk or dropped
+    spill_dir: str | None = None
+
+
+class EventsDropped(Exception):
+    status_code = grpc.StatusCode.OUT_OF_RANGE
+
+    def __init__(self, first_available_index: int):
+        super().__init__(f'Events are dropped, the first available index is {first_available_index}')
+        self.first_available_index = first_available_index
+
+
+class SpilledSegment:
+    def __init__(self, path: str, events: List[mafia_pb2.EventBus.Event]):
+        self.path = path
+        self.first_index = events[0].Index
+        self.events = events  # kept in memory until the segment is written
+
+
+# NOTE: segments are written by one background thread, so eviction doesn't do I/O
+# while the room is locked; readers use the in-memory copy until it's written
+class SpillWriter:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, segment: SpilledSegment):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-log-spill', daemon=True)
+                self._thread.start()
+        self._queue.put(segment)
+
+    def flush(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            segment = self._queue.get()
+            try:
+                with open(segment.path, 'wb') as f:
+                    f.write(mafia_pb2.EventBus(Events=segment.events).SerializeToString())
+                segment.events = None
+            except OSError as error:
+                # log is closed and its directory is removed, or the disk is broken: segment stays in memory
+                logging.warning(f'Failed to spill events to {segment.path}: {error}')
+            finally:
+                self._queue.task_done()
+
+
+spill_writer = SpillWriter()
+
+
+# NOTE: append-only log of events ordered by index, events of one log may have
+# gaps in indexes since indexes are shared by all logs of the room
+class EventLog:
+    def __init__(self, settings: EventLogSettings = EventLogSettings(), spill_path_prefix: str | None = None):
+        self._settings = settings
+        self._spill_path_prefix = spill_path_prefix if settings.spill_dir is not None else None
+        self._segments = deque()  # Deque[List[mafia_pb2.EventBus.Event]]: in-memory segments, the last one is open
+        self._spilled_first_indexes = []  # first event index of every spilled segment
+        self._spilled = []  # List[SpilledSegment]
+        self._events_number = 0
+        self._dropped_events_number = 0
+        self._first_available_index = 0  # events before it are dropped
+
+    def append(self, event: mafia_pb2.EventBus.Event):
+        if len(self._segments) == 0 or len(self._segments[-1]) == self._settings.segment_size:
+            if len(self._segments) == self._settings.memory_segments:
+                self._evict(self._segments.popleft())
+            self._segments.append([])
+        self._segments[-1].append(event)
+        self._events_number += 1
+
+    def read(self, after_index: int | None = None, limit: int | None = None) -> List[mafia_pb2.EventBus.Event]:
+        # reads from the first available event if index isn't given,
+        # raises EventsDropped if some events after the index aren't available anymore
+        if after_index is None:
+            after_index = self._first_available_index - 1
+        elif after_index + 1 < self._first_available_index:
+            raise EventsDropped(self._first_available_index)
+        events = []
+        start = max(bisect.bisect_right(self._spilled_first_indexes, after_index) - 1, 0)
+        for segment in self._spilled[start:]:
+            segment_events = segment.events
+            if segment_events is None:
+                segment_events = self._load(segment.path)
+            if not _extend_after(events, segment_events, after_index, limit):
+                return events
+        for segment in self._segments:
+            if not _extend_after(events, segment, after_index, limit):
+                return events
+        return events
+
+    def tail(self, n: int) -> List[mafia_pb2.EventBus.Event]:
+        events = []
+        if n <= 0:
+            return events
+        for segment in reversed(self._segments):
+            if len(events) >= n:
+                break
+            events = segment[-(n - len(events)):] + events
+        return events
+
+    def close(self):
+        for segment in self._spilled:
+            if os.path.exists(segment.path):
+                os.remove(segment.path)
+        self._spilled_first_indexes = []
+        self._spilled = []
+
+    @property
+    def memory_events_number(self):
+        return sum(len(segment) for segment in self._segments)
+
+    @property
+    def dropped_events_number(self):
+        return self._dropped_events_number
+
+    @property
+    def first_available_index(self):
+        return self._first_available_index
+
+    def __len__(self):
+        return self._events_number
+
+    def _evict(self, segment: List[mafia_pb2.EventBus.Event]):
+        if self._spill_path_prefix is None:
+            self._dropped_events_number += len(segment)
+            self._first_available_index = segment[-1].Index + 1
+            return
+        spilled = SpilledSegment(f'{self._spill_path_prefix}-{len(self._spilled)}.pb', segment)
+        self._spilled_first_indexes.append(spilled.first_index)
+        self._spilled.append(spilled)
+        spill_writer.submit(spilled)
+
+    def _load(self, path) -> List[mafia_pb2.EventBus.Event]:
+        with open(path, 'rb') as f:
+            return list(mafia_pb2.EventBus.FromString(f.read()).Events)
+
+
+def _extend_after(events: List, segment: List[mafia_pb2.EventBus.Event], after_index: int, limit: int | None) -> bool:
+    if len(segment) == 0 or segment[-1].Index <= after_index:
+        return True
+    start = bisect.bisect_right(segment, after_index, key=lambda event: event.Index)
+    stop = len(segment) if limit is None else start + limit - len(events)
+    events.extend(segment[start:stop])
+    return limit is None or len(events) < limit
@@ -1,21 +1,51 @@
-import random
-from collections import deque
+import heapq
+import shutil
+import tempfile
+import threading
+from typing import Callable, Iterable, List, NamedTuple
+from server.server_event_log import EventLog, EventLogSettings
 from server.server_player import Player
-from typing import Callable, Iterable
 from proto import mafia_pb2
 
 
+class Audience(NamedTuple):
+    kind: int
+    username: str | None = None
+
+    @staticmethod
+    def player(username) -> 'Audience':
+        return Audience(AUDIENCE_PLAYER, username)
+
+
+AUDIENCE_EVERYONE = 0
+AUDIENCE_MAFIA = 1
+AUDIENCE_SHERIFFS = 2
+AUDIENCE_PLAYER = 3
+
+EVERYONE = Audience(AUDIENCE_EVERYONE)
+MAFIA = Audience(AUDIENCE_MAFIA)
+SHERIFFS = Audience(AUDIENCE_SHERIFFS)
+
+
 class EventBus:
-    def __init__(self, max_size=100):
-        self.max_size = max_size
-        self.events = deque()
+    def __init__(self, max_size=100, on_event: Callable[[Audience], None] | None = None, log_settings: EventLogSettings = EventLogSettings()):
+        self.max_size = max_size  # number of events in view
+        self.log_settings = log_settings
+        self.audience_events = {}  # Dict[Audience, EventLog]: append-only log per audience
         self.next_event_index = 0
-
-    def add_event(self, msg, access: Callable[[Player], bool] = lambda player: True):
-        if len(self.events) == self.max_size:
-            self.events.popleft()
-        self.events.append((self.next_event_index, msg, access))
+        self.on_event = on_event
+        self._merged_cache = {}  # Dict[Tuple[bool, bool], Tuple[int, List[mafia_pb2.EventBus.Event]]]
+        self._merged_cache_lock = threading.Lock()
+        self._spill_dir = None
+
+    def add_event(self, msg, audience: Audience = EVERYONE):
+        events = self.audience_events.get(audience)
+        if events is None:
+            events = self.audience_events[audience] = EventLog(self.log_settings, self._new_spill_path_prefix())
+        events.append(mafia_pb2.EventBus.Event(Index=self.next_event_index, Message=msg))
         self.next_event_index += 1
+        if self.on_event is not None:
+            self.on_event(audience)
 
     def user_connected(self, username, users_connected: int, total_users: int):
         self.add_event(f'Player `{username}` conntected: {users_connected}/{total_users}')
@@ -25,7 +55,7 @@ class EventBus:
 
     def roles_set(self, players: Iterable[Player]):
         for player in players:
-            self.add_event(f'You got role {_beautify_role(player.role)}', access=lambda p, player=player: p.username == player.username)
+            self.add_event(f'You got role {_beautify_role(player.role)}', audience=Audience.player(player.username))
 
     def day_began(self, day_number):
         self.add_event(f'DAY {day_number}')
@@ -43,10 +73,10 @@ class EventBus:
         self.add_event(f'`{username}`: {text}')
 
     def mafia_message_appeared(self, username, text):
-        self.add_event(f'`{username}`: {text}', access=lambda p: p.is_mafia)
+        self.add_event(f'`{username}`: {text}', audience=MAFIA)
 
     def sheriff_message_appeared(self, username, text):
-        self.add_event(f'`{username}`: {text}', access=lambda p: p.is_sheriff)
+        self.add_event(f'`{username}`: {text}', audience=SHERIFFS)
 
     def player_wants_begin_vote(self, username, begin_vote_cnt, alive_players_cnt, day_number):
         if day_number == 1:
@@ -58,10 +88,10 @@ class EventBus:
         self.add_event(f'Votes for `{suspect_username}`: {votes_number}')
 
     def mafia_vote_appeared(self, suspect_username, votes_number):
-        self.add_event(f'Votes for `{suspect_username}`: {votes_number}', access=lambda p: p.is_mafia)
+        self.add_event(f'Votes for `{suspect_username}`: {votes_number}', audience=MAFIA)
 
     def sheriff_vote_appeared(self, suspect_username, votes_number):
-        self.add_event(f'Votes for `{suspect_username}`: {votes_number}', access=lambda p: p.is_sheriff)
+        self.add_event(f'Votes for `{suspect_username}`: {votes_number}', audience=SHERIFFS)
 
     def player_was_killed(self, killed_player: Player):
         self.add_event(f'Player was killed: `{killed_player.username}` ({_beautify_role(killed_player.role)})')
@@ -79,20 +109,97 @@ class EventBus:
         self.add_event('Mafia LOST!')
 
     def view(self, player: Player) -> mafia_pb2.EventBus:
-        accessed_events = []
-        for event_index, event_msg, event_access in self.events:
-            if event_access(player):
-                accessed_events.append(mafia_pb2.EventBus.Event(Index=event_index, Message=event_msg))
         return mafia_pb2.EventBus(
-            Events=accessed_events,
+            Events=self.player_events(player),
         )
 
+    def player_events(self, player: Player) -> List[mafia_pb2.EventBus.Event]:
+        events = self._role_events(player)
+        personal_events = self.audience_events.get(Audience.player(player.username))
+        if personal_events:
+            events = list(heapq.merge(events, personal_events.tail(self.max_size), key=_event_index))[-self.max_size:]
+        return events
+
+    def public_events(self) -> List[mafia_pb2.EventBus.Event]:
+        events = self.audience_events.get(EVERYONE)
+        return events.tail(self.max_size) if events is not None else []
+
+    def player_events_after(self, player: Player, after_index: int | None = None, limit: int | None = None) -> List[mafia_pb2.EventBus.Event]:
+        sources = [events.read(after_index, limit) for events in self._player_logs(player)]
+        events = heapq.merge(*sources, key=_event_index)
+        if limit is None:
+            return list(events)
+        return [event for event, _ in zip(events, range(limit))]
+
+    def close(self):
+        for events in self.audience_events.values():
+            events.close()
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    @property
+    def memory_events_number(self):
+        return sum(events.memory_events_number for events in self.audience_events.values())
+
+    def _player_logs(self, player: Player) -> List[EventLog]:
+        audiences = [EVERYONE, Audience.player(player.username)]
+        if player.is_mafia:
+            audiences.append(MAFIA)
+        if player.is_sheriff:
+            audiences.append(SHERIFFS)
+        return [self.audience_events[audience] for audience in audiences if audience in self.audience_events]
+
+    def _new_spill_path_prefix(self) -> str | None:
+        if self.log_settings.spill_dir is None:
+            return None
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='events-', dir=self.log_settings.spill_dir)
+        return f'{self._spill_dir}/{len(self.audience_events)}'
+
+    # NOTE: events for players with the same role are merged once per new event
+    def _role_events(self, player: Player) -> List[mafia_pb2.EventBus.Event]:
+        key = (player.is_mafia, player.is_sheriff)
+        with self._merged_cache_lock:
+            cached = self._merged_cache.get(key)
+        if cached is not None and cached[0] == self.next_event_index:
+            return cached[1]
+        audiences = [EVERYONE]
+        if player.is_mafia:
+            audiences.append(MAFIA)
+        if player.is_sheriff:
+            audiences.append(SHERIFFS)
+        sources = [self.audience_events[audience].tail(self.max_size) for audience in audiences if audience in self.audience_events]
+        if len(sources) <= 1:
+            events = sources[0] if len(sources) == 1 else []
+        else:
+            events = list(heapq.merge(*sources, key=_event_index))[-self.max_size:]
+        with self._merged_cache_lock:
+            self._merged_cache[key] = (self.next_event_index, events)
+        return events
+
+
+def audience_usernames(audience: Audience, players: Iterable[Player]) -> Iterable[str] | None:
+    if audience.kind == AUDIENCE_MAFIA:
+        return [player.username for player in players if player.is_mafia]
+    if audience.kind == AUDIENCE_SHERIFFS:
+        return [player.username for player in players if player.is_sheriff]
+    if audience.kind == AUDIENCE_PLAYER:
+        return [audience.username]
+    return None  # everyone
+
+
+def _event_index(event: mafia_pb2.EventBus.Event):
+    return event.Index
+
+
+ROLE_NAMES = {
+    mafia_pb2.Player.PlayerRole.PR_UNKNOWN: '???',
+    mafia_pb2.Player.PlayerRole.PR_CIVILIAN: 'Civilian',
+    mafia_pb2.Player.PlayerRole.PR_MAFIA: 'Mafia',
+    mafia_pb2.Player.PlayerRole.PR_SHERIFF: 'Sheriff',
+}
+
 
 def _beautify_role(player_role: int):
-    conversion = {
-        mafia_pb2.Player.PlayerRole.PR_UNKNOWN: '???',
-        mafia_pb2.Player.PlayerRole.PR_CIVILIAN: 'Civilian',
-        mafia_pb2.Player.PlayerRole.PR_MAFIA: 'Mafia',
-        mafia_pb2.Player.PlayerRole.PR_SHERIFF: 'Sheriff',
-    }
-    return conversion[player_role]
+    return ROLE_NAMES[player_role]
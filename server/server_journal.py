@@ -0,0 +1,194 @@
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import List, NamedTuple, Tuple
+
+
+OP_CREATE_ROOM = 1
+OP_REMOVE_ROOM = 2
+OP_ADD_PLAYER = 3
+OP_REMOVE_PLAYER = 4
+OP_SEND_MESSAGE = 5
+OP_BEGIN_VOTE = 6
+OP_VOTE = 7
+OP_MAFIA_VOTE = 8
+OP_SHERIFF_VOTE = 9
+OP_EXPOSE = 10
+OP_PHASE_TIMEOUT = 11
+
+_RECORD_HEADER = struct.Struct('<II')  # body size, crc32 of body
+_BODY_HEADER = struct.Struct('<Bd')  # op, timestamp
+_FIELD_HEADER = struct.Struct('<I')  # field size
+
+
+class JournalRecord(NamedTuple):
+    op: int
+    timestamp: float
+    fields: Tuple[bytes, ...]
+
+
+# NOTE: append() only encodes the record and puts it into the buffer, the writer
+# thread commits everything buffered since its previous commit with one fsync.
+# First field of every record is id of the room, once compact_removed_rooms rooms are
+# removed the writer rewrites the journal without records of removed rooms
+class Journal:
+    def __init__(self, path, commit_interval=0.005, fsync=True, compact_removed_rooms=64):
+        self.path = path
+        self._commit_interval = commit_interval
+        self._fsync = fsync
+        self._compact_removed_rooms = compact_removed_rooms
+        self._removed_rooms_number = 0  # since the last compaction
+        self._lock = threading.Lock()
+        self._has_records = threading.Condition(self._lock)
+        self._committed = threading.Condition(self._lock)
+        self._buffer = []
+        self._appended_count = 0
+        self._committed_count = 0
+        self._closed = False
+        self._truncate_torn_tail()
+        if os.path.exists(path):
+            self._compact()
+        self._file = open(path, 'ab')
+        self._writer = threading.Thread(target=self._write_loop, name='journal-writer', daemon=True)
+        self._writer.start()
+
+    def append(self, op: int, *fields):
+        record = encode_record(op, time.time(), fields)
+        with self._lock:
+            self._buffer.append(record)
+            self._appended_count += 1
+            if op == OP_REMOVE_ROOM:
+                self._removed_rooms_number += 1
+            if len(self._buffer) == 1:
+                self._has_records.notify()
+
+    def sync(self, timeout=None) -> bool:
+        with self._lock:
+            target = self._appended_count
+            return self._committed.wait_for(lambda: self._committed_count >= target or self._closed, timeout)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._has_records.notify()
+        self._writer.join()
+        self._file.close()
+
+    def records(self) -> List[JournalRecord]:
+        return read_records(self.path)[0]
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                self._has_records.wait_for(lambda: len(self._buffer) > 0 or self._closed)
+                if len(self._buffer) == 0:
+                    return
+            if not self._closed:
+                time.sleep(self._commit_interval)  # let concurrent appends join the batch
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            try:
+                self._file.write(b''.join(batch))
+                self._file.flush()
+                if self._fsync:
+                    os.fsync(self._file.fileno())
+            except Exception as error:
+                logging.error(f'Failed to commit {len(batch)} journal records: {error}')
+            with self._lock:
+                self._committed_count += len(batch)
+                self._committed.notify_all()
+                should_compact = self._removed_rooms_number >= self._compact_removed_rooms and not self._closed
+            if should_compact:
+                self._compact_file()
+
+    # NOTE: only the writer thread writes the file, so it's rewritten between batches and
+    # records appended meanwhile wait in the buffer and go to the new file
+    def _compact_file(self):
+        try:
+            self._file.close()
+            self._compact()
+        except Exception as error:
+            logging.error(f'Failed to compact journal {self.path}: {error}')
+        finally:
+            self._file = open(self.path, 'ab')
+
+    def _compact(self):
+        with self._lock:
+            self._removed_rooms_number = 0
+        records, _ = read_records(self.path)
+        last_removal = {}  # Dict[bytes, int]: room_id -> index of its last OP_REMOVE_ROOM record
+        for ind, record in enumerate(records):
+            if record.op == OP_REMOVE_ROOM:
+                last_removal[record.fields[0]] = ind
+        if len(last_removal) == 0:
+            return
+        # ids of removed rooms may be taken by new rooms, so only records before the removal are dropped
+        live_records = [record for ind, record in enumerate(records) if last_removal.get(record.fields[0], -1) < ind]
+        compact_path = self.path + '.compact'
+        with open(compact_path, 'wb') as f:
+            f.write(b''.join(encode_record(record.op, record.timestamp, record.fields) for record in live_records))
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
+        os.replace(compact_path, self.path)
+        if self._fsync:
+            _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+        logging.info(f'Compact journal {self.path}: {len(records)} -> {len(live_records)} records')
+
+    def _truncate_torn_tail(self):
+        if not os.path.exists(self.path):
+            return
+        _, valid_size = read_records(self.path)
+        if valid_size < os.path.getsize(self.path):
+            logging.warning(f'Truncate torn tail of journal {self.path} to {valid_size} bytes')
+            os.truncate(self.path, valid_size)
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def encode_record(op: int, timestamp: float, fields) -> bytes:
+    parts = [_BODY_HEADER.pack(op, timestamp)]
+    for field in fields:
+        if not isinstance(field, bytes):
+            field = str(field).encode('utf-8')
+        parts.append(_FIELD_HEADER.pack(len(field)))
+        parts.append(field)
+    body = b''.join(parts)
+    return _RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_body(body: bytes) -> JournalRecord:
+    op, timestamp = _BODY_HEADER.unpack_from(body)
+    offset = _BODY_HEADER.size
+    fields = []
+    while offset < len(body):
+        (size,) = _FIELD_HEADER.unpack_from(body, offset)
+        offset += _FIELD_HEADER.size
+        fields.append(body[offset:offset + size])
+        offset += size
+    return JournalRecord(op, timestamp, tuple(fields))
+
+
+def read_records(path) -> Tuple[List[JournalRecord], int]:
+    # returns records and size of the valid part of journal, the rest is a torn write
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(data):
+        size, crc = _RECORD_HEADER.unpack_from(data, offset)
+        body = data[offset + _RECORD_HEADER.size:offset + _RECORD_HEADER.size + size]
+        if len(body) < size or zlib.crc32(body) != crc:
+            break
+        records.append(decode_body(body))
+        offset += _RECORD_HEADER.size + size
+    return records, offset
@@ -0,0 +1,196 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from proto import mafia_pb2
+from server.server_metrics import LOBBY_TIME_TO_MATCH, game_rules_labels
+from server.server_registry import RoomRegistry, UnknownRoom, validate_game_rules
+from server.server_scheduler import PhaseScheduler, default_scheduler
+from server.server_updates import AsyncSubscription, Subscription
+
+
+lobby_logger = logging.getLogger('mafia.lobby')
+
+BucketKey = Tuple[int, int, int, int]  # players, mafia, sheriffs, tie break
+
+
+class Ticket:
+    def __init__(self, username: str, bucket_key: BucketKey, subscription: Subscription | AsyncSubscription):
+        self.username = username
+        self.bucket_key = bucket_key
+        self.subscription = subscription  # notified when the room is formed
+        self.enqueued_at = time.monotonic()
+        self.seq = None  # order of enqueueing, the place of the ticket in its bucket
+        self.players_waiting = 0  # in the bucket right after the ticket is enqueued
+        self.room_id = None  # room formed for the ticket, reset if the room is released
+        self.left = False
+
+
+# NOTE: tickets are kept in a heap by order of enqueueing, so tickets put back after
+# a released room take their old place in O(log n); tickets which have left stay in
+# the heap until they are popped, the heap is rebuilt once most of it is left tickets
+class _Bucket:
+    __slots__ = ('heap', 'size')
+
+    def __init__(self):
+        self.heap = []  # List[Tuple[int, Ticket]]: (seq, ticket)
+        self.size = 0  # number of waiting tickets
+
+    def push(self, ticket: Ticket):
+        heapq.heappush(self.heap, (ticket.seq, ticket))
+        self.size += 1
+
+    def pop(self, is_waiting: Callable[[Ticket], bool]) -> Ticket:
+        while True:
+            _, ticket = heapq.heappop(self.heap)
+            if is_waiting(ticket):
+                self.size -= 1
+                return ticket
+
+    def discard(self, is_waiting: Callable[[Ticket], bool]):
+        self.size -= 1
+        if len(self.heap) > 2 * self.size + 64:
+            self.heap = [item for item in self.heap if is_waiting(item[1])]
+            heapq.heapify(self.heap)
+
+
+# NOTE: players waiting for the same game rules share a bucket: enqueueing and leaving
+# are O(log n) and O(1), a room is formed from the oldest tickets as soon as the bucket
+# has enough of them, so other buckets are never looked at. Tickets are taken out of the
+# bucket under the lobby lock, the room is created for them outside of it.
+# Formed room is reserved for its players, if it isn't full in join_timeout it's released
+# and players who are still in the lobby (haven't left) are put back to their bucket
+class Lobby:
+    def __init__(self, registry: RoomRegistry, join_timeout: float = 30.0, scheduler: PhaseScheduler | None = None):
+        self.registry = registry
+        self.join_timeout = join_timeout
+        self.scheduler = scheduler if scheduler is not None else default_scheduler()
+        self._lock = threading.Lock()
+        self._buckets = {}  # Dict[BucketKey, _Bucket]
+        self._tickets = {}  # Dict[str, Ticket]: username2ticket of waiting players
+        self._seq = itertools.count()
+
+    def enqueue(self, username: str, game_rules: mafia_pb2.GameRules, subscription: Subscription | AsyncSubscription | None = None) -> Ticket:
+        validate_game_rules(game_rules)
+        bucket_key = (game_rules.ActivePlayersNumber, game_rules.MafiaNumber, game_rules.SheriffNumber, game_rules.TieBreak)
+        ticket = Ticket(username, bucket_key, subscription or Subscription())
+        with self._lock:
+            if username in self._tickets:
+                raise RuntimeError('User is already waiting in the lobby')
+            ticket.seq = next(self._seq)
+            bucket = self._buckets.setdefault(bucket_key, _Bucket())
+            bucket.push(ticket)
+            self._tickets[username] = ticket
+            ticket.players_waiting = bucket.size
+            matched = self._take(bucket, game_rules.ActivePlayersNumber)
+        if len(matched) > 0:
+            self._form_room(matched, game_rules)
+        return ticket
+
+    def leave(self, ticket: Ticket):
+        with self._lock:
+            ticket.left = True
+            room_id = ticket.room_id
+            if self._tickets.get(ticket.username) is ticket:
+                del self._tickets[ticket.username]
+                bucket = self._buckets[ticket.bucket_key]
+                bucket.discard(self._is_waiting)
+                if bucket.size == 0:
+                    del self._buckets[ticket.bucket_key]
+        if room_id is not None:
+            self._unsubscribe(room_id, ticket)
+
+    def match_update(self, ticket: Ticket) -> mafia_pb2.MatchUpdate:
+        room_id = ticket.room_id
+        if room_id is None:
+            return mafia_pb2.MatchUpdate(PlayersWaiting=ticket.players_waiting)
+        return mafia_pb2.MatchUpdate(RoomId=mafia_pb2.Room.RoomId(Value=room_id))
+
+    def is_seated(self, ticket: Ticket) -> bool:
+        # room formed for the ticket is full, so the game has started
+        room_id = ticket.room_id
+        if room_id is None:
+            return False
+        try:
+            return not self.registry.get_room(room_id).is_waiting_for_players
+        except UnknownRoom:
+            return True
+
+    def waiting(self) -> Dict[BucketKey, int]:
+        with self._lock:
+            return {bucket_key: bucket.size for bucket_key, bucket in self._buckets.items()}
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def _is_waiting(self, ticket: Ticket) -> bool:
+        return self._tickets.get(ticket.username) is ticket
+
+    def _take(self, bucket: _Bucket, players_number: int) -> List[Ticket]:
+        # called under the lock, oldest tickets leave the bucket to be matched
+        if bucket.size < players_number:
+            return []
+        matched = [bucket.pop(self._is_waiting) for _ in range(players_number)]
+        if bucket.size == 0:
+            del self._buckets[matched[0].bucket_key]
+        for ticket in matched:
+            del self._tickets[ticket.username]
+        return matched
+
+    def _form_room(self, matched: List[Ticket], game_rules: mafia_pb2.GameRules):
+        room = self.registry.create_room(game_rules)
+        room.reserve(ticket.username for ticket in matched)
+        for ticket in matched:
+            room.subscribe_spectator(ticket.subscription)  # players joining the room wake up the ticket
+        with self._lock:
+            for ticket in matched:
+                ticket.room_id = room.id
+            left = [ticket for ticket in matched if ticket.left]  # left before the room was formed
+        for ticket in left:
+            room.unsubscribe_spectator(ticket.subscription)
+        now = time.monotonic()
+        time_to_match = LOBBY_TIME_TO_MATCH.labels(*game_rules_labels(*matched[0].bucket_key))
+        for ticket in matched:
+            time_to_match.observe(now - ticket.enqueued_at)
+        self.scheduler.call_later(self.join_timeout, self._expire, room, matched, name=f'lobby room {room.id}')
+        lobby_logger.info(f'Form room {room.id} for {", ".join(ticket.username for ticket in matched)}')
+        for ticket in matched:
+            ticket.subscription.notify()
+
+    def _expire(self, room, tickets: List[Ticket]):
+        if not room.release_reservation():
+            return  # room is full
+        self.registry.remove_room(room)
+        with self._lock:
+            requeued = [ticket for ticket in tickets if not ticket.left and ticket.username not in self._tickets]
+            for ticket in tickets:
+                ticket.room_id = None
+                if ticket not in requeued:
+                    ticket.left = True  # user is already waiting by another call
+            matched = self._requeue(requeued, room.game_rules.ActivePlayersNumber) if len(requeued) > 0 else []
+        for ticket in tickets:
+            room.unsubscribe_spectator(ticket.subscription)
+        for ticket in tickets:
+            ticket.subscription.notify()
+        lobby_logger.info(f'Release room {room.id} which isn\'t full in {self.join_timeout}s, put back {len(requeued)} players')
+        if len(matched) > 0:
+            self._form_room(matched, room.game_rules)
+
+    def _requeue(self, tickets: List[Ticket], players_number: int) -> List[Ticket]:
+        # tickets keep their seq, so players who wait longer are matched first
+        bucket_key = tickets[0].bucket_key
+        bucket = self._buckets.setdefault(bucket_key, _Bucket())
+        for ticket in tickets:
+            bucket.push(ticket)
+            self._tickets[ticket.username] = ticket
+        for ticket in tickets:
+            ticket.players_waiting = bucket.size
+        return self._take(bucket, players_number)
+
+    def _unsubscribe(self, room_id: str, ticket: Ticket):
+        try:
+            self.registry.get_room(room_id).unsubscribe_spectator(ticket.subscription)
+        except UnknownRoom:
+            pass
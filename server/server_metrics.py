@@ -0,0 +1,441 @@
+import bisect
+import functools
+import grpc
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+from proto import mafia_pb2
+from server.utils.lock_profiler import SORT_KEYS, lock_profiler
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+WAIT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+# NOTE: samples are recorded without locks, increments rely on the GIL and children of
+# labeled metrics are created once, so recording a sample allocates nothing but a float
+class CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    kind = None
+    child_class = None
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._children = {}  # Dict[Tuple[str, ...], child]
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values):
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(label_values)
+                if child is None:
+                    child = self._children[label_values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        return self.child_class()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for label_values, child in list(self._children.items()):
+            lines.extend(self._render_child(label_values, child))
+        return lines
+
+    def _render_child(self, label_values: Tuple[str, ...], child) -> List[str]:
+        return [f'{self.name}{_labels_text(self.label_names, label_values)} {_value_text(child.value)}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+    child_class = CounterChild
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+    child_class = GaugeChild
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def _render_child(self, label_values: Tuple[str, ...], child: HistogramChild) -> List[str]:
+        labels = _labels_text(self.label_names, label_values)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), list(child.counts)):
+            cumulative += count
+            bucket_labels = _labels_text(self.label_names + ('le',), label_values + (_value_text(bound),))
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        lines.append(f'{self.name}_sum{labels} {_value_text(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+# NOTE: value of the metric is computed by the callback at scrape time, it's used
+# for values which are cheaper to read on demand than to maintain (e.g. rooms by status)
+class CallbackMetric(Metric):
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]],
+                 kind='gauge'):
+        super().__init__(name, help, label_names)
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for label_values, value in self.callback():
+            lines.append(f'{self.name}{_labels_text(self.label_names, label_values)} {_value_text(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}  # Dict[str, Metric]: name2metric
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        # metric with the same name is replaced, so services can register their callbacks again
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+RPC_DURATION = REGISTRY.register(Histogram('mafia_rpc_duration_seconds', 'Duration of unary RPC calls', ('method',)))
+OPEN_STREAMS = REGISTRY.register(Gauge('mafia_open_streams', 'Number of open streams', ('method',)))
+STREAM_UPDATES = REGISTRY.register(Counter('mafia_stream_updates_total', 'Number of updates sent to streams', ('method',)))
+STREAM_BYTES = REGISTRY.register(Counter('mafia_stream_bytes_total', 'Number of bytes of updates sent to streams', ('method',)))
+STREAM_UPDATES_PER_STREAM = REGISTRY.register(Histogram(
+    'mafia_stream_updates_per_stream', 'Number of updates sent to one stream', ('method',), buckets=COUNT_BUCKETS))
+STREAM_BYTES_PER_STREAM = REGISTRY.register(Histogram(
+    'mafia_stream_bytes_per_stream', 'Number of bytes sent to one stream', ('method',), buckets=BYTES_BUCKETS))
+ROOM_VIEW_DURATION = REGISTRY.register(Histogram('mafia_room_view_duration_seconds', 'Duration of building a view of the room', ('viewer',)))
+GAME_RULES_LABELS = ('players', 'mafia', 'sheriffs', 'tie_break')
+LOBBY_TIME_TO_MATCH = REGISTRY.register(Histogram(
+    'mafia_lobby_time_to_match_seconds', 'Time players wait in the lobby until a room is formed', GAME_RULES_LABELS, buckets=WAIT_BUCKETS))
+
+
+def game_rules_labels(players: int, mafia: int, sheriffs: int, tie_break: int) -> Tuple[str, str, str, str]:
+    return str(players), str(mafia), str(sheriffs), mafia_pb2.GameRules.VoteTieBreak.Name(tie_break)
+
+
+def observe_duration(histogram_child: HistogramChild):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram_child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# NOTE: rooms are read at scrape time, so there is nothing to maintain on the hot path
+def register_room_metrics(room_registry, registry: MetricsRegistry = REGISTRY):
+    def rooms_by_status():
+        rooms_numbers = dict.fromkeys(mafia_pb2.Room.RoomStatus.values(), 0)
+        for room in room_registry.rooms():
+            rooms_numbers[room.status] += 1
+        return [((mafia_pb2.Room.RoomStatus.Name(status),), number) for status, number in rooms_numbers.items()]
+
+    def event_bus_events():
+        return [((), sum(room.events.memory_events_number for room in room_registry.rooms()))]
+
+    def schedulers():
+        return {id(room.scheduler): room.scheduler for room in room_registry.rooms()}.values()
+
+    def phase_timers():
+        return [((), sum(len(scheduler) for scheduler in schedulers()))]
+
+    def phase_timers_events():
+        fired_number = cancelled_number = 0
+        for scheduler in schedulers():
+            fired_number += scheduler.fired_number
+            cancelled_number += scheduler.cancelled_number
+        return [(('fired',), fired_number), (('cancelled',), cancelled_number)]
+
+    registry.register(CallbackMetric('mafia_rooms', 'Number of active rooms', ('status',), rooms_by_status))
+    registry.register(CallbackMetric('mafia_event_bus_events', 'Number of events kept in memory by event buses', (), event_bus_events))
+    registry.register(CallbackMetric('mafia_phase_timers', 'Number of armed phase timers', (), phase_timers))
+    registry.register(CallbackMetric('mafia_phase_timers_total', 'Number of phase timers by outcome', ('outcome',), phase_timers_events,
+                                     kind='counter'))
+
+
+def register_lobby_metrics(lobby, registry: MetricsRegistry = REGISTRY):
+    def players_waiting():
+        return [(game_rules_labels(*bucket_key), number) for bucket_key, number in lobby.waiting().items()]
+
+    registry.register(CallbackMetric('mafia_lobby_players_waiting', 'Number of players waiting in the lobby', GAME_RULES_LABELS, players_waiting))
+
+
+def register_log_metrics(log_pipeline, registry: MetricsRegistry = REGISTRY):
+    def records_dropped():
+        return [((logger,), number) for logger, number in log_pipeline.stats()['dropped'].items()]
+
+    def records_sampled_out():
+        return [((logger,), number) for logger, number in log_pipeline.stats()['sampled_out'].items()]
+
+    def records_queued():
+        return [((), log_pipeline.stats()['queued'])]
+
+    registry.register(CallbackMetric('mafia_log_records_dropped_total', 'Number of log records dropped because the writer fell behind', ('logger',),
+                                     records_dropped, kind='counter'))
+    registry.register(CallbackMetric('mafia_log_records_sampled_out_total', 'Number of log records discarded by sampling', ('logger',),
+                                     records_sampled_out, kind='counter'))
+    registry.register(CallbackMetric('mafia_log_records_queued', 'Number of log records waiting for the writer', (), records_queued))
+
+
+class _StreamStats:
+    __slots__ = ('updates', 'bytes')
+
+    def __init__(self):
+        self.updates = 0
+        self.bytes = 0
+
+
+# NOTE: wrapped unary handlers are cached per method; stream handlers are wrapped per
+# call since every stream counts its own updates, bytes are counted by the serializer
+class MetricsInterceptor(grpc.ServerInterceptor):
+    def __init__(self):
+        self._unary_handlers = {}  # Dict[str, Tuple[handler, handler]]: method2(original, wrapped)
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rpartition('/')[2]
+        if handler.unary_unary is not None:
+            return _cached_handler(self._unary_handlers, method, handler, _timed_unary_handler)
+        if handler.unary_stream is not None or handler.stream_stream is not None:
+            return _counted_stream_handler(method, handler)
+        return handler
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self):
+        self._unary_handlers = {}  # Dict[str, Tuple[handler, handler]]: method2(original, wrapped)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rpartition('/')[2]
+        if handler.unary_unary is not None:
+            return _cached_handler(self._unary_handlers, method, handler, _async_timed_unary_handler)
+        if handler.unary_stream is not None or handler.stream_stream is not None:
+            return _async_counted_stream_handler(method, handler)
+        return handler
+
+
+def _cached_handler(cache, method, handler, wrap):
+    cached = cache.get(method)
+    if cached is None or cached[0] is not handler:
+        cached = cache[method] = (handler, wrap(method, handler))
+    return cached[1]
+
+
+def _timed_unary_handler(method, handler):
+    behavior = handler.unary_unary
+    duration = RPC_DURATION.labels(method)
+
+    def timed_behavior(request, context):
+        start = time.perf_counter()
+        try:
+            return behavior(request, context)
+        finally:
+            duration.observe(time.perf_counter() - start)
+    return handler._replace(unary_unary=timed_behavior)
+
+
+def _async_timed_unary_handler(method, handler):
+    behavior = handler.unary_unary
+    duration = RPC_DURATION.labels(method)
+
+    async def timed_behavior(request, context):
+        start = time.perf_counter()
+        try:
+            return await behavior(request, context)
+        finally:
+            duration.observe(time.perf_counter() - start)
+    return handler._replace(unary_unary=timed_behavior)
+
+
+def _counting_serializer(method, serializer, stats: _StreamStats):
+    updates_total = STREAM_UPDATES.labels(method)
+    bytes_total = STREAM_BYTES.labels(method)
+
+    def serialize(response):
+        data = response if serializer is None else serializer(response)  # pre-serialized streams yield bytes
+        stats.updates += 1
+        stats.bytes += len(data)
+        updates_total.inc()
+        bytes_total.inc(len(data))
+        return data
+    return serialize
+
+
+def _stream_opened(method):
+    OPEN_STREAMS.labels(method).inc()
+
+
+def _stream_closed(method, stats: _StreamStats):
+    OPEN_STREAMS.labels(method).dec()
+    STREAM_UPDATES_PER_STREAM.labels(method).observe(stats.updates)
+    STREAM_BYTES_PER_STREAM.labels(method).observe(stats.bytes)
+
+
+def _counted_stream_handler(method, handler):
+    behavior_field = 'unary_stream' if handler.unary_stream is not None else 'stream_stream'
+    behavior = getattr(handler, behavior_field)
+    stats = _StreamStats()
+
+    def counted_behavior(request_or_iterator, context):
+        _stream_opened(method)
+        try:
+            yield from behavior(request_or_iterator, context)
+        finally:
+            _stream_closed(method, stats)
+    return handler._replace(**{behavior_field: counted_behavior}, response_serializer=_counting_serializer(method, handler.response_serializer, stats))
+
+
+def _async_counted_stream_handler(method, handler):
+    behavior_field = 'unary_stream' if handler.unary_stream is not None else 'stream_stream'
+    behavior = getattr(handler, behavior_field)
+    stats = _StreamStats()
+
+    async def counted_behavior(request_or_iterator, context):
+        _stream_opened(method)
+        try:
+            async for response in behavior(request_or_iterator, context):
+                yield response
+        finally:
+            _stream_closed(method, stats)
+    return handler._replace(**{behavior_field: counted_behavior}, response_serializer=_counting_serializer(method, handler.response_serializer, stats))
+
+
+class MetricsHTTPServer:
+    def __init__(self, host: str, port: int, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), _make_handler(registry))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _make_handler(registry: MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/metrics':
+                self._reply(registry.render(), 'text/plain; version=0.0.4; charset=utf-8')
+            elif url.path == '/debug/locks':
+                # e.g. /debug/locks?sort=wait_total_s, stats are empty unless lock profiling is enabled
+                sort_by = parse_qs(url.query).get('sort', ['hold_total_s'])[0]
+                if sort_by not in SORT_KEYS:
+                    self.send_error(400, f'Unknown sort key, expected one of {", ".join(SORT_KEYS)}')
+                    return
+                self._reply(lock_profiler.dump_json(sort_by), 'application/json')
+            else:
+                self.send_error(404)
+
+        def _reply(self, text: str, content_type: str):
+            body = text.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes aren't logged
+    return MetricsHandler
+
+
+def _labels_text(label_names: Tuple[str, ...], label_values: Tuple[str, ...]) -> str:
+    if len(label_names) == 0:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(str(value))}"' for name, value in zip(label_names, label_values))
+    return '{' + pairs + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _value_text(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(value)
@@ -0,0 +1,93 @@
+import asyncio
+import queue
+from typing import Iterator, AsyncIterator, List
+from proto import mafia_pb2
+from server.server_updates import AsyncSubscription, Subscription
+
+
+MAX_PENDING_ACTIONS = 256  # reading of the stream waits when so many actions aren't applied yet
+MAX_ACTIONS_BATCH = 64  # actions applied under one acquisition of the room lock
+
+
+def connect_request(request: mafia_pb2.PlayRequest | None) -> mafia_pb2.ConnectRequest:
+    if request is None or request.WhichOneof('Request') != 'Connect':
+        raise ValueError('The first request of Play must be Connect')
+    return request.Connect
+
+
+# NOTE: actions are read from the stream by a separate thread (task) and applied by
+# the thread (task) which writes updates to the stream: it's woken up by the subscription
+# of the player, so actions and room changes are handled by one loop
+class ActionQueue:
+    def __init__(self, subscription: Subscription, max_pending=MAX_PENDING_ACTIONS):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._subscription = subscription
+        self._closed = False
+        self.error = None  # set if client breaks the protocol
+
+    def read(self, request_iterator: Iterator[mafia_pb2.PlayRequest]):
+        try:
+            for request in request_iterator:
+                if request.WhichOneof('Request') != 'Action':
+                    raise ValueError('Only actions can follow Connect in Play')
+                self._queue.put(request.Action)
+                if self._closed:
+                    return
+                self._subscription.notify()
+        except ValueError as error:
+            self.error = error
+        except Exception:
+            pass  # stream is broken, the writer stops once the subscription is cancelled
+        finally:
+            self._subscription.cancel()  # client has finished the stream
+
+    def take(self, max_batch=MAX_ACTIONS_BATCH) -> List[mafia_pb2.PlayAction]:
+        actions = []
+        while len(actions) < max_batch:
+            try:
+                actions.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return actions
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    def close(self):
+        # NOTE: queue is emptied, so the reader waiting for a free place stops
+        self._closed = True
+        while not self.empty():
+            self.take()
+
+
+class AsyncActionQueue:
+    def __init__(self, subscription: AsyncSubscription, max_pending=MAX_PENDING_ACTIONS):
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._subscription = subscription
+        self.error = None  # set if client breaks the protocol
+
+    async def read(self, request_iterator: AsyncIterator[mafia_pb2.PlayRequest]):
+        try:
+            async for request in request_iterator:
+                if request.WhichOneof('Request') != 'Action':
+                    raise ValueError('Only actions can follow Connect in Play')
+                await self._queue.put(request.Action)
+                self._subscription.notify()
+        except ValueError as error:
+            self.error = error
+        except Exception:
+            pass  # stream is broken, the writer stops once the subscription is cancelled
+        finally:
+            self._subscription.cancel()  # client has finished the stream
+
+    def take(self, max_batch=MAX_ACTIONS_BATCH) -> List[mafia_pb2.PlayAction]:
+        actions = []
+        while len(actions) < max_batch:
+            try:
+                actions.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return actions
+
+    def empty(self) -> bool:
+        return self._queue.empty()
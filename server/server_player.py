@@ -1,93 +1,116 @@
-import logging
-from typing import Iterable
+from typing import Iterable, Iterator
 from proto import mafia_pb2
 
 
+PR_UNKNOWN = mafia_pb2.Player.PlayerRole.PR_UNKNOWN
+PR_CIVILIAN = mafia_pb2.Player.PlayerRole.PR_CIVILIAN
+PR_MAFIA = mafia_pb2.Player.PlayerRole.PR_MAFIA
+PR_SHERIFF = mafia_pb2.Player.PlayerRole.PR_SHERIFF
+PS_UNKNOWN = mafia_pb2.Player.PlayerStatus.PS_UNKNOWN
+PS_ALIVE = mafia_pb2.Player.PlayerStatus.PS_ALIVE
+PS_DEAD = mafia_pb2.Player.PlayerStatus.PS_DEAD
+TEAM_ROLES = (PR_MAFIA, PR_SHERIFF)  # players of these roles know each other
+
+
+# NOTE: every player of a room has its own seat, knowledge about other players is
+# a bitmask of their seats, so checking and exposing are bit operations
 class Player:
-    def __init__(self, username, color=None):
+    __slots__ = ('_username', 'role', 'status', 'color', 'exposed', 'seat', 'seat_mask', 'known_mask')
+
+    def __init__(self, username, color=None, seat=0):
         self._username = username
-        self.role = mafia_pb2.Player.PlayerRole.PR_UNKNOWN
-        self.status = mafia_pb2.Player.PlayerStatus.PS_UNKNOWN
+        self.role = PR_UNKNOWN
+        self.status = PS_UNKNOWN
         self.color = color
         self.exposed = False
-        self._known_players = {username}
+        self.seat = seat
+        self.seat_mask = 1 << seat
+        self.known_mask = self.seat_mask
 
     @property
     def is_civilian(self):
-        return self.role == mafia_pb2.Player.PlayerRole.PR_CIVILIAN
+        return self.role == PR_CIVILIAN
 
     @property
     def is_mafia(self):
-        return self.role == mafia_pb2.Player.PlayerRole.PR_MAFIA
+        return self.role == PR_MAFIA
 
     @property
     def is_sheriff(self):
-        return self.role == mafia_pb2.Player.PlayerRole.PR_SHERIFF
+        return self.role == PR_SHERIFF
 
     @property
     def is_alive(self):
-        return self.status == mafia_pb2.Player.PlayerStatus.PS_ALIVE
+        return self.status == PS_ALIVE
 
     @property
     def is_dead(self):
-        return self.status == mafia_pb2.Player.PlayerStatus.PS_DEAD
+        return self.status == PS_DEAD
 
     def set_civilian(self):
-        self.role = mafia_pb2.Player.PlayerRole.PR_CIVILIAN
-        self.status = mafia_pb2.Player.PlayerStatus.PS_ALIVE
+        self.role = PR_CIVILIAN
+        self.status = PS_ALIVE
 
     def set_mafia(self):
-        self.role = mafia_pb2.Player.PlayerRole.PR_MAFIA
-        self.status = mafia_pb2.Player.PlayerStatus.PS_ALIVE
+        self.role = PR_MAFIA
+        self.status = PS_ALIVE
 
     def set_sheriff(self):
-        self.role = mafia_pb2.Player.PlayerRole.PR_SHERIFF
-        self.status = mafia_pb2.Player.PlayerStatus.PS_ALIVE
+        self.role = PR_SHERIFF
+        self.status = PS_ALIVE
 
     def add_to_known(self, other: 'Player'):
-        self._known_players.add(other.username)
+        self.known_mask |= other.seat_mask
 
     def kill(self):
-        logging.info(f'Kill {self.username}')
-        self.status = mafia_pb2.Player.PlayerStatus.PS_DEAD
+        self.status = PS_DEAD
 
     def expose_to(self, other_players: Iterable['Player']):
+        seat_mask = self.seat_mask
         for other_player in other_players:
-            other_player.add_to_known(self)
+            other_player.known_mask |= seat_mask
 
     def publicly_expose_to(self, other_players: Iterable['Player']):
         self.exposed = True
-        for other_player in other_players:
-            other_player.add_to_known(self)
+        self.expose_to(other_players)
 
     def know_about(self, other: 'Player'):
-        if self.is_dead:
-            return True
-        if other.is_dead:
-            return True
-        if self.is_mafia and other.is_mafia:
-            return True
-        if self.is_sheriff and other.is_sheriff:
-            return True
-        return other.username in self._known_players
+        return (self.known_mask & other.seat_mask) != 0 or self.know_about_by_role(other)
+
+    def know_about_by_role(self, other: 'Player'):
+        return self.status == PS_DEAD or other.status == PS_DEAD or (self.role == other.role and self.role in TEAM_ROLES)
+
+    @property
+    def visibility_class(self):
+        # players of the same visibility class know the same about others by their roles
+        if self.status == PS_DEAD:
+            return PS_DEAD, None
+        return PS_ALIVE, self.role
+
+    def known_seats(self) -> Iterator[int]:
+        mask = self.known_mask
+        while mask:
+            lowest_bit = mask & -mask
+            yield lowest_bit.bit_length() - 1
+            mask ^= lowest_bit
 
     def view(self, other: 'Player'):
-        if other.know_about(self):
-            return mafia_pb2.Player(
-                Username=self.username,
-                Role=self.role,
-                Status=self.status,
-                Color=self.color,
-                Exposed=self.exposed,
-            )
-        else:
-            return mafia_pb2.Player(
-                Username=self.username,
-                Role=mafia_pb2.Player.PlayerRole.PR_UNKNOWN,
-                Status=self.status,
-                Color=self.color,
-                Exposed=self.exposed,
-            )
+        return self._view(known=other.know_about(self))
+
+    def role_view(self, other: 'Player'):
+        return self._view(known=other.know_about_by_role(self))
+
+    def public_view(self, is_game_finished: bool):
+        return self._view(known=self.exposed or is_game_finished)
+
+    def _view(self, known: bool):
+        return mafia_pb2.Player(
+            Username=self.username,
+            Role=self.role if known else PR_UNKNOWN,
+            Status=self.status,
+            Color=self.color,
+            Exposed=self.exposed,
+        )
 
     @property
     def username(self):
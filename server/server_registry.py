@@ -0,0 +1,178 @@
+import grpc
+import logging
+import secrets
+import threading
+from typing import Callable, List
+from proto import mafia_pb2
+from server.server_event_log import EventLogSettings
+from server.server_journal import OP_CREATE_ROOM, OP_REMOVE_ROOM, Journal, JournalRecord
+from server.server_engine import PLAYER_COLORS
+from server.server_room import JOURNALED_METHODS, Room
+from server.server_scheduler import PhaseScheduler, default_scheduler
+
+
+class UnknownRoom(Exception):
+    status_code = grpc.StatusCode.NOT_FOUND  # router looks for the room on the previous owner
+
+
+class RoomRegistry:
+    def __init__(self, default_game_rules: mafia_pb2.GameRules | None, room_id_bytes=4, event_log_settings: EventLogSettings = EventLogSettings(),
+                 journal: Journal | None = None, owns_room_id: Callable[[str], bool] | None = None, idle_timeout: float = 300.0,
+                 scheduler: PhaseScheduler | None = None):
+        self._lock = threading.Lock()
+        self._rooms = {}  # Dict[str, Room]: room_id2room
+        self._idle_timers = {}  # Dict[str, TimerHandle]: room_id2timer of rooms without streams
+        self.idle_timeout = idle_timeout
+        self.scheduler = scheduler if scheduler is not None else default_scheduler()
+        self._room_id_bytes = room_id_bytes
+        self._owns_room_id = owns_room_id  # ids of new rooms are chosen so that requests to them are routed to this registry
+        self._event_log_settings = event_log_settings
+        self.default_room = None
+        self.journal = journal
+        if journal is not None:
+            self._recover(journal.records())
+        if self.default_room is None and default_game_rules is not None:
+            self.default_room = self.create_room(default_game_rules, is_default=True)
+
+    def create_room(self, game_rules: mafia_pb2.GameRules, is_default=False, room_id: str | None = None) -> Room:
+        validate_game_rules(game_rules)
+        with self._lock:
+            if room_id is None:
+                room_id = self._new_room_id()
+            elif room_id in self._rooms:
+                raise ValueError(f'Room {room_id} already exists')
+            room = Room(game_rules, room_id=room_id, event_log_settings=self._event_log_settings, journal=self.journal)
+            if self.journal is not None:
+                self.journal.append(OP_CREATE_ROOM, room_id, room.seed, game_rules.SerializeToString(), int(is_default))
+            self._rooms[room_id] = room
+            if not is_default:
+                self._arm_idle_timer(room)  # room which nobody joins is removed as well
+        logging.info(f'Create room {room_id}')
+        return room
+
+    def get_room(self, room_id: str) -> Room:
+        if room_id == '' and self.default_room is not None:
+            return self.default_room
+        room = self._rooms.get(room_id)
+        if room is None:
+            raise UnknownRoom(f'Room {room_id} doesn\'t exist')
+        return room
+
+    # NOTE: called when a stream of the room finishes: finished room is removed with its last stream,
+    # room which is left by everyone in the middle of the game is removed if nobody comes back in idle_timeout
+    def release_room(self, room: Room):
+        if room is self.default_room:
+            return
+        with self._lock:
+            if room.updates.has_subscriptions() or self._rooms.get(room.id) is not room:
+                return
+            if not room.is_finished:
+                self._arm_idle_timer(room)
+                return
+            self._pop_room(room)
+        room.close()
+        logging.info(f'Remove room {room.id}')
+
+    def remove_room(self, room: Room):
+        with self._lock:
+            if not self._pop_room(room):
+                return
+        room.close()
+        logging.info(f'Remove room {room.id}')
+
+    def rooms(self) -> List[Room]:
+        with self._lock:
+            return list(self._rooms.values())
+
+    def list_rooms(self, status=None) -> mafia_pb2.RoomList:
+        infos = [room.info() for room in self.rooms()]
+        if status is not None:
+            infos = [info for info in infos if info.Status == status]
+        return mafia_pb2.RoomList(Rooms=infos)
+
+    def __len__(self):
+        return len(self._rooms)
+
+    # NOTE: rooms are replayed without journal so recovery doesn't write the journal again,
+    # timers are armed only after the whole journal is replayed
+    def _recover(self, records: List[JournalRecord]):
+        rooms = {}
+        default_room_id = None
+        for record in records:
+            room_id = record.fields[0].decode('utf-8')
+            if record.op == OP_CREATE_ROOM:
+                game_rules = mafia_pb2.GameRules.FromString(record.fields[2])
+                rooms[room_id] = Room(game_rules, room_id=room_id, event_log_settings=self._event_log_settings, seed=int(record.fields[1]))
+                if int(record.fields[3]):
+                    default_room_id = room_id
+            elif record.op == OP_REMOVE_ROOM:
+                room = rooms.pop(room_id, None)
+                if room is None:
+                    # journal was truncated or the room was owned by another worker before a restart
+                    logging.warning(f'Skip removal of unknown room {room_id} in journal')
+                    continue
+                room.close()
+            elif record.op in JOURNALED_METHODS and room_id in rooms:
+                rooms[room_id].replay(record)
+        for room in rooms.values():
+            room.journal = self.journal
+            room.rearm_phase_timer()
+            if room.is_waiting_for_players:
+                # streams of waiting players didn't survive the restart, so they have to connect again
+                for username in list(room.players):
+                    room.remove_player(username)
+        self._rooms.update(rooms)
+        self.default_room = rooms.get(default_room_id)
+        if len(records) > 0:
+            logging.info(f'Recover {len(rooms)} rooms from {len(records)} journal records')
+        # streams didn't survive the restart, so rooms are released as if their last stream has finished
+        for room in rooms.values():
+            self.release_room(room)
+
+    def _pop_room(self, room: Room) -> bool:
+        if self._rooms.get(room.id) is not room:
+            return False
+        del self._rooms[room.id]
+        idle_timer = self._idle_timers.pop(room.id, None)
+        if idle_timer is not None:
+            idle_timer.cancel()
+        if self.journal is not None:
+            self.journal.append(OP_REMOVE_ROOM, room.id)
+        return True
+
+    def _arm_idle_timer(self, room: Room):
+        # timer is moved, so the room is kept for idle_timeout after its last stream has finished
+        idle_timer = self._idle_timers.pop(room.id, None)
+        if idle_timer is not None:
+            idle_timer.cancel()
+        self._idle_timers[room.id] = self.scheduler.call_later(self.idle_timeout, self._expire_idle, room, name=f'idle room {room.id}')
+
+    def _expire_idle(self, room: Room):
+        with self._lock:
+            if self._rooms.get(room.id) is not room:
+                return
+            self._idle_timers.pop(room.id, None)
+            if room.updates.has_subscriptions():
+                return  # timer is armed again when the last stream finishes
+            self._pop_room(room)
+        room.close()
+        logging.info(f'Remove room {room.id} idle for {self.idle_timeout}s')
+
+    def _new_room_id(self) -> str:
+        while True:
+            room_id = secrets.token_hex(self._room_id_bytes)
+            if room_id not in self._rooms and (self._owns_room_id is None or self._owns_room_id(room_id)):
+                return room_id
+
+
+def validate_game_rules(game_rules: mafia_pb2.GameRules):
+    if game_rules.MafiaNumber < 1:
+        raise ValueError('There must be at least one mafia')
+    if game_rules.SheriffNumber < 0:
+        raise ValueError('Number of sheriffs can\'t be negative')
+    if game_rules.MafiaNumber + game_rules.SheriffNumber > game_rules.ActivePlayersNumber:
+        raise ValueError('Not enough players for all roles')
+    if game_rules.TieBreak not in mafia_pb2.GameRules.VoteTieBreak.values():
+        raise ValueError(f'Unknown vote tie break {game_rules.TieBreak}')
+    if game_rules.ActivePlayersNumber > len(PLAYER_COLORS):
+        raise ValueError(f'Too many players, at most {len(PLAYER_COLORS)} are supported')
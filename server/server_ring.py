@@ -0,0 +1,147 @@
+import asyncio
+import bisect
+import grpc
+import hashlib
+import logging
+from typing import Dict, List, NamedTuple
+from google.protobuf import empty_pb2
+from proto import mafia_pb2_grpc
+
+
+router_logger = logging.getLogger('mafia.router')
+
+VIRTUAL_NODES = 128
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# NOTE: every node is placed on the ring at many points (virtual nodes) and a key is owned
+# by the node of the first point clockwise from the hash of the key; a new node takes over
+# only the keys which fall before its points, so about 1/N of keys change their owner,
+# and the previous owner of such a key is the next node clockwise
+class HashRing:
+    def __init__(self, nodes: List[str] = (), virtual_nodes=VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self._nodes = set()
+        self._hashes = []  # sorted hashes of points
+        self._points = []  # nodes of points in the same order
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.virtual_nodes):
+            point_hash = ring_hash(f'{node}#{replica}')
+            ind = bisect.bisect(self._hashes, point_hash)
+            self._hashes.insert(ind, point_hash)
+            self._points.insert(ind, node)
+
+    def remove(self, node: str):
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        points = [(point_hash, point) for point_hash, point in zip(self._hashes, self._points) if point != node]
+        self._hashes = [point_hash for point_hash, _ in points]
+        self._points = [point for _, point in points]
+
+    def owner(self, key: str) -> str | None:
+        if len(self._hashes) == 0:
+            return None
+        return self._points[bisect.bisect(self._hashes, ring_hash(key)) % len(self._points)]
+
+    def preference(self, key: str, nodes_number: int) -> List[str]:
+        # owner of the key first, then the next distinct nodes clockwise
+        nodes = []
+        if len(self._hashes) == 0:
+            return nodes
+        start = bisect.bisect(self._hashes, ring_hash(key))
+        for ind in range(len(self._points)):
+            node = self._points[(start + ind) % len(self._points)]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == nodes_number:
+                    break
+        return nodes
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __contains__(self, node: str):
+        return node in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class HealthCheckSettings(NamedTuple):
+    interval: float = 1.0
+    timeout: float = 0.5
+    unhealthy_threshold: int = 3  # failed checks in a row after which node is removed from the ring
+
+
+class Node:
+    def __init__(self, address: str, settings: HealthCheckSettings = HealthCheckSettings()):
+        self.address = address
+        # NOTE: reconnection backoff is capped, so a node started later is noticed by the next checks
+        backoff_ms = int(settings.interval * 1000)
+        self.channel = grpc.aio.insecure_channel(address, options=[
+            ('grpc.initial_reconnect_backoff_ms', backoff_ms),
+            ('grpc.min_reconnect_backoff_ms', backoff_ms),
+            ('grpc.max_reconnect_backoff_ms', backoff_ms),
+        ])
+        self.stub = mafia_pb2_grpc.CoordinatorStub(self.channel)
+        self.healthy = False
+        self.failed_checks = 0
+
+
+# NOTE: only healthy nodes are on the ring, so a node which is started later (or comes back)
+# joins the ring on its first successful check, and a failed node leaves it after
+# unhealthy_threshold failed checks
+class NodeMembership:
+    def __init__(self, addresses: List[str], ring: HashRing, settings: HealthCheckSettings = HealthCheckSettings()):
+        self.nodes = {address: Node(address, settings) for address in addresses}  # Dict[str, Node]: address2node
+        self.ring = ring
+        self.settings = settings
+
+    async def check(self):
+        results = await asyncio.gather(*(self._ping(node) for node in self.nodes.values()))
+        for node, healthy in zip(self.nodes.values(), results):
+            if healthy:
+                node.failed_checks = 0
+                if not node.healthy:
+                    node.healthy = True
+                    self.ring.add(node.address)
+                    router_logger.info(f'Node {node.address} joins the ring of {len(self.ring)} nodes')
+                continue
+            node.failed_checks += 1
+            if node.healthy and node.failed_checks >= self.settings.unhealthy_threshold:
+                node.healthy = False
+                self.ring.remove(node.address)
+                router_logger.warning(f'Node {node.address} leaves the ring after {node.failed_checks} failed health checks')
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.settings.interval)
+            await self.check()
+
+    def healthy_nodes(self) -> List[Node]:
+        return [node for node in self.nodes.values() if node.healthy]
+
+    def status(self) -> Dict[str, bool]:
+        return {address: node.healthy for address, node in self.nodes.items()}
+
+    async def close(self):
+        for node in self.nodes.values():
+            await node.channel.close()
+
+    async def _ping(self, node: Node) -> bool:
+        try:
+            await node.stub.Ping(empty_pb2.Empty(), timeout=self.settings.timeout)
+        except grpc.aio.AioRpcError:
+            return False
+        return True
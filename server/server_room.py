@@ -1,358 +1,416 @@
-import functools
 import logging
 import random
 import threading
-from typing import Callable
-from collections import defaultdict
+from typing import Iterable, List
 from proto import mafia_pb2
-from server.server_player import Player
-from server.server_vote import Voting
-from server.server_events import EventBus
+from server.server_engine import GameEngine, UnknownUser, player_in_room, player_not_in_room
+from server.server_event_log import EventLogSettings
+from server.server_events import Audience, EventBus, audience_usernames
+from server.server_journal import (
+    OP_ADD_PLAYER,
+    OP_BEGIN_VOTE,
+    OP_EXPOSE,
+    OP_MAFIA_VOTE,
+    OP_PHASE_TIMEOUT,
+    OP_REMOVE_PLAYER,
+    OP_SEND_MESSAGE,
+    OP_SHERIFF_VOTE,
+    OP_VOTE,
+    Journal,
+    JournalRecord,
+)
+from server.server_metrics import ROOM_VIEW_DURATION, observe_duration
+from server.server_scheduler import PhaseScheduler, default_scheduler
+from server.server_updates import SPECTATORS, AsyncSubscription, RoomUpdates, Subscription
 from server.utils.lock import with_RW_lock, read_lock, write_lock
 from server.utils.logging import logging_on_call
 
 
-class UnknownUser(Exception):
-    pass
-
-
-def access(condition: Callable, raise_=None):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(self, *args, **kwargs):
-            if not condition(self, *args, **kwargs):
-                if raise_ is not None:
-                    raise raise_
-                return None
-            return func(self, *args, **kwargs)
-        return wrapper
-    return decorator
-
-
-is_waiting_for_players = access(lambda self, *args, **kwargs: self.is_waiting_for_players)
-is_chat_phase = access(lambda self, *args, **kwargs: self.is_chat_phase)
-is_vote_phase = access(lambda self, *args, **kwargs: self.is_vote_phase)
-is_night_phase = access(lambda self, *args, **kwargs: self.is_night_phase)
-player_is_alive = access(lambda self, *args, **kwargs: self.players[args[0]].is_alive)
-player_in_room = access(lambda self, *args, **kwargs: self.has_player(args[0]), raise_=UnknownUser('User is not in the room'))
-player_not_in_room = access(lambda self, *args, **kwargs: not self.has_player(args[0]), raise_=RuntimeError('Username is already taken'))
-didnt_begin_vote = access(lambda self, *args, **kwargs: not self.begin_vote_info[args[0]])
-player_is_mafia = access(lambda self, *args, **kwargs: self.players[args[0]].is_mafia)
-player_is_sheriff = access(lambda self, *args, **kwargs: self.players[args[0]].is_sheriff)
-suspect_is_alive = access(lambda self, *args, **kwargs: self.players[args[1]].is_alive)
-exposed_is_alive = access(lambda self, *args, **kwargs: self.players[args[1]].is_alive)
+room_logger = logging.getLogger('mafia.room')
+chat_logger = logging.getLogger('mafia.room.chat')
+vote_logger = logging.getLogger('mafia.room.vote')
 
 
+# NOTE: room is the game engine shared by threads: actions are applied under write lock,
+# accepted ones are journaled and logged, phase deadlines of the engine are followed by
+# timers of the scheduler and every event wakes up subscriptions of its audience
 @with_RW_lock
 class Room:
-    def __init__(self, game_rules: mafia_pb2.GameRules, *args, **kwargs):
-        self._id = str(random.randint(0, 9999)).zfill(4)
-        self.day_number = 0
-        self.game_rules = game_rules
-        self.status = mafia_pb2.Room.RoomStatus.WAITING_FOR_PLAYERS
-        self.players = {}  # Dict[str, Player]: username2player
-        self.begin_vote_info = None  # Dict[str, bool]: username2begin_vote
-        self.voting = None
-        self.mafia_voting = None
-        self.sheriff_voting = None
-        self.chat = None
-        self.events = EventBus()
+    def __init__(self, game_rules: mafia_pb2.GameRules, *args, room_id: str | None = None, event_log_settings: EventLogSettings = EventLogSettings(),
+                 seed: int | None = None, journal: Journal | None = None, scheduler: PhaseScheduler | None = None, **kwargs):
+        self._id = room_id if room_id is not None else str(random.randint(0, 9999)).zfill(4)
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.journal = journal
+        self.scheduler = scheduler if scheduler is not None else default_scheduler()
+        self.spectators = {}  # Dict[str, int]: username2streams_number
+        self.updates = RoomUpdates()
+        self.events = EventBus(on_event=self._notify_audience, log_settings=event_log_settings)
+        self.engine = GameEngine(game_rules, random.Random(self.seed), self._now, self.events, on_action=self._on_action)
         self.phase_timer = None
-        self.exposed = set()
-        self._colors = random.sample(['hot_pink', 'plum1', 'dark_orange', 'pale_turquoise1', 'blue', 'green', 'yellow'], self.game_rules.ActivePlayersNumber)  # https://rich.readthedocs.io/en/stable/appendix/colors.html#appendix-colors
+        self._phase_timer_number = None  # phase the timer is armed for
+        self._replay_time = None
+        self.reserved_usernames = None  # only these players can join if set
+        self._view_cache = {}  # views shared by players of the same visibility class
+        self._view_cache_version = None
+        self._view_cache_lock = threading.Lock()
+        self._spectator_view_lock = threading.Lock()
 
     @write_lock
-    @is_waiting_for_players
-    @player_not_in_room
-    @logging_on_call('Add player: {username}', level=logging.INFO)
     def add_player(self, username):
-        self.players[username] = Player(username, color=self._colors.pop())
-        self.events.user_connected(username, users_connected=len(self.players), total_users=self.game_rules.ActivePlayersNumber)
-        if len(self.players) == self.game_rules.ActivePlayersNumber:
-            self.start_game()
+        if self.reserved_usernames is not None and username not in self.reserved_usernames:
+            raise RuntimeError('Room is reserved for other players')
+        self._apply(self.engine.add_player, username)
 
     @write_lock
-    @player_in_room
-    @logging_on_call('Remove player: {username}', level=logging.INFO)
     def remove_player(self, username):
-        if self.is_waiting_for_players:
-            player = self.players.pop(username)
-            self._colors.append(player.color)
-        self.events.user_disconnected(username, users_connected=len(self.players), total_users=self.game_rules.ActivePlayersNumber)
-
-    @write_lock
-    @logging_on_call('Start game', level=logging.INFO)
-    def start_game(self):
-        self.day_number = 0
-        pool = list(self.players.values())
-        random.shuffle(pool)
-        mafias = []
-        for _ in range(self.game_rules.MafiaNumber):
-            mafias.append(pool.pop())
-        sheriffs = []
-        for _ in range(self.game_rules.SheriffNumber):
-            sheriffs.append(pool.pop())
-        civilians = pool
-
-        for mafia in mafias:
-            mafia.set_mafia()
-        for sheriff in sheriffs:
-            sheriff.set_sheriff()
-        for civilian in civilians:
-            civilian.set_civilian()
-
-        self.events.roles_set(self.players.values())
-        self.begin_new_day()
+        self._apply(self.engine.remove_player, username)
+        if not self.has_player(username):
+            self.updates.touch([username])  # wake up streams of removed player so they can finish
 
     @write_lock
-    @logging_on_call('Begin new day', level=logging.INFO)
-    def begin_new_day(self):
-        self.day_number += 1
-        self.events.day_began(self.day_number)
-        self.start_chat_phase()
+    def reserve(self, usernames: Iterable[str]):
+        self.reserved_usernames = frozenset(usernames)
 
+    # NOTE: room which isn't full is closed for everyone and its players are removed,
+    # so their streams finish; returns False if the game has already started
     @write_lock
-    @logging_on_call('Start chat phase', level=logging.INFO)
-    def start_chat_phase(self):
-        self.chat = mafia_pb2.Chat(Messages=[])
-        self.begin_vote_info = defaultdict(lambda: False)
-        self.status = mafia_pb2.Room.RoomStatus.CHAT_PHASE
-        self.events.chat_phase_began()
-
+    def release_reservation(self) -> bool:
+        if not self.is_waiting_for_players:
+            return False
+        self.reserved_usernames = frozenset()
+        for username in list(self.players):
+            self.remove_player(username)
+        return True
+
+    # NOTE: spectators don't wake anyone up, the list of spectators is
+    # updated in views together with the next change of the room
     @write_lock
-    @logging_on_call('Start vote phase', level=logging.INFO)
-    def start_vote_phase(self):
-        self.begin_vote_info = defaultdict(lambda: False)
-        self.voting = Voting(self.alive_players, self.alive_players)
-        self.status = mafia_pb2.Room.RoomStatus.VOTE_PHASE
-        self.events.vote_phase_began()
-        self.phase_timer = threading.Timer(60.0, self.finish_vote_phase)
-        self.phase_timer.start()
+    @player_not_in_room
+    @logging_on_call('Add spectator: {username}', level=logging.INFO, logger=room_logger)
+    def add_spectator(self, username):
+        self.spectators[username] = self.spectators.get(username, 0) + 1
+        if self.spectators[username] == 1:
+            self.updates.touch([])
 
     @write_lock
-    @logging_on_call('Finish vote phase', level=logging.INFO)
-    def finish_vote_phase(self):
-        username_to_kill = self.voting.get_most_voted_username()
-        self.players[username_to_kill].kill()
-        self.events.player_was_killed(self.players[username_to_kill])
-        if self._has_mafia_win_condition():
-            self.set_mafia_won()
-        elif self._has_mafia_lost_condition():
-            self.set_mafia_lost()
+    @logging_on_call('Remove spectator: {username}', level=logging.INFO, logger=room_logger)
+    def remove_spectator(self, username):
+        streams_number = self.spectators.pop(username, 0) - 1
+        if streams_number > 0:
+            self.spectators[username] = streams_number
         else:
-            self.start_night_phase()
+            self.updates.touch([])
 
     @write_lock
-    @logging_on_call('Start night phase', level=logging.INFO)
-    def start_night_phase(self):
-        self.chat = None
-        self.voting = None
-        self.mafia_voting = Voting(self.mafia_players, self.alive_players)
-        self.sheriff_voting = Voting(self.sheriff_players, self.alive_players)
-        self.status = mafia_pb2.Room.RoomStatus.NIGHT_PHASE
-        self.events.night_phase_began()
-        self.phase_timer = threading.Timer(60.0, self.finish_night_phase)
-        self.phase_timer.start()
-
-    @write_lock
-    @logging_on_call('Finish night phase', level=logging.INFO)
-    def finish_night_phase(self):
-        username_to_kill = self.mafia_voting.get_most_voted_username()
-        self.players[username_to_kill].kill()
-        self.events.player_was_killed(self.players[username_to_kill])
-        username_to_expose = self.sheriff_voting.get_most_voted_username()
-        self.players[username_to_expose].expose_to(self.sheriff_players.values())
-        self.mafia_voting = None
-        self.sheriff_voting = None
-        if self._has_mafia_win_condition():
-            self.set_mafia_won()
-        elif self._has_mafia_lost_condition():
-            self.set_mafia_lost()
-        else:
-            self.begin_new_day()
+    def on_phase_timeout(self, phase_number):
+        if phase_number == self._phase_timer_number:
+            self.phase_timer = None  # fired
+        self._apply(self.engine.on_phase_timeout, phase_number)
 
     @write_lock
-    @player_in_room
-    @player_is_alive
-    @logging_on_call('Send message by {username}: {text}', level=logging.INFO)
     def send_message(self, username, text):
-        if self.is_chat_phase:
-            self.chat.Messages.append(mafia_pb2.Chat.Message(
-                AuthorUsername = username,
-                Text = text,
-            ))
-            self.events.global_message_appeared(username, text)
-        elif self.is_night_phase:
-            player = self.players[username]
-            if player.is_mafia:
-                self.events.mafia_message_appeared(username, text)
-            elif player.is_sheriff:
-                self.events.sheriff_message_appeared(username, text)
-
+        self._apply(self.engine.send_message, username, text)
 
     @write_lock
-    @is_chat_phase
-    @player_in_room
-    @player_is_alive
-    @didnt_begin_vote
-    @logging_on_call('Begin vote by {username}', level=logging.INFO)
     def begin_vote(self, username):
-        self.begin_vote_info[username] = True
-        begin_vote_cnt = self._begin_vote_count()
-        alive_players_cnt = self._alive_players_count()
-        self.events.player_wants_begin_vote(username, begin_vote_cnt, alive_players_cnt, self.day_number)
-        if begin_vote_cnt == alive_players_cnt:
-            if self.day_number == 1:
-                self.start_night_phase()
-            else:
-                self.start_vote_phase()
+        self._apply(self.engine.begin_vote, username)
 
     @write_lock
-    @is_vote_phase
-    @player_in_room
-    @player_is_alive
-    @suspect_is_alive
-    @logging_on_call('Vote by {username} to {suspect_username}', level=logging.INFO)
     def vote(self, username, suspect_username):
-        self.voting.vote(username, suspect_username)
-        votes_number = self.voting.get_votes_number(suspect_username)
-        self.events.global_vote_appeared(suspect_username, votes_number)
-        if self.voting.is_everyone_voted():
-            self.phase_timer.cancel()
-            self.phase_timer = None
-            self.finish_vote_phase()
+        self._apply(self.engine.vote, username, suspect_username)
 
     @write_lock
-    @is_night_phase
-    @player_in_room
-    @player_is_alive
-    @player_is_mafia
-    @suspect_is_alive
-    @logging_on_call('Vote by mafia {username} to {suspect_username}', level=logging.INFO)
     def mafia_vote(self, username, suspect_username):
-        self.mafia_voting.vote(username, suspect_username)
-        votes_number = self.mafia_voting.get_votes_number(suspect_username)
-        self.events.mafia_vote_appeared(suspect_username, votes_number)
-        if self.mafia_voting.is_everyone_voted() and self.sheriff_voting.is_everyone_voted():
-            self.phase_timer.cancel()
-            self.phase_timer = None
-            self.finish_night_phase()
+        self._apply(self.engine.mafia_vote, username, suspect_username)
 
     @write_lock
-    @is_night_phase
-    @player_in_room
-    @player_is_alive
-    @player_is_sheriff
-    @suspect_is_alive
-    @logging_on_call('Vote by sheriff {username} to {suspect_username}', level=logging.INFO)
     def sheriff_vote(self, username, suspect_username):
-        self.sheriff_voting.vote(username, suspect_username)
-        votes_number = self.sheriff_voting.get_votes_number(suspect_username)
-        self.events.sheriff_vote_appeared(suspect_username, votes_number)
-        if self.mafia_voting.is_everyone_voted() and self.sheriff_voting.is_everyone_voted():
-            self.phase_timer.cancel()
-            self.phase_timer = None
-            self.finish_night_phase()
+        self._apply(self.engine.sheriff_vote, username, suspect_username)
 
     @write_lock
-    @player_in_room
-    @player_is_alive
-    @player_is_sheriff
-    @exposed_is_alive
-    @logging_on_call('Expose publicly by sheriff {username} to {username_to_expose}', level=logging.INFO)
     def expose(self, username, username_to_expose):
-        if username_to_expose in self.exposed:
-            return
-        self.exposed.add(username_to_expose)
-        self.players[username_to_expose].publicly_expose_to(self.players.values())
-        self.events.player_was_exposed(username_to_expose)
+        self._apply(self.engine.expose, username, username_to_expose)
+
+    @read_lock
+    @observe_duration(ROOM_VIEW_DURATION.labels('player'))
+    def view(self, username: str, events_after: int | None = None) -> mafia_pb2.Room:
+        # view contains last events of the room or all events after given index
+        if not self.has_player(username):
+            raise UnknownUser('User is not in the room')
+        player = self.players[username]
+        room_pb = mafia_pb2.Room()
+        room_pb.CopyFrom(self._visibility_class_view(player))
+        seat_players = self._view_cache['seat_players']
+        for seat in player.known_seats():
+            index, known_player = seat_players[seat]
+            room_pb.Players[index].Role = known_player.role
+        if self.events is not None:
+            if events_after is None:
+                room_pb.EventBus.Events.extend(self.events.player_events(player))
+            else:
+                room_pb.EventBus.Events.extend(self.events.player_events_after(player, events_after))
+        return room_pb
+
+    # NOTE: all spectators share one view, it's serialized once per version and
+    # the same bytes are written to every spectator stream
+    @read_lock
+    @observe_duration(ROOM_VIEW_DURATION.labels('spectator'))
+    def spectator_view(self) -> bytes:
+        with self._spectator_view_lock:
+            with self._view_cache_lock:
+                self._validate_view_cache()
+                payload = self._view_cache.get(SPECTATORS)
+            if payload is None:
+                payload = mafia_pb2.Room(
+                    Id = mafia_pb2.Room.RoomId(Value=self._id),
+                    Status = self.status,
+                    GameRules = self.game_rules,
+                    Players = [player.public_view(self.is_finished) for player in self.players.values()],
+                    Spectators = self._spectators_view(),
+                    Chat = self.chat,
+                    Voting = self.voting.view(None) if self.voting is not None else None,
+                    EventBus = mafia_pb2.EventBus(Events=self.events.public_events()),
+                    DayNumber = self.day_number,
+                    Version = self.version,
+                ).SerializeToString()
+                with self._view_cache_lock:
+                    self._view_cache[SPECTATORS] = payload
+        return payload
+
+    # NOTE: actions sent by one stream are applied under one acquisition of the lock,
+    # the version right after every action is returned so the action can be acknowledged
+    @write_lock
+    @player_in_room
+    def play(self, username, actions: List[mafia_pb2.PlayAction]) -> List[mafia_pb2.ActionAck]:
+        acks = []
+        for action in actions:
+            kind = action.WhichOneof('Kind')
+            error = ''
+            try:
+                if kind is None:
+                    raise ValueError('Action is empty')
+                self._apply(PLAY_ACTIONS[kind], self.engine, username, action)
+            except Exception as e:
+                room_logger.debug(f'Action {kind} by {username} in room {self._id} failed: {e}')
+                error = str(e)
+            acks.append(mafia_pb2.ActionAck(Id=action.Id, Version=self.version, Error=error))
+        return acks
+
+    @read_lock
+    @player_in_room
+    def get_events(self, username: str, after_index: int | None = None, limit: int | None = None) -> mafia_pb2.EventBus:
+        return mafia_pb2.EventBus(
+            Events=self.events.player_events_after(self.players[username], after_index, limit),
+        )
 
     @write_lock
-    def set_mafia_won(self):
-        self.status = mafia_pb2.Room.RoomStatus.MAFIA_WON
-        for player in self.players.values():
-            player.expose_to(self.players.values())
-        self.events.mafia_won()
+    def close(self):
+        self._cancel_phase_timer()
+        self.events.close()
 
     @write_lock
-    def set_mafia_lost(self):
-        self.status = mafia_pb2.Room.RoomStatus.MAFIA_LOST
-        for player in self.players.values():
-            player.expose_to(self.players.values())
-        self.events.mafia_lost()
+    def replay(self, record: JournalRecord):
+        method_name, arg_types = JOURNALED_METHODS[record.op]
+        args = [arg_type(field.decode('utf-8')) for arg_type, field in zip(arg_types, record.fields[1:])]
+        self._replay_time = record.timestamp
+        try:
+            getattr(self, method_name)(*args)
+        except Exception as error:
+            # NOTE: actions which failed after being journaled fail the same way on replay
+            logging.debug(f'Replayed {method_name} in room {self._id} failed: {error}')
+        finally:
+            self._replay_time = None
+
+    # NOTE: deadline of the phase is recovered from the journal, so the phase
+    # lasts as long as it would have without the restart
+    @write_lock
+    def rearm_phase_timer(self):
+        self._sync_phase_timer()
+
+    def _apply(self, method, *args):
+        status = self.engine.status
+        try:
+            return method(*args)
+        finally:
+            if self.engine.status != status:
+                room_logger.info(f'Room {self._id}: {mafia_pb2.Room.RoomStatus.Name(self.engine.status)}, day {self.engine.day_number}')
+            self._sync_phase_timer()
+
+    def _on_action(self, op, *args):
+        if self.journal is not None:
+            self.journal.append(op, self._id, *args)
+        logger, msg = ACTION_LOGS[op]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(msg.format(*args))
+
+    # NOTE: timer follows the phase deadline of the engine, it isn't armed while the journal
+    # is replayed, since the deadline may have already passed
+    def _sync_phase_timer(self):
+        phase_number, phase_deadline = self.engine.phase_number, self.engine.phase_deadline
+        if self.phase_timer is not None and (phase_deadline is None or self._phase_timer_number != phase_number):
+            self._cancel_phase_timer()
+        if phase_deadline is None or self.phase_timer is not None or self._replay_time is not None:
+            return
+        self.phase_timer = self.scheduler.call_later(
+            max(phase_deadline - self.scheduler.time(), 0.0), self.on_phase_timeout, phase_number, name=f'room {self._id} phase {phase_number}')
+        self._phase_timer_number = phase_number
+
+    def _cancel_phase_timer(self):
+        if self.phase_timer is not None:
+            self.phase_timer.cancel()
+            self.phase_timer = None
+        self._phase_timer_number = None
+
+    def _now(self):
+        return self._replay_time if self._replay_time is not None else self.scheduler.time()
+
+    # NOTE: cached views are valid while version stays the same, it's enough since
+    # every mutation publishes an event (bumps version) under write lock and views
+    # are built under read lock
+    def _visibility_class_view(self, player) -> mafia_pb2.Room:
+        visibility_class = player.visibility_class
+        with self._view_cache_lock:
+            self._validate_view_cache()
+            room_pb = self._view_cache.get(visibility_class)
+        if room_pb is None:
+            room_pb = mafia_pb2.Room(
+                Id = mafia_pb2.Room.RoomId(Value=self._id),
+                Status = self.status,
+                GameRules = self.game_rules,
+                Players = [other_player.role_view(player) for other_player in self.players.values()],
+                Spectators = self._spectators_view(),
+                Chat = self.chat,
+                Voting = self.voting.view(player) if self.voting is not None else None,
+                DayNumber = self.day_number,
+                Version = self.version,
+            )
+            with self._view_cache_lock:
+                self._view_cache[visibility_class] = room_pb
+        return room_pb
+
+    def _validate_view_cache(self):
+        if self._view_cache_version != self.version:
+            self._view_cache = {'seat_players': {player.seat: (ind, player) for ind, player in enumerate(self.players.values())}}
+            self._view_cache_version = self.version
+
+    def _spectators_view(self):
+        return [mafia_pb2.Spectator(Username=username) for username in self.spectators]
 
     @read_lock
-    def view(self, username: str) -> mafia_pb2.Room:
-        if not self.has_player(username):
-            raise UnknownUser('User is not in the room')
-        player = self.players[username]
-        return mafia_pb2.Room(
+    def info(self) -> mafia_pb2.RoomList.RoomInfo:
+        return mafia_pb2.RoomList.RoomInfo(
             Id = mafia_pb2.Room.RoomId(Value=self._id),
             Status = self.status,
             GameRules = self.game_rules,
-            Players = [other_player.view(player) for other_player in self.players.values()],
-            Spectators = [],
-            Chat = self.chat,
-            Voting = self.voting.view(player) if self.voting is not None else None,
-            EventBus = self.events.view(player) if self.events is not None else None,
-            DayNumber = self.day_number,
+            PlayersNumber = len(self.players),
         )
 
-    def has_player(self, username):
-        return username in self.players
+    def subscribe(self, username, subscription: Subscription | AsyncSubscription | None = None) -> Subscription | AsyncSubscription:
+        return self.updates.subscribe(username, subscription)
 
-    def _alive_players_count(self):
-        count = 0
-        for player in self.players.values():
-            if player.is_alive:
-                count += 1
-        return count
+    def unsubscribe(self, username, subscription: Subscription | AsyncSubscription):
+        self.updates.unsubscribe(username, subscription)
 
-    def _begin_vote_count(self):
-        count = 0
-        for username, wants in self.begin_vote_info.items():
-            if wants is True:
-                count += 1
-        return count
+    def subscribe_spectator(self, subscription: Subscription | AsyncSubscription | None = None) -> Subscription | AsyncSubscription:
+        return self.updates.subscribe(SPECTATORS, subscription)
 
-    def _has_mafia_win_condition(self):
-        return len(self.mafia_alive_players) >= (len(self.alive_players) + 1) // 2
+    def unsubscribe_spectator(self, subscription: Subscription | AsyncSubscription):
+        self.updates.unsubscribe(SPECTATORS, subscription)
 
-    def _has_mafia_lost_condition(self):
-        return all([not player.is_mafia for player in self.alive_players.values()])
+    def _notify_audience(self, audience: Audience):
+        self.updates.touch(audience_usernames(audience, self.players.values()))
+
+    def has_player(self, username):
+        return self.engine.has_player(username)
 
     @property
     def id(self):
         return self._id
 
     @property
-    def is_waiting_for_players(self):
-        return self.status == mafia_pb2.Room.RoomStatus.WAITING_FOR_PLAYERS
+    def version(self):
+        return self.updates.version
 
     @property
-    def is_chat_phase(self):
-        return self.status == mafia_pb2.Room.RoomStatus.CHAT_PHASE
+    def game_rules(self):
+        return self.engine.game_rules
 
     @property
-    def is_vote_phase(self):
-        return self.status == mafia_pb2.Room.RoomStatus.VOTE_PHASE
+    def status(self):
+        return self.engine.status
 
     @property
-    def is_night_phase(self):
-        return self.status == mafia_pb2.Room.RoomStatus.NIGHT_PHASE
+    def day_number(self):
+        return self.engine.day_number
+
+    @property
+    def players(self):
+        return self.engine.players
+
+    @property
+    def chat(self):
+        return self.engine.chat
+
+    @property
+    def voting(self):
+        return self.engine.voting
 
     @property
-    def mafia_players(self):
-        return {username: player for username, player in self.players.items() if player.is_mafia}
+    def phase_deadline(self):
+        return self.engine.phase_deadline
 
     @property
-    def sheriff_players(self):
-        return {username: player for username, player in self.players.items() if player.is_sheriff}
+    def is_finished(self):
+        return self.engine.is_finished
 
     @property
-    def alive_players(self):
-        return {username: player for username, player in self.players.items() if player.is_alive}
+    def is_waiting_for_players(self):
+        return self.engine.is_waiting_for_players
+
+    @property
+    def is_chat_phase(self):
+        return self.engine.is_chat_phase
 
     @property
-    def mafia_alive_players(self):
-        return {username: player for username, player in self.players.items() if player.is_mafia and player.is_alive}
+    def is_vote_phase(self):
+        return self.engine.is_vote_phase
+
+    @property
+    def is_night_phase(self):
+        return self.engine.is_night_phase
+
+
+JOURNALED_METHODS = {  # op -> (method name, types of arguments)
+    OP_ADD_PLAYER: ('add_player', (str,)),
+    OP_REMOVE_PLAYER: ('remove_player', (str,)),
+    OP_SEND_MESSAGE: ('send_message', (str, str)),
+    OP_BEGIN_VOTE: ('begin_vote', (str,)),
+    OP_VOTE: ('vote', (str, str)),
+    OP_MAFIA_VOTE: ('mafia_vote', (str, str)),
+    OP_SHERIFF_VOTE: ('sheriff_vote', (str, str)),
+    OP_EXPOSE: ('expose', (str, str)),
+    OP_PHASE_TIMEOUT: ('on_phase_timeout', (int,)),
+}
+
+
+ACTION_LOGS = {  # op -> (logger, message formatted with arguments of the action)
+    OP_ADD_PLAYER: (room_logger, 'Add player: {}'),
+    OP_REMOVE_PLAYER: (room_logger, 'Remove player: {}'),
+    OP_SEND_MESSAGE: (chat_logger, 'Send message by {}: {}'),
+    OP_BEGIN_VOTE: (vote_logger, 'Begin vote by {}'),
+    OP_VOTE: (vote_logger, 'Vote by {} to {}'),
+    OP_MAFIA_VOTE: (vote_logger, 'Vote by mafia {} to {}'),
+    OP_SHERIFF_VOTE: (vote_logger, 'Vote by sheriff {} to {}'),
+    OP_EXPOSE: (room_logger, 'Expose publicly by sheriff {} to {}'),
+    OP_PHASE_TIMEOUT: (room_logger, 'Phase timeout: {}'),
+}
+
+
+PLAY_ACTIONS = {  # kind of mafia_pb2.PlayAction -> applier
+    'SendMessage': lambda engine, username, action: engine.send_message(username, action.SendMessage),
+    'BeginVote': lambda engine, username, action: engine.begin_vote(username),
+    'Vote': lambda engine, username, action: engine.vote(username, action.Vote.Username),
+    'MafiaVote': lambda engine, username, action: engine.mafia_vote(username, action.MafiaVote.Username),
+    'SheriffVote': lambda engine, username, action: engine.sheriff_vote(username, action.SheriffVote.Username),
+    'Expose': lambda engine, username, action: engine.expose(username, action.Expose.Username),
+}
@@ -0,0 +1,283 @@
+import asyncio
+import grpc
+import itertools
+import zlib
+from typing import List
+from proto import mafia_pb2
+
+
+FORWARDED_KEY = 'x-mafia-forwarded'  # set on requests forwarded to the owner, they are always handled by the receiver
+SERVICE_PREFIX = '/Coordinator/'
+MAX_TIMEOUT = 10 ** 9  # seconds
+SERVER_OPTIONS = [('grpc.so_reuseport', 1)]  # workers share the port, connections are balanced between them by the kernel
+
+
+def _room_key(request) -> str:
+    return request.RoomId.Value
+
+
+def _play_key(request: mafia_pb2.PlayRequest) -> str | None:
+    if request.WhichOneof('Request') != 'Connect':
+        return None  # handled by the receiver, which rejects the stream
+    return request.Connect.RoomId.Value
+
+
+def lobby_key(game_rules: mafia_pb2.GameRules) -> str:
+    return f'lobby/{game_rules.ActivePlayersNumber}/{game_rules.MafiaNumber}/{game_rules.SheriffNumber}/{game_rules.TieBreak}'
+
+
+# NOTE: requests are routed by room id, players looking for a game are routed by game rules,
+# so a lobby bucket lives on one worker and rooms formed by it are owned by the same worker;
+# CreateRoom without room id is handled by the receiver, since ids of new rooms are chosen to be owned by it
+ROUTING_KEYS = {
+    'Connect': _room_key,
+    'ConnectUpdates': _room_key,
+    'Spectate': _room_key,
+    'GetEvents': _room_key,
+    'Disconnect': _room_key,
+    'SendMessage': _room_key,
+    'BeginVote': _room_key,
+    'Vote': _room_key,
+    'MafiaVote': _room_key,
+    'SheriffVote': _room_key,
+    'Expose': _room_key,
+    'Play': _play_key,
+    'FindGame': lambda request: lobby_key(request.GameRules),
+    'CreateRoom': lambda request: request.RoomId.Value or None,
+}
+
+
+class WorkerRouting:
+    def __init__(self, index: int, addresses: List[str]):
+        self.index = index
+        self.addresses = addresses  # internal addresses of all workers, by index
+
+    def owner(self, key: str) -> int:
+        if key == '':
+            return 0  # default room
+        return zlib.crc32(key.encode('utf-8')) % len(self.addresses)
+
+    def is_local(self, key: str | None) -> bool:
+        return key is None or self.owner(key) == self.index
+
+    def peers(self) -> List[int]:
+        return [index for index in range(len(self.addresses)) if index != self.index]
+
+
+def _is_forwarded(handler_call_details) -> bool:
+    return any(key == FORWARDED_KEY for key, _ in handler_call_details.invocation_metadata or ())
+
+
+def _forwarded_metadata(context):
+    return tuple(context.invocation_metadata()) + ((FORWARDED_KEY, '1'),)
+
+
+def call_timeout(context) -> float | None:
+    # NOTE: sync server reports a huge number instead of None if client hasn't set a deadline
+    time_remaining = context.time_remaining()
+    return time_remaining if time_remaining is not None and time_remaining < MAX_TIMEOUT else None
+
+
+def _identity(data):
+    return data
+
+
+# NOTE: routed handlers take and return bytes: request is parsed once to find its key and
+# passed to the local behaviour as is, forwarded requests and responses aren't parsed at all
+class RoutingInterceptor(grpc.ServerInterceptor):
+    def __init__(self, routing: WorkerRouting):
+        self.routing = routing
+        self._channels = {index: grpc.insecure_channel(routing.addresses[index]) for index in routing.peers()}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or _is_forwarded(handler_call_details):
+            return handler
+        method = handler_call_details.method.rpartition('/')[2]
+        if method == 'ListRooms':
+            return handler._replace(unary_unary=self._list_rooms(handler.unary_unary))
+        routing_key = ROUTING_KEYS.get(method)
+        if routing_key is None:
+            return handler
+        deserialize = handler.request_deserializer or _identity
+        serialize = handler.response_serializer or _identity
+        path = handler_call_details.method
+        if handler.unary_unary is not None:
+            behavior = self._route_unary(path, routing_key, deserialize, serialize, handler.unary_unary)
+            return handler._replace(unary_unary=behavior, request_deserializer=None, response_serializer=None)
+        if handler.unary_stream is not None:
+            behavior = self._route_unary_stream(path, routing_key, deserialize, serialize, handler.unary_stream)
+            return handler._replace(unary_stream=behavior, request_deserializer=None, response_serializer=None)
+        if handler.stream_stream is not None:
+            behavior = self._route_stream_stream(path, routing_key, deserialize, serialize, handler.stream_stream)
+            return handler._replace(stream_stream=behavior, request_deserializer=None, response_serializer=None)
+        return handler
+
+    def _route_unary(self, path, routing_key, deserialize, serialize, behavior):
+        def route(data: bytes, context):
+            request = deserialize(data)
+            if self.routing.is_local(routing_key(request)):
+                return serialize(behavior(request, context))
+            try:
+                return self._channels[self.routing.owner(routing_key(request))].unary_unary(path)(
+                    data, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            except grpc.RpcError as error:
+                context.abort(error.code(), error.details())
+        return route
+
+    def _route_unary_stream(self, path, routing_key, deserialize, serialize, behavior):
+        def route(data: bytes, context):
+            request = deserialize(data)
+            if self.routing.is_local(routing_key(request)):
+                for response in behavior(request, context):
+                    yield serialize(response)
+                return
+            call = self._channels[self.routing.owner(routing_key(request))].unary_stream(path)(
+                data, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            context.add_callback(call.cancel)
+            yield from _forwarded_responses(call, context)
+        return route
+
+    def _route_stream_stream(self, path, routing_key, deserialize, serialize, behavior):
+        def route(request_iterator, context):
+            first = next(request_iterator, None)
+            first_request = deserialize(first) if first is not None else None
+            if first_request is None or self.routing.is_local(routing_key(first_request)):
+                requests = itertools.chain(() if first is None else (first_request,), map(deserialize, request_iterator))
+                for response in behavior(requests, context):
+                    yield serialize(response)
+                return
+            call = self._channels[self.routing.owner(routing_key(first_request))].stream_stream(path)(
+                itertools.chain((first,), request_iterator), timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            context.add_callback(call.cancel)
+            yield from _forwarded_responses(call, context)
+        return route
+
+    def _list_rooms(self, behavior):
+        def list_rooms(request: mafia_pb2.ListRoomsRequest, context):
+            path = SERVICE_PREFIX + 'ListRooms'
+            calls = [
+                self._channels[index].unary_unary(path, request_serializer=mafia_pb2.ListRoomsRequest.SerializeToString, response_deserializer=mafia_pb2.RoomList.FromString).future(
+                    request, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+                for index in self.routing.peers()
+            ]
+            room_list = behavior(request, context)
+            try:
+                for call in calls:
+                    room_list.Rooms.extend(call.result().Rooms)
+            except grpc.RpcError as error:
+                context.abort(error.code(), error.details())
+            return room_list
+        return list_rooms
+
+
+def _forwarded_responses(call, context):
+    try:
+        yield from call
+    except grpc.RpcError as error:
+        if error.code() != grpc.StatusCode.CANCELLED:
+            context.abort(error.code(), error.details())
+
+
+class AsyncRoutingInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, routing: WorkerRouting):
+        self.routing = routing
+        self._channels = {index: grpc.aio.insecure_channel(routing.addresses[index]) for index in routing.peers()}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or _is_forwarded(handler_call_details):
+            return handler
+        method = handler_call_details.method.rpartition('/')[2]
+        if method == 'ListRooms':
+            return handler._replace(unary_unary=self._list_rooms(handler.unary_unary))
+        routing_key = ROUTING_KEYS.get(method)
+        if routing_key is None:
+            return handler
+        deserialize = handler.request_deserializer or _identity
+        serialize = handler.response_serializer or _identity
+        path = handler_call_details.method
+        if handler.unary_unary is not None:
+            behavior = self._route_unary(path, routing_key, deserialize, serialize, handler.unary_unary)
+            return handler._replace(unary_unary=behavior, request_deserializer=None, response_serializer=None)
+        if handler.unary_stream is not None:
+            behavior = self._route_unary_stream(path, routing_key, deserialize, serialize, handler.unary_stream)
+            return handler._replace(unary_stream=behavior, request_deserializer=None, response_serializer=None)
+        if handler.stream_stream is not None:
+            behavior = self._route_stream_stream(path, routing_key, deserialize, serialize, handler.stream_stream)
+            return handler._replace(stream_stream=behavior, request_deserializer=None, response_serializer=None)
+        return handler
+
+    def _route_unary(self, path, routing_key, deserialize, serialize, behavior):
+        async def route(data: bytes, context):
+            request = deserialize(data)
+            if self.routing.is_local(routing_key(request)):
+                return serialize(await behavior(request, context))
+            try:
+                return await self._channels[self.routing.owner(routing_key(request))].unary_unary(path)(
+                    data, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            except grpc.aio.AioRpcError as error:
+                await context.abort(error.code(), error.details())
+        return route
+
+    def _route_unary_stream(self, path, routing_key, deserialize, serialize, behavior):
+        async def route(data: bytes, context):
+            request = deserialize(data)
+            if self.routing.is_local(routing_key(request)):
+                async for response in behavior(request, context):
+                    yield serialize(response)
+                return
+            call = self._channels[self.routing.owner(routing_key(request))].unary_stream(path)(
+                data, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            async for response in _async_forwarded_responses(call, context):
+                yield response
+        return route
+
+    def _route_stream_stream(self, path, routing_key, deserialize, serialize, behavior):
+        async def route(request_iterator, context):
+            first = await anext(request_iterator, None)
+            first_request = deserialize(first) if first is not None else None
+            if first_request is None or self.routing.is_local(routing_key(first_request)):
+                async for response in behavior(_prepended(first_request, request_iterator, deserialize), context):
+                    yield serialize(response)
+                return
+            call = self._channels[self.routing.owner(routing_key(first_request))].stream_stream(path)(
+                _prepended(first, request_iterator, _identity), timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+            async for response in _async_forwarded_responses(call, context):
+                yield response
+        return route
+
+    def _list_rooms(self, behavior):
+        async def list_rooms(request: mafia_pb2.ListRoomsRequest, context):
+            path = SERVICE_PREFIX + 'ListRooms'
+            calls = [
+                self._channels[index].unary_unary(path, request_serializer=mafia_pb2.ListRoomsRequest.SerializeToString, response_deserializer=mafia_pb2.RoomList.FromString)(
+                    request, timeout=call_timeout(context), metadata=_forwarded_metadata(context))
+                for index in self.routing.peers()
+            ]
+            room_list = await behavior(request, context)
+            try:
+                for peer_room_list in await asyncio.gather(*calls):
+                    room_list.Rooms.extend(peer_room_list.Rooms)
+            except grpc.aio.AioRpcError as error:
+                await context.abort(error.code(), error.details())
+            return room_list
+        return list_rooms
+
+
+async def _prepended(first, request_iterator, deserialize):
+    if first is not None:
+        yield first
+    async for request in request_iterator:
+        yield deserialize(request)
+
+
+async def _async_forwarded_responses(call, context):
+    try:
+        async for response in call:
+            yield response
+    except grpc.aio.AioRpcError as error:
+        if error.code() != grpc.StatusCode.CANCELLED:
+            await context.abort(error.code(), error.details())
+    finally:
+        call.cancel()  # client of the receiver has cancelled the stream
@@ -0,0 +1,197 @@
+import heapq
+import logging
+import math
+import threading
+import time
+import traceback
+from typing import Callable, List, NamedTuple
+
+
+class PendingTimer(NamedTuple):
+    deadline: float
+    name: str
+
+
+class TimerHandle:
+    def __init__(self, scheduler: 'PhaseScheduler', tick: int, deadline: float, callback: Callable, args: tuple, name: str):
+        self._scheduler = scheduler
+        self.tick = tick
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self) -> bool:
+        return self._scheduler.cancel(self)
+
+
+# NOTE: hashed timing wheel, timer is put into the slot of its tick, so arming and
+# cancelling are O(1); one thread advances the wheel tick by tick and fires due timers.
+# Timers of far ticks share slots with near ones and are skipped until their tick comes
+class PhaseScheduler:
+    def __init__(self, tick_s=0.05, slots_number=1024, name='phase-scheduler'):
+        self._tick_s = tick_s
+        self._slots = [{} for _ in range(slots_number)]  # List[Dict[TimerHandle, None]]: ordered sets of timers
+        self._start_time = time.monotonic()
+        self._current_tick = 0  # every tick before it is processed
+        self._timers_number = 0
+        self.fired_number = 0
+        self.cancelled_number = 0
+        self._lock = threading.Lock()
+        self._has_timers = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, callback: Callable, *args, name: str = '') -> TimerHandle:
+        deadline = time.time() + delay
+        with self._lock:
+            now = time.monotonic()
+            if self._timers_number == 0:
+                # NOTE: ticks passed while the wheel was idle have no timers, so they are skipped
+                self._current_tick = max(self._current_tick, self._tick_of(now))
+            tick = max(self._tick_of(now + delay), self._current_tick)
+            handle = TimerHandle(self, tick, deadline, callback, args, name)
+            self._slots[tick % len(self._slots)][handle] = None
+            self._timers_number += 1
+            if self._timers_number == 1:
+                self._has_timers.notify()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        # returns False if timer has already fired or been cancelled
+        with self._lock:
+            if handle.cancelled or self._slots[handle.tick % len(self._slots)].pop(handle, False) is False:
+                return False
+            handle.cancelled = True
+            self._timers_number -= 1
+            self.cancelled_number += 1
+        return True
+
+    def pending(self) -> List[PendingTimer]:
+        with self._lock:
+            timers = [PendingTimer(handle.deadline, handle.name) for slot in self._slots for handle in slot]
+        return sorted(timers)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._has_timers.notify()
+        self._thread.join()
+
+    def time(self) -> float:
+        return time.time()
+
+    def __len__(self):
+        return self._timers_number
+
+    def _tick_of(self, monotonic_time: float) -> int:
+        return math.ceil((monotonic_time - self._start_time) / self._tick_s)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._has_timers.wait_for(lambda: self._timers_number > 0 or self._closed)
+                if self._closed:
+                    return
+                tick_time = self._start_time + self._current_tick * self._tick_s
+            delay = tick_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._fire(self._advance())
+
+    def _advance(self) -> List[TimerHandle]:
+        now_tick = math.floor((time.monotonic() - self._start_time) / self._tick_s)  # last tick which has come
+        due = []
+        with self._lock:
+            while self._current_tick <= now_tick and self._timers_number > len(due):
+                slot = self._slots[self._current_tick % len(self._slots)]
+                for handle in [handle for handle in slot if handle.tick <= self._current_tick]:
+                    del slot[handle]
+                    handle.fired = True
+                    due.append(handle)
+                self._current_tick += 1
+            self._timers_number -= len(due)
+            self.fired_number += len(due)
+        return due
+
+    def _fire(self, handles: List[TimerHandle]):
+        for handle in handles:
+            try:
+                handle.callback(*handle.args)
+            except Exception as error:
+                logging.error(f'Timer {handle.name} failed: {error}\nTraceback: {traceback.format_exc()}')
+
+
+# NOTE: scheduler with a virtual clock for headless games, time moves only when
+# advance() is called and due timers are fired by the calling thread in order of deadlines
+class VirtualScheduler:
+    def __init__(self, start_time=0.0):
+        self._time = start_time
+        self._heap = []  # List[Tuple[float, int, TimerHandle]]: cancelled timers are removed lazily
+        self._counter = 0
+        self._timers_number = 0
+        self.fired_number = 0
+        self.cancelled_number = 0
+
+    def call_later(self, delay: float, callback: Callable, *args, name: str = '') -> TimerHandle:
+        handle = TimerHandle(self, self._counter, self._time + delay, callback, args, name)
+        heapq.heappush(self._heap, (handle.deadline, self._counter, handle))
+        self._counter += 1
+        self._timers_number += 1
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        if handle.cancelled or handle.fired:
+            return False
+        handle.cancelled = True
+        self._timers_number -= 1
+        self.cancelled_number += 1
+        return True
+
+    def pending(self) -> List[PendingTimer]:
+        return sorted(PendingTimer(handle.deadline, handle.name) for _, _, handle in self._heap if not handle.cancelled)
+
+    def advance(self, seconds: float):
+        self.advance_to(self._time + seconds)
+
+    def advance_to(self, deadline: float):
+        while len(self._heap) > 0 and self._heap[0][0] <= deadline:
+            _, _, handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                continue
+            self._time = max(self._time, handle.deadline)
+            handle.fired = True
+            self._timers_number -= 1
+            self.fired_number += 1
+            handle.callback(*handle.args)
+        self._time = max(self._time, deadline)
+
+    def next_deadline(self) -> float | None:
+        while len(self._heap) > 0 and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if len(self._heap) > 0 else None
+
+    def close(self):
+        self._heap = []
+        self._timers_number = 0
+
+    def time(self) -> float:
+        return self._time
+
+    def __len__(self):
+        return self._timers_number
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_scheduler() -> PhaseScheduler:
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = PhaseScheduler()
+        return _default_scheduler
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Iterable
+
+
+SPECTATORS = None  # subscriptions of spectators are notified only about changes visible to everyone
+
+
+class Subscription:
+    def __init__(self):
+        self._event = threading.Event()
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def notify(self):
+        self._event.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._event.set()
+
+    def wait(self, timeout=None) -> bool:
+        notified = self._event.wait(timeout)
+        # NOTE: state is mutated before notify() is called, so any notification
+        # dropped by this clear() is still covered by the next view
+        self._event.clear()
+        return notified
+
+
+class AsyncSubscription:
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def notify(self):
+        # NOTE: rooms are also mutated from phase timer threads
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    def cancel(self):
+        self._cancelled = True
+        self.notify()
+
+    async def wait(self):
+        await self._event.wait()
+        self._event.clear()
+
+
+class RoomUpdates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._subscriptions = defaultdict(set)  # Dict[str | None, Set[Subscription]]: username2subscriptions
+
+    @property
+    def version(self):
+        return self._version
+
+    def has_subscriptions(self) -> bool:
+        with self._lock:
+            return len(self._subscriptions) > 0
+
+    def subscribe(self, username, subscription: Subscription | AsyncSubscription | None = None) -> Subscription | AsyncSubscription:
+        subscription = subscription or Subscription()
+        with self._lock:
+            self._subscriptions[username].add(subscription)
+        return subscription
+
+    def unsubscribe(self, username, subscription: Subscription | AsyncSubscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(username)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if len(subscriptions) == 0:
+                del self._subscriptions[username]
+
+    def touch(self, usernames: Iterable[str] | None = None) -> int:
+        with self._lock:
+            self._version += 1
+            if usernames is None:
+                targets = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+            else:
+                targets = [s for username in usernames for s in self._subscriptions.get(username, ())]
+            version = self._version
+        for subscription in targets:
+            subscription.notify()
+        return version
@@ -1,36 +1,76 @@
-
+import random
 from typing import Dict
 from proto import mafia_pb2
 from server.server_player import Player
 
 
+VTB_SUSPECT_ORDER = mafia_pb2.GameRules.VoteTieBreak.VTB_SUSPECT_ORDER
+VTB_FIRST_TO_REACH = mafia_pb2.GameRules.VoteTieBreak.VTB_FIRST_TO_REACH
+VTB_RANDOM = mafia_pb2.GameRules.VoteTieBreak.VTB_RANDOM
+
+
+# NOTE: suspects are kept in buckets by number of votes, every vote moves a suspect
+# to the neighbour bucket and the maximum changes by at most one, so voting and
+# finding the leaders are O(1); only leaders with equal votes are compared on a tie
 class Voting:
-    def __init__(self, players: Dict[str, Player], suspects: Dict[str, Player]):
+    def __init__(self, players: Dict[str, Player], suspects: Dict[str, Player], tie_break=VTB_SUSPECT_ORDER, rng: random.Random | None = None):
         self.voting = {username: None for username in players}
         self.suspects = {username: 0 for username in suspects}
+        self.tie_break = tie_break
+        self._random = rng if rng is not None else random.Random(0)
+        self._suspect_indexes = {username: ind for ind, username in enumerate(suspects)}
+        self._suspects_by_votes = [dict.fromkeys(self.suspects)]  # List[Dict[str, None]]: votes_number -> suspects in order of reaching it
+        self._max_votes_number = 0
+        self._voters_left = len(self.voting)
+        self._view = None  # valid until the next vote
 
     def vote(self, username, suspect_username):
         prev_suspect = self.voting[username]
+        if prev_suspect == suspect_username:
+            return
         self.voting[username] = suspect_username
-        if prev_suspect is not None:
-            self.suspects[prev_suspect] -= 1
-        self.suspects[suspect_username] += 1
+        if prev_suspect is None:
+            self._voters_left -= 1
+        else:
+            self._move(prev_suspect, -1)
+        self._move(suspect_username, 1)
+        self._view = None
 
     def get_votes_number(self, suspect_username):
         return self.suspects[suspect_username]
 
     def get_most_voted_username(self):
-        return max(self.suspects, key=self.suspects.get)
+        leaders = self._suspects_by_votes[self._max_votes_number]
+        if len(leaders) == 1 or self.tie_break == VTB_FIRST_TO_REACH:
+            return next(iter(leaders))
+        if self.tie_break == VTB_RANDOM:
+            return self._random.choice(sorted(leaders, key=self._suspect_indexes.__getitem__))
+        return min(leaders, key=self._suspect_indexes.__getitem__)
 
     def is_everyone_voted(self):
-        return all([vote is not None for vote in self.voting.values()])
+        return self._voters_left == 0
 
     def view(self, player: Player) -> mafia_pb2.Voting:
-        votes = []
-        for suspect_username, votes_number in self.suspects.items():
-            vote = mafia_pb2.Voting.Vote(
-                SuspectUsername = suspect_username,
-                VotesNumber = votes_number,
-            )
-            votes.append(vote)
-        return mafia_pb2.Voting(Votes=votes)
+        if self._view is None:
+            votes = []
+            for suspect_username, votes_number in self.suspects.items():
+                vote = mafia_pb2.Voting.Vote(
+                    SuspectUsername = suspect_username,
+                    VotesNumber = votes_number,
+                )
+                votes.append(vote)
+            self._view = mafia_pb2.Voting(Votes=votes)
+        return self._view
+
+    def _move(self, suspect_username, votes_delta):
+        votes_number = self.suspects[suspect_username]
+        del self._suspects_by_votes[votes_number][suspect_username]
+        votes_number += votes_delta
+        self.suspects[suspect_username] = votes_number
+        if votes_number == len(self._suspects_by_votes):
+            self._suspects_by_votes.append({})
+        self._suspects_by_votes[votes_number][suspect_username] = None
+        if votes_number > self._max_votes_number:
+            self._max_votes_number = votes_number
+        elif len(self._suspects_by_votes[self._max_votes_number]) == 0:
+            self._max_votes_number -= 1
@@ -0,0 +1,47 @@
+import functools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+from typing import Callable
+from server.config import Config
+from server.server_routing import WorkerRouting
+
+
+# NOTE: workers are separate processes, so views of rooms owned by different workers
+# are built and serialized in parallel; they share the public port (SO_REUSEPORT) and
+# forward requests to the owner of the room through its internal port
+def run_workers(config: Config, serve: Callable[[Config, WorkerRouting], None]):
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=serve, args=(config.worker_config(index), config.worker_routing(index)), name=f'mafia-worker-{index}')
+        for index in range(config.workers)
+    ]
+    signal.signal(signal.SIGTERM, _exit)
+    # NOTE: lock profiles are dumped by workers, SIGUSR2 would terminate the parent by default
+    signal.signal(signal.SIGUSR2, functools.partial(_forward_signal, processes))
+    try:
+        for process in processes:
+            process.start()
+        # a worker owns its rooms exclusively, so the server can't go on without any of them
+        multiprocessing.connection.wait([process.sentinel for process in processes])
+        for process in processes:
+            if process.exitcode is not None:
+                logging.error(f'Worker {process.name} has exited with code {process.exitcode}, stop all workers')
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+
+def _exit(signum, frame):
+    raise SystemExit(0)
+
+
+def _forward_signal(processes, signum, frame):
+    for process in processes:
+        if process.pid is not None and process.is_alive():
+            os.kill(process.pid, signum)
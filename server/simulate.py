@@ -0,0 +1,36 @@
+import argparse
+import json
+import logging
+import time
+from proto import mafia_pb2
+from server.server_engine import simulate
+
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Simulate headless mafia games played by random bots')
+    parser.add_argument('--games', type=int, default=1000, help='Number of games')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the first game, every next game uses next seed')
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--mafia', type=int, default=1)
+    parser.add_argument('--sheriffs', type=int, default=1)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    game_rules = mafia_pb2.GameRules(
+        ActivePlayersNumber=args.players,
+        MafiaNumber=args.mafia,
+        SheriffNumber=args.sheriffs,
+    )
+    start = time.perf_counter()
+    summary = simulate(game_rules, args.games, args.seed)
+    summary['games_per_second'] = args.games / (time.perf_counter() - start)
+    print(json.dumps(summary, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,5 @@ from . import (  # noqa
     inspect,
     lock,
     logging,
+    rpc,
 )
\ No newline at end of file
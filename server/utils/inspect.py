@@ -41,11 +41,10 @@ class FunctionSignature:
         return self._module_name
 
     def get_arguments_map(self, *args, **kwargs) -> Dict[str, Any]:
-        arguments_map = {}
-        for arg_ind, arg_name in enumerate(self.pos_args):
-            arguments_map[arg_name] = args[arg_ind]
-        for kwarg_name, kwarg_default_value in self.kwargs.values():
-            arguments_map[kwarg_name] = kwargs.get(kwarg_name, kwarg_default_value)
+        arguments_map = dict(zip(self._all_args, args))
+        for kwarg_name, kwarg_default_value in self.kwargs.items():
+            if kwarg_name not in arguments_map:
+                arguments_map[kwarg_name] = kwargs.get(kwarg_name, kwarg_default_value)
         return arguments_map
 
     def __str__(self):
@@ -1,57 +1,127 @@
-import inspect
 import functools
 import threading
+import time
 from contextlib import contextmanager
 
+from .lock_profiler import AcquireProbe, MethodLockStats, lock_profiler
 
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+# NOTE: readers share the lock, writers are exclusive and preferred: once a writer
+# is waiting, new readers queue up behind it so a stream of views can't starve actions
 class ReadWriteLock:
     def __init__(self):
         self._lock = threading.Lock()
-        self._read_lock = threading.Lock()
-        self._write_lock = threading.Lock()
+        self._can_read = threading.Condition(self._lock)
+        self._can_write = threading.Condition(self._lock)
         self._read_count = 0
+        self._readers_waiting = 0
+        self._writers_waiting = 0
         self._write_owner = None
-
-    def acquire_read(self):
+        self._write_depth = 0
+        self._local = threading.local()  # read depth of current thread, so nested reads don't wait for writers
+
+    def acquire_read(self, timeout=None, probe: AcquireProbe | None = None) -> bool:
+        read_depth = getattr(self._local, 'read_depth', 0)
+        if read_depth > 0:
+            self._local.read_depth = read_depth + 1
+            return True
         with self._lock:
+            if probe is not None:
+                self._probe(probe, not self._is_readable())
+            self._readers_waiting += 1
+            try:
+                if not self._can_read.wait_for(self._is_readable, timeout):
+                    return False
+            finally:
+                self._readers_waiting -= 1
             self._read_count += 1
-            if self._read_count == 1:
-                self._write_lock.acquire()
-        self._read_lock.acquire()
+        self._local.read_depth = 1
+        if probe is not None:
+            probe.acquired = True
+        return True
 
     def release_read(self):
-        self._read_lock.release()
+        self._local.read_depth -= 1
+        if self._local.read_depth > 0:
+            return
         with self._lock:
             self._read_count -= 1
-            if self._read_count == 0:
-                self._write_lock.release()
+            if self._read_count == 0 and self._writers_waiting > 0:
+                self._can_write.notify()
 
-    def acquire_write(self):
-        self._write_lock.acquire()
-        self._write_owner = threading.current_thread().ident
+    def acquire_write(self, timeout=None, probe: AcquireProbe | None = None) -> bool:
+        me = threading.get_ident()
+        if getattr(self._local, 'read_depth', 0) > 0:
+            raise RuntimeError('Read lock can\'t be upgraded to write lock')
+        with self._lock:
+            if self._write_owner == me:
+                self._write_depth += 1
+                return True
+            if probe is not None:
+                self._probe(probe, not self._is_writable())
+            self._writers_waiting += 1
+            try:
+                acquired = self._can_write.wait_for(self._is_writable, timeout)
+            finally:
+                self._writers_waiting -= 1
+            if not acquired:
+                if self._writers_waiting == 0:
+                    self._can_read.notify_all()
+                return False
+            self._write_owner = me
+            self._write_depth = 1
+        if probe is not None:
+            probe.acquired = True
+        return True
 
     def release_write(self):
-        if self._write_owner == threading.current_thread().ident:
+        with self._lock:
+            if self._write_owner != threading.get_ident():
+                raise RuntimeError('Write lock is released by thread which doesn\'t own it')
+            self._write_depth -= 1
+            if self._write_depth > 0:
+                return
             self._write_owner = None
-        self._write_lock.release()
+            if self._writers_waiting > 0:
+                self._can_write.notify()
+            else:
+                self._can_read.notify_all()
+
+    def _probe(self, probe: AcquireProbe, contended: bool):
+        probe.contended = contended
+        probe.readers_waiting = self._readers_waiting
+        probe.writers_waiting = self._writers_waiting
+
+    def _is_readable(self):
+        return self._write_owner is None and self._writers_waiting == 0
+
+    def _is_writable(self):
+        return self._write_owner is None and self._read_count == 0
+
+    @property
+    def is_write_owner(self):
+        return self._write_owner == threading.get_ident()
 
     @contextmanager
-    def read_lock(self):
-        if self._write_owner == threading.current_thread().ident:
+    def read_lock(self, timeout=None, probe: AcquireProbe | None = None):
+        if self.is_write_owner:
             yield
             return
-        self.acquire_read()
+        if not self.acquire_read(timeout, probe):
+            raise LockTimeout(f'Failed to acquire read lock in {timeout} seconds')
         try:
             yield
         finally:
             self.release_read()
 
     @contextmanager
-    def write_lock(self):
-        if self._write_owner == threading.current_thread().ident:
-            yield
-            return
-        self.acquire_write()
+    def write_lock(self, timeout=None, probe: AcquireProbe | None = None):
+        if not self.acquire_write(timeout, probe):
+            raise LockTimeout(f'Failed to acquire write lock in {timeout} seconds')
         try:
             yield
         finally:
@@ -63,23 +133,56 @@ ATTR_NAME = f'{__name__}_rwlock'
 
 def with_RW_lock(cls):
     assert not hasattr(cls, ATTR_NAME), f'Failed to add RW lock since class "{cls}" uses required attribute {ATTR_NAME}'
-    setattr(cls, ATTR_NAME, ReadWriteLock())
+    init = cls.__init__
+
+    @functools.wraps(init)
+    def __init__(self, *args, **kwargs):
+        setattr(self, ATTR_NAME, ReadWriteLock())
+        init(self, *args, **kwargs)
+
+    cls.__init__ = __init__
     return cls
 
 
-def read_lock(func):
+def read_lock(func=None, *, timeout=None):
+    if func is None:
+        return functools.partial(read_lock, timeout=timeout)
+    stats = lock_profiler.method_stats(func.__qualname__, 'read')
+
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         rwlock: ReadWriteLock = getattr(self, ATTR_NAME)
-        with rwlock.read_lock():
+        if lock_profiler.enabled:
+            return _profiled_call(rwlock.read_lock, timeout, stats, func, self, args, kwargs)
+        with rwlock.read_lock(timeout):
             return func(self, *args, **kwargs)
     return wrapper
 
 
-def write_lock(func):
+def write_lock(func=None, *, timeout=None):
+    if func is None:
+        return functools.partial(write_lock, timeout=timeout)
+    stats = lock_profiler.method_stats(func.__qualname__, 'write')
+
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         rwlock: ReadWriteLock = getattr(self, ATTR_NAME)
-        with rwlock.write_lock():
+        if lock_profiler.enabled:
+            return _profiled_call(rwlock.write_lock, timeout, stats, func, self, args, kwargs)
+        with rwlock.write_lock(timeout):
             return func(self, *args, **kwargs)
     return wrapper
+
+
+# NOTE: only acquisitions which actually take the lock are recorded, nested ones
+# are a part of the hold time of the outermost call
+def _profiled_call(lock_context, timeout, stats: MethodLockStats, func, self, args, kwargs):
+    probe = AcquireProbe()
+    start = acquired_at = time.perf_counter()
+    try:
+        with lock_context(timeout, probe):
+            acquired_at = time.perf_counter()
+            return func(self, *args, **kwargs)
+    finally:
+        if probe.acquired:
+            stats.record(acquired_at - start, time.perf_counter() - acquired_at, probe)
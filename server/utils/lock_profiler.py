@@ -0,0 +1,159 @@
+import bisect
+import json
+import signal
+import sys
+import threading
+from typing import Dict, List
+
+
+WAIT_BUCKETS_S = tuple(2 ** power / 1e6 for power in range(25))  # 1us .. ~16s
+SORT_KEYS = ('hold_total_s', 'wait_total_s', 'hold_max_s', 'wait_max_s', 'contended', 'acquisitions')
+
+
+class AcquireProbe:
+    __slots__ = ('acquired', 'contended', 'readers_waiting', 'writers_waiting')
+
+    def __init__(self):
+        self.acquired = False  # stays False if the lock is already held by the thread or isn't acquired in time
+        self.contended = False
+        self.readers_waiting = 0
+        self.writers_waiting = 0
+
+
+class DurationHistogram:
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(WAIT_BUCKETS_S) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, duration: float):
+        self.counts[bisect.bisect_left(WAIT_BUCKETS_S, duration)] += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket containing the quantile
+        rank = q * sum(self.counts)
+        seen = 0
+        for bound, count in zip(WAIT_BUCKETS_S, self.counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return bound
+        return self.max
+
+    def buckets(self) -> Dict[str, int]:
+        bounds = [f'{bound:.6f}' for bound in WAIT_BUCKETS_S] + ['+Inf']
+        return {bound: count for bound, count in zip(bounds, self.counts) if count > 0}
+
+
+# NOTE: stats are shared by all instances of the class, samples are recorded
+# without locks like metrics are, so a sample can rarely be lost under contention
+class MethodLockStats:
+    __slots__ = ('method', 'mode', 'acquisitions', 'contended', 'readers_waiting_total', 'writers_waiting_total',
+                 'readers_waiting_max', 'writers_waiting_max', 'wait', 'hold')
+
+    def __init__(self, method: str, mode: str):
+        self.method = method
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.readers_waiting_total = 0
+        self.writers_waiting_total = 0
+        self.readers_waiting_max = 0
+        self.writers_waiting_max = 0
+        self.wait = DurationHistogram()
+        self.hold = DurationHistogram()
+
+    def record(self, wait: float, hold: float, probe: AcquireProbe):
+        self.acquisitions += 1
+        if probe.contended:
+            self.contended += 1
+        self.readers_waiting_total += probe.readers_waiting
+        self.writers_waiting_total += probe.writers_waiting
+        if probe.readers_waiting > self.readers_waiting_max:
+            self.readers_waiting_max = probe.readers_waiting
+        if probe.writers_waiting > self.writers_waiting_max:
+            self.writers_waiting_max = probe.writers_waiting
+        self.wait.observe(wait)
+        self.hold.observe(hold)
+
+    def row(self) -> dict:
+        acquisitions = max(self.acquisitions, 1)
+        return {
+            'method': self.method,
+            'mode': self.mode,
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'contention_rate': self.contended / acquisitions,
+            'wait_total_s': self.wait.total,
+            'wait_max_s': self.wait.max,
+            'wait_p50_s': self.wait.quantile(0.5),
+            'wait_p99_s': self.wait.quantile(0.99),
+            'hold_total_s': self.hold.total,
+            'hold_max_s': self.hold.max,
+            'hold_p50_s': self.hold.quantile(0.5),
+            'hold_p99_s': self.hold.quantile(0.99),
+            'readers_waiting_avg': self.readers_waiting_total / acquisitions,
+            'readers_waiting_max': self.readers_waiting_max,
+            'writers_waiting_avg': self.writers_waiting_total / acquisitions,
+            'writers_waiting_max': self.writers_waiting_max,
+            'wait_histogram': self.wait.buckets(),
+            'hold_histogram': self.hold.buckets(),
+        }
+
+
+# NOTE: profiler is disabled by default, then decorated methods only check the flag;
+# stats of every decorated method are created at decoration time
+class LockProfiler:
+    def __init__(self):
+        self.enabled = False
+        self._stats = {}  # Dict[Tuple[str, str], MethodLockStats]: (method, mode) -> stats
+        self._lock = threading.Lock()
+
+    def method_stats(self, method: str, mode: str) -> MethodLockStats:
+        with self._lock:
+            stats = self._stats.get((method, mode))
+            if stats is None:
+                stats = self._stats[(method, mode)] = MethodLockStats(method, mode)
+            return stats
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            for stats in self._stats.values():
+                stats.reset()
+
+    def dump(self, sort_by='hold_total_s') -> List[dict]:
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f'Unknown sort key {sort_by}, expected one of {", ".join(SORT_KEYS)}')
+        with self._lock:
+            rows = [stats.row() for stats in self._stats.values() if stats.acquisitions > 0]
+        return sorted(rows, key=lambda row: row[sort_by], reverse=True)
+
+    def dump_json(self, sort_by='hold_total_s') -> str:
+        return json.dumps(self.dump(sort_by), indent=4)
+
+    def install_signal_handler(self, signum=signal.SIGUSR2, path: str | None = None):
+        # dump is written to the file (overwritten every time) or to stderr
+        def handler(signum, frame):
+            dump = self.dump_json()
+            if path is None:
+                print(dump, file=sys.stderr, flush=True)
+                return
+            with open(path, 'w') as f:
+                f.write(dump)
+        signal.signal(signum, handler)
+
+
+lock_profiler = LockProfiler()
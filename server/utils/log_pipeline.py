@@ -0,0 +1,132 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+from collections import Counter
+from typing import Dict, NamedTuple
+
+
+class LogPipelineSettings(NamedTuple):
+    level: str = 'INFO'
+    format: str = 'json'  # json (one object per line) or text
+    path: str | None = None  # stdout if not set
+    queue_size: int = 10000  # records are dropped when writer falls behind
+    sampling: Dict[str, float] = {}  # logger name (with children) -> share of records to keep
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            line['exception'] = record.exc_text
+        dropped = getattr(record, 'dropped_before', 0)
+        if dropped > 0:
+            line['dropped_before'] = dropped
+        return json.dumps(line, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self._rates = dict(rates)
+        self._resolved = {}  # Dict[str, float]: logger name -> rate of the closest configured ancestor
+        self.sampled_out = Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._resolved.get(record.name)
+        if rate is None:
+            rate = self._resolved[record.name] = self._resolve(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out[record.name] += 1
+        return False
+
+    def _resolve(self, name) -> float:
+        while name:
+            if name in self._rates:
+                return self._rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+
+# NOTE: emitting thread only puts the record into a bounded queue, it never blocks:
+# if the queue is full the record is dropped and counted, the number of records dropped
+# in a row is attached to the next record which gets into the queue
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self._dropped_in_row = 0
+        self.dropped = Counter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # NOTE: unlike the base class the record isn't copied and formatted, only the
+        # parts which can't be sent to other thread are resolved: arguments and exception
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._lock:
+            record.dropped_before = self._dropped_in_row
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._dropped_in_row += 1
+                self.dropped[record.name] += 1
+                return
+            self._dropped_in_row = 0
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # waits for the writer if the queue is full
+
+
+class LogPipeline:
+    def __init__(self, settings: LogPipelineSettings = LogPipelineSettings()):
+        self.settings = settings
+        self._queue = queue.Queue(maxsize=settings.queue_size)
+        self.handler = DroppingQueueHandler(self._queue)
+        self.sampling = SamplingFilter(settings.sampling)
+        self.handler.addFilter(self.sampling)
+        if settings.path is None:
+            output = logging.StreamHandler(sys.stdout)
+        else:
+            output = logging.FileHandler(settings.path)
+        if settings.format == 'json':
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        self._listener = _QueueListener(self._queue, output)
+        self._output = output
+
+    def start(self):
+        root = logging.getLogger()
+        root.setLevel(self.settings.level)
+        root.addHandler(self.handler)
+        self._listener.start()
+
+    def stop(self):
+        logging.getLogger().removeHandler(self.handler)
+        self._listener.stop()  # writes everything left in the queue
+        self._output.close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            'dropped': dict(self.handler.dropped),
+            'sampled_out': dict(self.sampling.sampled_out),
+            'queued': self._queue.qsize(),
+        }
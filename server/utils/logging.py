@@ -1,43 +1,68 @@
-import wrapt
+import functools
+import string
 import logging
 
-from .inspect import FunctionSignature, inspect_obj_attrs
+from .inspect import FunctionSignature
 
 
+# NOTE: signature of decorated function and names used by message are resolved once
+# at decoration time, on call only referenced attributes of the instance (self) are
+# read and nothing is done at all if the level is disabled
 def logging_on_call(msg, level, logger=None, **format_variables_init):
-    @wrapt.decorator  # preserve information about arguments of decorated function
-    def decorator(func, instance, args, kwargs):
-        attributes = {}
-        if instance is not None:
-            for attr in inspect_obj_attrs(instance):
-                attributes[attr] = getattr(instance, attr)
+    field_names = format_field_names(msg)
+    log = logger or logging.root
 
+    def decorator(func):
         func_sig = FunctionSignature(func)
-        all_args = args
-        if instance is not None:
-            all_args = (instance,) + args
-        arguments_map = func_sig.get_arguments_map(*all_args, **kwargs)
-
-        format_variables = {}
-        for format_variable_name, format_variable_init in format_variables_init.items():
-            format_variables[format_variable_name] = format_variable_init(**arguments_map)
-
-        nonlocal logger
-        logger = logger or logging
-        logger.log(level, msg.format(**(attributes | arguments_map | format_variables)))
-        return func(*args, **kwargs)
+        attribute_names = field_names - set(func_sig.all_args) - set(format_variables_init)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not log.isEnabledFor(level):
+                return func(*args, **kwargs)
+            arguments_map = func_sig.get_arguments_map(*args, **kwargs)
+            log.log(level, msg.format(**_format_variables(attribute_names, arguments_map, format_variables_init)))
+            return func(*args, **kwargs)
+        return wrapper
     return decorator
 
 
-def logging_on_return(msg, level, **format_variables_init):
-    @wrapt.decorator  # preserve information about arguments of decorated function
-    def decorator(func, instance, args, kwargs):
+def logging_on_return(msg, level, logger=None, **format_variables_init):
+    field_names = format_field_names(msg)
+    log = logger or logging.root
+
+    def decorator(func):
         func_sig = FunctionSignature(func)
-        arguments_map = func_sig.get_arguments_map(*args, **kwargs)
-        format_variables = {}
-        for format_variable_name, format_variable_init in format_variables_init.items():
-            format_variables[format_variable_name] = format_variable_init(**arguments_map)
-        result = func(*args, **kwargs)
-        logging.log(level, msg.format(**(arguments_map | format_variables)))
-        return result
+        attribute_names = field_names - set(func_sig.all_args) - set(format_variables_init)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not log.isEnabledFor(level):
+                return func(*args, **kwargs)
+            arguments_map = func_sig.get_arguments_map(*args, **kwargs)
+            result = func(*args, **kwargs)
+            log.log(level, msg.format(**_format_variables(attribute_names, arguments_map, format_variables_init)))
+            return result
+        return wrapper
     return decorator
+
+
+def format_field_names(msg) -> set:
+    # top-level names used by format string: '{player.username}' uses 'player'
+    names = set()
+    for _, field_name, _, _ in string.Formatter().parse(msg):
+        if field_name:
+            names.add(field_name.split('.')[0].split('[')[0])
+    return names
+
+
+def _format_variables(attribute_names, arguments_map, format_variables_init):
+    attributes = {}
+    instance = arguments_map.get('self')
+    if instance is not None:
+        for attr in attribute_names:
+            attributes[attr] = getattr(instance, attr)
+    format_variables = {}
+    for format_variable_name, format_variable_init in format_variables_init.items():
+        format_variables[format_variable_name] = format_variable_init(**arguments_map)
+    return attributes | arguments_map | format_variables
@@ -0,0 +1,48 @@
+import functools
+import grpc
+import logging
+import traceback
+
+
+def _error_message(method_name, error):
+    return f'Got error during {method_name}:\nError: {error}\nTraceback: {traceback.format_exc()}'
+
+
+def status_code(error: Exception) -> grpc.StatusCode:
+    return getattr(error, 'status_code', grpc.StatusCode.INVALID_ARGUMENT)
+
+
+def rpc_errors(func):
+    @functools.wraps(func)
+    def wrapper(self, request, context):
+        try:
+            return func(self, request, context)
+        except Exception as error:
+            msg = _error_message(func.__name__, error)
+            logging.error(msg)
+            context.abort(status_code(error), msg)
+    return wrapper
+
+
+def async_rpc_errors(func):
+    @functools.wraps(func)
+    async def wrapper(self, request, context):
+        try:
+            return await func(self, request, context)
+        except Exception as error:
+            msg = _error_message(func.__name__, error)
+            logging.error(msg)
+            await context.abort(status_code(error), msg)
+    return wrapper
+
+
+# NOTE: handler has to be added to the server before the generated one, so it takes
+# over the method; behaviour of the method yields already serialized responses
+def pre_serialized_stream_handler(service_name, method_name, behavior, request_deserializer):
+    return grpc.method_handlers_generic_handler(service_name, {
+        method_name: grpc.unary_stream_rpc_method_handler(
+            behavior,
+            request_deserializer=request_deserializer,
+            response_serializer=None,
+        ),
+    })